@@ -0,0 +1,97 @@
+import asyncio
+import time
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+
+class IterationBarrier:
+    """
+    Barreira de iteração do PSO. Em vez de dormir um intervalo fixo, a iteração
+    avança assim que todos os robôs comandados confirmarem a posição (`pos:`)
+    ou quando o prazo individual de cada robô expirar.
+
+    Robôs que não confirmaram no prazo (retardatários) continuam pendentes:
+    são excluídos da rodada atual e não devem receber novo comando até que
+    a confirmação atrasada chegue.
+
+    Todos os métodos devem ser chamados a partir do event loop do servidor.
+    """
+    def __init__(self):
+        self._deadlines: Dict[Hashable, float] = {}  # robôs da rodada atual -> prazo absoluto
+        self._outstanding: Set[Hashable] = set()     # comandados e ainda sem confirmação
+        self._acked: Set[Hashable] = set()
+        self._wakeup: Optional[asyncio.Future] = None
+
+    def _notify(self):
+        if self._wakeup is not None and not self._wakeup.done():
+            self._wakeup.set_result(None)
+
+    def begin(self, deadlines: Dict[Hashable, float]):
+        """
+        Inicia uma rodada.
+
+        Args:
+            deadlines (Dict[Hashable, float]): Tempo máximo de espera, em segundos, por robô.
+        """
+        now = time.monotonic()
+        self._deadlines = {key: now + timeout for key, timeout in deadlines.items()}
+        self._outstanding.update(deadlines)
+        self._acked = set()
+
+    def ack(self, key: Hashable):
+        """Registra a confirmação de posição de um robô (chamado por handle_client)."""
+        self._outstanding.discard(key)
+        if key in self._deadlines:
+            self._acked.add(key)
+            self._notify()
+
+    def discard(self, key: Hashable):
+        """Remove um robô desconectado da rodada, sem contá-lo como confirmado."""
+        self._outstanding.discard(key)
+        self._deadlines.pop(key, None)
+        self._notify()
+
+    def extend(self, key: Hashable, timeout: float):
+        """
+        Devolve à rodada atual um robô que já confirmou, com um novo prazo
+        (ex.: recebeu o alvo de um robô morto). A rodada espera pela nova confirmação.
+        """
+        self._acked.discard(key)
+        self._deadlines[key] = time.monotonic() + timeout
+        self._outstanding.add(key)
+        self._notify()
+
+    def idle(self) -> Set[Hashable]:
+        """Robôs da rodada atual que já confirmaram e estão parados esperando os outros."""
+        return {key for key in self._acked if key in self._deadlines}
+
+    def is_outstanding(self, key: Hashable) -> bool:
+        """Indica se o robô ainda deve a confirmação de algum comando anterior."""
+        return key in self._outstanding
+
+    async def wait(self) -> Tuple[Set[Hashable], Set[Hashable]]:
+        """
+        Aguarda até todos os robôs da rodada confirmarem ou seus prazos expirarem.
+
+        Returns:
+            Tuple[Set, Set]: Os robôs que confirmaram e os retardatários.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                waiting = [self._deadlines[key] for key in self._deadlines if key not in self._acked]
+                if not waiting:
+                    break
+                remaining = max(waiting) - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._wakeup = loop.create_future()
+                try:
+                    await asyncio.wait_for(self._wakeup, timeout=remaining)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._wakeup = None
+        acked = set(self._acked)
+        stragglers = set(self._deadlines) - acked
+        self._deadlines = {}
+        return acked, stragglers
@@ -0,0 +1,125 @@
+"""
+Latência ponta a ponta de uma iteração síncrona do servidor contra N robôs
+simulados locais (simulaCarga.RoboCarga com movimento instantâneo), tudo
+no mesmo event loop e via TCP em 127.0.0.1. Mede o custo do servidor:
+cálculo dos alvos, envio, parse das confirmações e barreira.
+
+A arena cresce com o enxame (cerca de 4 casas por robô, como em
+bench_scheduler) e cada robô começa numa casa própria: o escalonador de
+reservas exige partidas distintas e, numa grade menor que o enxame, quase
+todos os robôs ficariam parados.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_e2e
+"""
+import asyncio
+import contextlib
+import math
+import os
+import random
+import time
+from typing import List, Sequence
+
+import server
+from barrier import IterationBarrier
+from liveness import LivenessTracker
+from occupancy import OccupancyGrid
+from planner import RoutePlanner
+from scheduler import ReservationScheduler
+from simulaCarga import ConfigCarga, EstatisticasCarga, RoboCarga
+from swarm import SwarmState
+
+SIZES = (10, 50, 200)
+ITERATIONS = 10
+
+
+def _arena(n: int):
+    """Limites da grade para `n` robôs e uma casa de partida distinta para cada um."""
+    side = int(math.ceil(math.sqrt(4 * n)))
+    cells = random.Random(n).sample(range(side * side), n)
+    return [[0, 0], [side - 1, side - 1]], [(cell // side, cell % side) for cell in cells]
+
+
+def _reset_server(bounds, capacity: int = 16):
+    """Estado global do servidor como num processo novo, com a grade `bounds`."""
+    server.BOUNDS = bounds
+    server.swarm = SwarmState(capacity=capacity)
+    server.barrier = IterationBarrier()
+    server.occupancy = OccupancyGrid(bounds)
+    server.planner = RoutePlanner(server.occupancy)
+    server.scheduler = ReservationScheduler(server.occupancy, server.planner)
+    server.liveness = LivenessTracker(server.SILENCE_TIMEOUT, server.STALL_TIMEOUT)
+    for _, timer in server.detached.values():
+        timer.cancel()
+    for state in (server.particulas, server.goals, server.detached, server.orphans, server.handoffs,
+                  server.parked, server.start_poses, server.command_sent_at, server.last_messages):
+        state.clear()
+    server.gbest_history.clear()
+    server.running = True
+    # Nenhuma execução começou: o próximo 'pso'/'pso_async' volta a escolher o modo
+    server.start_pso = server.run_started = False
+    server.pso_mode = server.PSO_MODE
+    server.run_stats = None
+    server.async_remaining = 0
+    server.async_swarm_size = 1
+    server.run_log = None
+
+
+async def _iteration_latencies(n: int, iterations: int) -> List[float]:
+    bounds, starts = _arena(n)
+    _reset_server(bounds, n)
+
+    tcp = await asyncio.start_server(server.handle_client, '127.0.0.1', 0)
+    port = tcp.sockets[0].getsockname()[1]
+    config = ConfigCarga(escala=0.0, servidor='127.0.0.1', porta=port)
+    stats = EstatisticasCarga()
+    stop = asyncio.Event()
+    robots = [RoboCarga(f"bench-{i:04d}", config, stats, random.Random(i)) for i in range(n)]
+    for robot, start in zip(robots, starts):
+        robot.robo.posicao = list(start)
+    tasks = [asyncio.create_task(robot.executar(stop)) for robot in robots]
+    try:
+        while len(server.particulas) < n or any(r.robot_id is None for r in server.particulas.values()):
+            await asyncio.sleep(0.01)
+        latencies = []
+        for iteration in range(iterations):
+            start = time.perf_counter()
+            await server.sync_iteration(iteration)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+    finally:
+        stop.set()
+        for robot in robots:
+            if robot.writer is not None:
+                robot.writer.close()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        tcp.close()
+        await tcp.wait_closed()
+
+
+def run(sizes: Sequence[int] = SIZES, iterations: int = ITERATIONS) -> List[dict]:
+    results = []
+    bounds = server.BOUNDS
+    for n in sizes:
+        # Os prints do servidor fazem parte do custo, mas não devem poluir a saída
+        try:
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                latencies = asyncio.run(_iteration_latencies(n, iterations))
+        finally:
+            _reset_server(bounds)  # a grade original para quem usar o servidor depois
+        latencies.sort()
+        results.append({
+            'name': 'e2e_sync_iteration',
+            'size': n,
+            'min_s': latencies[0],
+            'median_s': latencies[len(latencies) // 2],
+            'max_s': latencies[-1],
+            'repeat': iterations,
+            'number': 1,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    for r in run():
+        print(f"{r['name']:<20} N={r['size']:<6} mediana {r['median_s'] * 1e3:8.2f} ms | máx {r['max_s'] * 1e3:8.2f} ms")
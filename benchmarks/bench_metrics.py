@@ -0,0 +1,48 @@
+"""
+Custo da instrumentação do servidor: o que cada mensagem de um robô paga
+(contadores de bytes e mensagens, latência no histograma por robô) e a
+renderização do endpoint no formato do Prometheus, em função do número de
+robôs (séries por rótulo).
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_metrics
+"""
+from typing import List, Sequence
+
+from benchmarks.common import measure
+import metrics
+
+SIZES = (10, 100, 1000)
+
+
+def make_registry(n: int):
+    registry = metrics.Registry()
+    latency = registry.histogram('robot_command_latency_seconds', "Latência", ('robot',))
+    messages = registry.counter('net_messages_total', "Mensagens", ('direction', 'kind'))
+    bytes_in = registry.counter('net_bytes_total', "Bytes", ('direction',)).labels('in')
+    robots = [f"robo-{i:04d}" for i in range(n)]
+    for i, robot in enumerate(robots):
+        latency.labels(robot).observe(i % 20)
+    return registry, latency, messages, bytes_in, robots
+
+
+def run(sizes: Sequence[int] = SIZES) -> List[dict]:
+    results = []
+    for n in sizes:
+        registry, latency, messages, bytes_in, robots = make_registry(n)
+
+        def on_messages():
+            # O que handle_client/handle_message fazem para cada 'pos' de cada robô
+            for robot in robots:
+                bytes_in.inc(12)
+                messages.labels('in', 'pos').inc()
+                latency.labels(robot).observe(2.5)
+
+        results.append(measure('metrics_per_message', n, on_messages))
+        results.append(measure('metrics_render', n, registry.render, repeat=3))
+    return results
+
+
+if __name__ == "__main__":
+    for r in run():
+        print(f"{r['name']:<22} N={r['size']:<6} {r['min_s'] * 1e3:10.3f} ms  ({r['min_s'] / r['size'] * 1e6:.2f} µs/robô)")
@@ -0,0 +1,55 @@
+"""
+Compara o custo de parse do protocolo antigo (strings "pos:x;y" e "ir:x;y"
+separadas com split, como em handle_client e processar_comandos) com o
+protocolo de frames binários de ev3/protocol.py. Cada medida processa as
+mensagens de uma iteração inteira: uma por robô.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_protocol
+"""
+from typing import List, Sequence
+
+from benchmarks.common import measure
+from ev3.protocol import FrameDecoder, encode
+
+SIZES = (10, 100, 1000)
+
+
+def parse_pos_string(message: str):
+    """Parse do 'pos:' antigo, como era feito em handle_client."""
+    if message.startswith("pos:"):
+        parts = message.split(':')[1].split(';')
+        return int(parts[0]), int(parts[1])
+
+
+def parse_ir_string(command: str):
+    """Parse do 'ir:' antigo, como era feito em processar_comandos."""
+    if command.startswith("ir:"):
+        _, coords = command.split(':')
+        x_str, y_str = coords.split(';')
+        return int(x_str), int(y_str)
+
+
+def run(sizes: Sequence[int] = SIZES) -> List[dict]:
+    results = []
+    for n in sizes:
+        pos_strings = [f"pos:{i % 7};{i % 5}".encode('utf-8') for i in range(n)]
+        ir_strings = [f"ir:{i % 7};{i % 5}".encode('utf-8') for i in range(n)]
+        pos_frames = [encode(('pos', (i % 7, i % 5))) for i in range(n)]
+        ir_frames = [encode(('ir', (i % 7, i % 5))) for i in range(n)]
+        batched = encode(*[('pos', (i % 7, i % 5)) for i in range(min(n, 255))])
+        decoder = FrameDecoder()
+
+        results.append(measure('parse_pos_string', n, lambda: [parse_pos_string(m.decode('utf-8')) for m in pos_strings]))
+        results.append(measure('parse_ir_string', n, lambda: [parse_ir_string(m.decode('utf-8')) for m in ir_strings]))
+        results.append(measure('parse_pos_frame', n, lambda: [decoder.feed(f) for f in pos_frames]))
+        results.append(measure('parse_ir_frame', n, lambda: [decoder.feed(f) for f in ir_frames]))
+        # Frames com várias mensagens (até 255 por frame): o custo do cabeçalho é dividido
+        frames_needed = -(-n // 255)
+        results.append(measure('parse_pos_batched_frame', n, lambda: [decoder.feed(batched) for _ in range(frames_needed)]))
+    return results
+
+
+if __name__ == "__main__":
+    for r in run():
+        print(f"{r['name']:<26} N={r['size']:<6} {r['min_s'] * 1e6:10.1f} µs")
@@ -0,0 +1,68 @@
+"""
+Custo da atualização do PSO por iteração (o passo vetorizado do SwarmState
+mais a atualização de P-Best/G-Best, como em run_sync) e da avaliação da
+função objetivo, em vários tamanhos de enxame.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_pso
+"""
+from typing import List, Sequence
+
+import numpy as np
+
+from benchmarks.common import measure
+import objectives
+from occupancy import OccupancyGrid
+from pso import BOUNDS, C1, C2, OBJECTIVE, W, GridDiscretizer, objective_function
+from swarm import SwarmState
+
+SIZES = (10, 100, 1000, 10000)
+
+
+def make_swarm(n: int, seed: int = 0) -> SwarmState:
+    rng = np.random.default_rng(seed)
+    swarm = SwarmState(capacity=n, rng=rng)
+    for pos in rng.integers(BOUNDS[0], np.asarray(BOUNDS[1]) + 1, size=(n, 2)):
+        swarm.add(tuple(pos))
+    swarm.update_bests(objective_function)
+    return swarm
+
+
+def run(sizes: Sequence[int] = SIZES) -> List[dict]:
+    results = []
+    for n in sizes:
+        swarm = make_swarm(n)
+        idx = swarm.indices()
+
+        def iteration():
+            targets = swarm.step(W, C1, C2, BOUNDS, idx)
+            swarm.position[idx] = targets.astype(int)
+            swarm.update_bests(objective_function, idx)
+
+        results.append(measure('pso_iteration', n, iteration))
+        results.append(measure('pso_step', n, lambda: swarm.step(W, C1, C2, BOUNDS, idx)))
+        swarm.discretizer = GridDiscretizer(BOUNDS, 'estocastico', rng=swarm.rng)
+        swarm.discretizer.mark(swarm.position[idx])
+        results.append(measure('pso_step_discrete', n, lambda: swarm.step(W, C1, C2, BOUNDS, idx)))
+        swarm.discretizer = None
+
+        points = swarm.position[idx].copy()
+        func = objectives.get(OBJECTIVE).func
+        results.append(measure('objective_batch', n, lambda: func(points)))
+        rows = [points[i:i + 1] for i in range(len(points))]
+        results.append(measure('objective_scalar_loop', n, lambda: [func(row) for row in rows]))
+        table = objectives.FitnessCache(func, BOUNDS, precompute=True)
+        results.append(measure('objective_cached_table', n, lambda: table(points)))
+        lru = objectives.FitnessCache(func, BOUNDS, precompute=False)
+        results.append(measure('objective_cached_lru', n, lambda: lru(points)))
+        costly = objectives.make_objective('distancia_esperada', BOUNDS)
+        results.append(measure('objective_costly_lru', n, lambda: costly(points)))
+        field = OccupancyGrid(BOUNDS)
+        field.set_obstacle((1, 2))
+        results.append(measure('objective_field', n, lambda: field(points)))
+    return results
+
+
+if __name__ == "__main__":
+    for r in run():
+        print(f"{r['name']:<22} N={r['size']:<6} {r['min_s'] * 1e6:12.1f} µs")
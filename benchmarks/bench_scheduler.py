@@ -0,0 +1,49 @@
+"""
+Custo do escalonador de reservas por iteração, em função do número de
+robôs. A arena cresce com o enxame (cerca de 4 casas por robô) e cada alvo
+fica a poucas casas da origem, como num passo típico do PSO, para que o
+tempo por robô fique constante se o custo for linear.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_scheduler
+"""
+import math
+from typing import List, Sequence
+
+import numpy as np
+
+from benchmarks.common import measure
+from occupancy import OccupancyGrid
+from planner import RoutePlanner
+from scheduler import ReservationScheduler
+
+SIZES = (10, 100, 1000)
+
+
+def make_round(n: int, seed: int = 0):
+    side = int(math.ceil(math.sqrt(4 * n)))
+    rng = np.random.default_rng(seed)
+    flat = rng.choice(side * side, size=n, replace=False)
+    starts = np.column_stack([flat // side, flat % side])
+    targets = np.clip(starts + rng.integers(-3, 4, size=(n, 2)), 0, side - 1)
+    grid = OccupancyGrid([[0, 0], [side - 1, side - 1]], goal=(0, 0))
+    return grid, [tuple(s) for s in starts.tolist()], [tuple(t) for t in targets.tolist()]
+
+
+def run(sizes: Sequence[int] = SIZES) -> List[dict]:
+    results = []
+    for n in sizes:
+        grid, starts, targets = make_round(n)
+        planner = RoutePlanner(grid)
+        scheduler = ReservationScheduler(grid, planner)
+        # Com o cache de rotas quente, como nas iterações seguintes à primeira
+        results.append(measure('schedule_round', n, lambda: scheduler.schedule(starts, targets), repeat=3))
+        results.append(measure('schedule_round_cold', n,
+                               lambda: ReservationScheduler(grid, RoutePlanner(grid)).schedule(starts, targets),
+                               repeat=3))
+    return results
+
+
+if __name__ == "__main__":
+    for r in run():
+        print(f"{r['name']:<22} N={r['size']:<6} {r['min_s'] * 1e3:10.2f} ms  ({r['min_s'] / r['size'] * 1e6:.1f} µs/robô)")
@@ -0,0 +1,38 @@
+"""Utilitários comuns da suíte de benchmarks."""
+import statistics
+import time
+from typing import Callable
+
+
+def measure(name: str, size: int, func: Callable[[], object], repeat: int = 5,
+            number: int = 0, min_time: float = 0.2) -> dict:
+    """
+    Mede `func` e devolve um resultado no formato da suíte.
+
+    Se `number` for 0, calibra quantas chamadas cabem em `min_time` segundos
+    (como o timeit faz), para que tamanhos pequenos e grandes tenham ruído parecido.
+    """
+    if number <= 0:
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            if time.perf_counter() - start >= min_time:
+                break
+            number *= 2
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return {
+        'name': name,
+        'size': size,
+        'min_s': min(samples),
+        'median_s': statistics.median(samples),
+        'max_s': max(samples),
+        'repeat': repeat,
+        'number': number,
+    }
@@ -0,0 +1,96 @@
+"""
+Executa a suíte de benchmarks e salva os resultados em JSON, com os
+metadados do ambiente, para comparar versões.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.run [--tamanhos 10 100 1000] [--saida resultado.json] [--comparar base.json]
+
+Com --comparar, cada medida é confrontada com o arquivo de base e o
+comando termina com código 1 se alguma ficar mais lenta que --tolerancia.
+"""
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from benchmarks import bench_e2e, bench_metrics, bench_protocol, bench_pso, bench_scheduler
+
+SUITES = {
+    'pso': bench_pso,
+    'protocol': bench_protocol,
+    'scheduler': bench_scheduler,
+    'metrics': bench_metrics,
+    'e2e': bench_e2e,
+}
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+    }
+
+
+def compare(results: List[dict], baseline: List[dict], tolerance: float) -> List[Tuple[dict, float]]:
+    """
+    Devolve as medidas que pioraram mais que `tolerance` (ex: 0.2 = 20%).
+    Compara o melhor tempo (min_s), que é o menos sensível a ruído da máquina.
+    """
+    base: Dict[Tuple[str, int], dict] = {(r['name'], r['size']): r for r in baseline}
+    regressions = []
+    for r in results:
+        old = base.get((r['name'], r['size']))
+        if old and old['min_s'] > 0:
+            ratio = r['min_s'] / old['min_s']
+            if ratio > 1 + tolerance:
+                regressions.append((r, ratio))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Suíte de benchmarks do PSO, protocolo e iteração ponta a ponta.")
+    parser.add_argument('--suites', nargs='+', choices=sorted(SUITES), default=list(SUITES))
+    parser.add_argument('--tamanhos', nargs='+', type=int, default=None,
+                        help="Tamanhos de enxame (padrão: os de cada suíte)")
+    parser.add_argument('--saida', default='benchmarks/results.json')
+    parser.add_argument('--comparar', default=None, help="JSON de uma execução anterior")
+    parser.add_argument('--tolerancia', type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = []
+    for name in args.suites:
+        suite = SUITES[name]
+        sizes = args.tamanhos or suite.SIZES
+        print(f"[BENCH] {name}: tamanhos {list(sizes)}")
+        for r in suite.run(sizes):
+            r['suite'] = name
+            results.append(r)
+            print(f"  {r['name']:<26} N={r['size']:<6} mediana {r['median_s'] * 1e6:14.1f} µs")
+
+    with open(args.saida, 'w') as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=2)
+    print(f"[BENCH] Resultados salvos em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerancia)
+        for r, ratio in regressions:
+            print(f"[BENCH] REGRESSÃO: {r['name']} N={r['size']} {ratio:.2f}x mais lento que a base")
+        if regressions:
+            sys.exit(1)
+        print("[BENCH] Nenhuma regressão acima da tolerância.")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Amostrador do sensor de cor em segundo plano.
+
+Uma thread le o codigo bruto do sensor (ColorSensor.color, um inteiro, sem
+converter para nome) na taxa maxima do sensor e guarda cada amostra num
+buffer circular pre-alocado. Uma cor nova so e aceita depois de
+CONFIRMACOES amostras iguais seguidas (debounce), e cada mudanca da cor
+estavel vira uma borda: o laco de movimento so consome as bordas, sem
+fazer I/O no sensor, e acorda assim que uma chega.
+"""
+import threading
+import time
+from array import array
+from collections import deque, namedtuple
+
+CAPACIDADE = 2048      # amostras no buffer circular (~2 s na taxa maxima)
+CONFIRMACOES = 3       # amostras iguais seguidas para aceitar uma cor nova
+INTERVALO = 0.001      # o sensor atualiza a cor a 1 kHz: ler mais rapido so repete a amostra
+MAX_BORDAS = 256       # bordas ainda nao consumidas guardadas
+
+# Codigos do modo COL-COLOR (ColorSensor.color)
+SEM_COR, PRETO, AZUL, VERDE, AMARELO, VERMELHO, BRANCO, MARROM = range(8)
+NOMES = ('NoColor', 'Black', 'Blue', 'Green', 'Yellow', 'Red', 'White', 'Brown')
+
+Borda = namedtuple('Borda', 'instante cor anterior')  # a cor estavel mudou de `anterior` para `cor`
+
+
+class AmostradorCor:
+    """Le o sensor numa thread e entrega as bordas (mudancas de cor) ao laco de movimento."""
+    def __init__(self, ler, agora=time.monotonic, capacidade=CAPACIDADE, confirmacoes=CONFIRMACOES,
+                 intervalo=INTERVALO):
+        """
+        Args:
+            ler: Funcao sem argumentos que devolve o codigo de cor atual do sensor.
+            agora: Relogio das amostras, em segundos.
+            capacidade (int): Tamanho do buffer circular.
+            confirmacoes (int): Amostras iguais seguidas para aceitar uma cor nova.
+            intervalo (float): Pausa minima entre leituras.
+        """
+        self._ler = ler
+        self._agora = agora
+        self.confirmacoes = confirmacoes
+        self.intervalo = intervalo
+        self.codigos = array('B', bytes(capacidade))
+        self.instantes = array('d', bytes(8 * capacidade))
+        self.total = 0  # amostras ja lidas (a posicao no buffer e total % capacidade)
+        self.estavel = None
+        self._candidato = None
+        self._repeticoes = 0
+        self._bordas = deque(maxlen=MAX_BORDAS)
+        self._sinal = threading.Event()
+        self._parar = threading.Event()
+        self._thread = None
+
+    def registrar(self, codigo, instante):
+        """Guarda uma amostra e, se a cor estavel mudou, emite a borda."""
+        i = self.total % len(self.codigos)
+        self.codigos[i] = codigo
+        self.instantes[i] = instante
+        self.total += 1
+        if codigo == self.estavel:
+            self._candidato = None
+            return
+        if codigo == self._candidato:
+            self._repeticoes += 1
+        else:
+            self._candidato = codigo
+            self._repeticoes = 1
+        if self._repeticoes >= self.confirmacoes:
+            anterior, self.estavel, self._candidato = self.estavel, codigo, None
+            if anterior is not None:
+                self._bordas.append(Borda(instante, codigo, anterior))
+                self._sinal.set()
+
+    def amostrar(self):
+        self.registrar(self._ler(), self._agora())
+
+    def _executar(self):
+        while not self._parar.is_set():
+            self.amostrar()
+            time.sleep(self.intervalo)
+
+    def iniciar(self):
+        """Comeca a amostrar em segundo plano."""
+        if self._thread is None:
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._executar, name='amostrador-cor', daemon=True)
+            self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def bordas(self):
+        """As bordas ainda nao consumidas, da mais antiga para a mais nova."""
+        bordas = []
+        while self._bordas:
+            bordas.append(self._bordas.popleft())
+        return bordas
+
+    def descartar(self):
+        """Esquece as bordas pendentes (ex.: antes de um movimento novo)."""
+        self._bordas.clear()
+        self._sinal.clear()
+
+    def esperar(self, segundos):
+        """Dorme ate `segundos` ou ate a proxima borda, o que vier primeiro."""
+        self._sinal.wait(segundos)
+        self._sinal.clear()
+
+    def ultimas(self, n):
+        """As `n` amostras mais recentes do buffer: lista de (instante, codigo), da mais antiga."""
+        n = min(n, self.total, len(self.codigos))
+        inicio = self.total - n
+        return [(self.instantes[i % len(self.codigos)], self.codigos[i % len(self.codigos)])
+                for i in range(inicio, self.total)]
+
+    def taxa(self):
+        """Amostras por segundo medidas sobre o buffer."""
+        amostras = self.ultimas(len(self.codigos))
+        if len(amostras) < 2 or amostras[-1][0] <= amostras[0][0]:
+            return 0.0
+        return (len(amostras) - 1) / (amostras[-1][0] - amostras[0][0])
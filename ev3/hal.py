@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Camada de hardware do robo: o main.py so fala com o objeto Hardware
+devolvido por carregar(), nunca direto com o ev3dev2.
+
+Backends:
+    ev3dev2  Motores, sensores, tela, som e botoes reais do brick (padrao).
+    sim      Modelo do robo na grade (hal_sim.py): motores com encoder,
+             fitas coloridas, obstaculos e um relogio virtual, para rodar o
+             firmware no PC contra o servidor mais rapido que o tempo real.
+
+O backend vem do argumento ou da variavel de ambiente EV3_HAL. Copie este
+arquivo para o brick junto com main.py e protocol.py (hal_sim.py so e
+necessario no PC).
+"""
+import os
+import threading
+import time
+import uuid
+
+from amostrador import AmostradorCor
+
+BACKENDS = ('ev3dev2', 'sim')
+
+
+class Adiado:
+    """Dispositivo criado so no primeiro acesso ao atributo do Hardware."""
+    def __init__(self, fabrica):
+        """
+        Args:
+            fabrica: Funcao que recebe o Hardware e devolve o dispositivo.
+        """
+        self.fabrica = fabrica
+
+
+class Hardware:
+    """
+    Dispositivos do robo com a interface do ev3dev2, mais o relogio.
+
+    Atributos:
+        sound, leds, screen, buttons: Som, LEDs, tela e botoes do brick.
+        tank: O MoveTank das rodas (left_motor.position, on, off, on_for_degrees, reset).
+        color_sensor: Sensor de cor (color e color_name).
+        amostrador: AmostradorCor do sensor de cor (bordas das fitas).
+        gyro: Giroscopio (angle).
+        SpeedRPM: Classe de velocidade aceita pelo tank.
+        robot_id: ID mandado na saudacao ao servidor.
+
+    Um dispositivo (ou o robot_id) passado como Adiado so e criado (e o seu
+    modulo do ev3dev2 importado) no primeiro acesso, de qualquer thread.
+    """
+    def __init__(self, fonte, dormir, agora, robot_id, **dispositivos):
+        self._adiados = {}
+        self._lock = threading.RLock()  # a fabrica do amostrador acessa o color_sensor
+        dispositivos['robot_id'] = robot_id
+        for nome, dispositivo in dispositivos.items():
+            if isinstance(dispositivo, Adiado):
+                self._adiados[nome] = dispositivo
+            else:
+                setattr(self, nome, dispositivo)
+        self._fonte = fonte
+        self._fontes = {}
+        self._dormir = dormir
+        self._agora = agora
+
+    def __getattr__(self, nome):
+        # So e chamado para atributos que ainda nao existem: cria o dispositivo adiado
+        adiado = self.__dict__.get('_adiados', {}).get(nome)
+        if adiado is None:
+            raise AttributeError(nome)
+        with self._lock:
+            if nome not in self.__dict__:
+                self.__dict__[nome] = adiado.fabrica(self)
+        return self.__dict__[nome]
+
+    def preparar(self, *nomes):
+        """Cria agora os dispositivos adiados `nomes` (ex.: numa thread, durante a conexao)."""
+        for nome in nomes:
+            getattr(self, nome)
+
+    def fonte(self, nome):
+        """Fonte da tela (None no simulador), carregada no primeiro uso."""
+        with self._lock:
+            if nome not in self._fontes:
+                self._fontes[nome] = self._fonte(nome)
+            return self._fontes[nome]
+
+    def dormir(self, segundos):
+        """Pausa do robo (no simulador, avanca o relogio virtual)."""
+        self._dormir(segundos)
+
+    def agora(self):
+        """Instante atual em segundos, no relogio do backend."""
+        return self._agora()
+
+
+# Cada fabrica importa so o modulo do ev3dev2 de que precisa: no brick, importar
+# o ev3dev2 inteiro e abrir todos os dispositivos leva segundos
+def _tanque(hw):
+    from ev3dev2.motor import OUTPUT_C, OUTPUT_D, MoveTank
+    return MoveTank(OUTPUT_C, OUTPUT_D)
+
+def _speed_rpm(hw):
+    from ev3dev2.motor import SpeedRPM
+    return SpeedRPM
+
+def _sensor_cor(hw):
+    from ev3dev2.sensor.lego import ColorSensor
+    return ColorSensor('in4')
+
+def _amostrador(hw):
+    sensor = hw.color_sensor
+    return AmostradorCor(lambda: sensor.color)  # codigo bruto, sem converter em nome
+
+def _giroscopio(hw):
+    from ev3dev2.sensor.lego import GyroSensor
+    return GyroSensor('in1')
+
+def _som(hw):
+    from ev3dev2.sound import Sound
+    return Sound()
+
+def _leds(hw):
+    from ev3dev2.led import Leds
+    return Leds()
+
+def _tela(hw):
+    from ev3dev2.display import Display
+    return Display()
+
+def _botoes(hw):
+    from ev3dev2.button import Button
+    return Button()
+
+def _id_do_brick(hw):
+    # uuid.getnode() procura o MAC rodando comandos do sistema: no brick leva segundos
+    return 'ev3-{:012x}'.format(uuid.getnode())
+
+def _fonte(nome):
+    from ev3dev2.fonts import load
+    return load(nome)
+
+
+def _ev3dev2():
+    return Hardware(
+        sound=Adiado(_som),
+        leds=Adiado(_leds),
+        tank=Adiado(_tanque),
+        color_sensor=Adiado(_sensor_cor),
+        amostrador=Adiado(_amostrador),
+        gyro=Adiado(_giroscopio),
+        screen=Adiado(_tela),
+        buttons=Adiado(_botoes),
+        SpeedRPM=Adiado(_speed_rpm),
+        fonte=_fonte,
+        dormir=time.sleep,
+        agora=time.time,
+        robot_id=Adiado(_id_do_brick),  # derivado do MAC do brick
+    )
+
+
+def carregar(backend=None):
+    """
+    Cria os dispositivos do backend escolhido.
+
+    Args:
+        backend (str): 'ev3dev2' ou 'sim'; se None, usa EV3_HAL (padrao 'ev3dev2').
+    """
+    backend = backend or os.environ.get('EV3_HAL', 'ev3dev2')
+    if backend == 'ev3dev2':
+        return _ev3dev2()
+    if backend == 'sim':
+        import hal_sim
+        return hal_sim.carregar_do_ambiente()
+    raise ValueError("Backend de hardware desconhecido: '{}' (use {})".format(backend, ' ou '.join(BACKENDS)))
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Backend simulado da camada de hardware (EV3_HAL=sim).
+
+Modela o robo na grade com a mesma interface do ev3dev2 que o main.py usa:
+    - Relogio virtual: dormir() so avanca o tempo simulado (opcionalmente
+      esperando uma fracao dele de verdade), entao o firmware roda mais
+      rapido que o tempo real sem mudar nenhum laco de controle.
+    - MoveTank com dois motores e encoders: a posicao de cada roda e a pose
+      do robo (cinematica diferencial) sao integradas a partir das
+      velocidades e do relogio virtual.
+    - Sensor de cor sobre a grade: fitas nas divisas das casas (pretas entre
+      linhas, verdes entre colunas) e vermelhas em volta dos obstaculos. O
+      amostrador le o sensor a cada milissegundo do tempo simulado durante
+      cada dormir(), no lugar da thread do robo real.
+    - Botoes que "apertam" sozinhos a sequencia que define a posicao e a
+      direcao iniciais nas telas de configuracao do main.py.
+
+Configuracao pelo ambiente:
+    EV3_SIM_ID          ID da saudacao (padrao: ev3sim-<pid>)
+    EV3_SIM_POSICAO     casa inicial, ex: 2,1 (padrao 0,0)
+    EV3_SIM_DIRECAO     N, L, S ou O (padrao N)
+    EV3_SIM_OBSTACULOS  casas bloqueadas, ex: 1,1;2,1
+    EV3_SIM_ESCALA      segundos reais por segundo simulado (padrao 0: sem espera)
+
+Uso:
+    EV3_HAL=sim EV3_SIM_ID=sim-1 EV3_SIM_POSICAO=1,2 python3 ev3/main.py
+"""
+import math
+import os
+import threading
+import time
+
+from amostrador import NOMES, AmostradorCor
+
+TAMANHO_CASA_MM = 280  # mesma casa de 28 cm do main.py
+LARGURA_FITA_MM = 20
+SENSOR_A_FRENTE_MM = 50  # o sensor de cor fica a frente do eixo das rodas
+MAX_RPM = 170          # velocidade maxima de um LargeMotor (usada para velocidades em %)
+DIRECOES = {'N': 90.0, 'L': 0.0, 'S': 270.0, 'O': 180.0}  # angulo matematico de cada direcao (graus)
+TECLA_DIRECAO = {'N': 'up', 'S': 'down', 'L': 'right', 'O': 'left'}
+PERIODO_AMOSTRAGEM = 0.001  # o sensor real atualiza a cor a 1 kHz
+
+
+class Relogio:
+    """
+    Tempo simulado; `escala` segundos reais por segundo simulado (0 = instantaneo).
+    Os `ouvintes` sao chamados a cada PERIODO_AMOSTRAGEM de tempo simulado dentro de dormir().
+    """
+    def __init__(self, escala=0.0):
+        self.escala = escala
+        self.ouvintes = []
+        self._agora = 0.0
+        self._lock = threading.Lock()
+
+    def agora(self):
+        return self._agora
+
+    def dormir(self, segundos, ate=None):
+        """Avanca `segundos`, ou menos se `ate()` ficar verdadeiro entre duas amostragens."""
+        if segundos <= 0:
+            return
+        inicio = self._agora
+        fim = inicio + segundos
+        if self.ouvintes:
+            while self._agora + PERIODO_AMOSTRAGEM < fim:
+                with self._lock:
+                    self._agora += PERIODO_AMOSTRAGEM
+                for ouvinte in self.ouvintes:
+                    ouvinte()
+                if ate is not None and ate():
+                    fim = self._agora
+                    break
+        with self._lock:
+            self._agora = fim
+        if self.escala > 0:
+            time.sleep((fim - inicio) * self.escala)
+
+
+class Mundo:
+    """A grade: casas de TAMANHO_CASA_MM com centros nos inteiros, fitas nas divisas."""
+    def __init__(self, obstaculos=()):
+        self.obstaculos = set(obstaculos)
+
+    def cor(self, x_mm, y_mm):
+        """Cor vista pelo sensor no ponto (x_mm, y_mm)."""
+        for eixo, nome in ((0, 'Green'), (1, 'Black')):
+            coord = (x_mm, y_mm)[eixo] / TAMANHO_CASA_MM - 0.5
+            divisa = round(coord)
+            if abs(coord - divisa) * TAMANHO_CASA_MM <= LARGURA_FITA_MM / 2:
+                outra = int(round((y_mm, x_mm)[eixo] / TAMANHO_CASA_MM))
+                lados = [(divisa, outra), (divisa + 1, outra)] if eixo == 0 else [(outra, divisa), (outra, divisa + 1)]
+                return 'Red' if any(casa in self.obstaculos for casa in lados) else nome
+        return 'White'
+
+
+class SpeedRPM:
+    def __init__(self, rpm):
+        self.rpm = rpm
+
+
+def _rpm(velocidade):
+    """SpeedRPM ou porcentagem (como o ev3dev2 aceita)."""
+    if hasattr(velocidade, 'rpm'):
+        return velocidade.rpm
+    return velocidade * MAX_RPM / 100.0
+
+
+class MotorSimulado:
+    def __init__(self, tanque, lado):
+        self._tanque = tanque
+        self._lado = lado
+
+    @property
+    def position(self):
+        """Encoder em graus (tacho counts do LargeMotor)."""
+        self._tanque._integrar()
+        return int(self._tanque._graus[self._lado])
+
+
+class TanqueSimulado:
+    """MoveTank com cinematica diferencial sobre o relogio virtual."""
+    def __init__(self, relogio, x_mm, y_mm, direcao):
+        self.relogio = relogio
+        self.wheel_diameter_mm = 56
+        self.axle_track_mm = 120
+        self.x_mm, self.y_mm = float(x_mm), float(y_mm)
+        self.theta = math.radians(DIRECOES[direcao])
+        self._rpm = [0.0, 0.0]    # esquerda, direita
+        self._graus = [0.0, 0.0]
+        self._t = relogio.agora()
+        self.left_motor = MotorSimulado(self, 0)
+        self.right_motor = MotorSimulado(self, 1)
+
+    def _integrar(self):
+        agora = self.relogio.agora()
+        dt = agora - self._t
+        self._t = agora
+        if dt <= 0 or self._rpm == [0.0, 0.0]:
+            return
+        mm_por_grau = math.pi * self.wheel_diameter_mm / 360.0
+        vel = [rpm * 6.0 * mm_por_grau for rpm in self._rpm]  # mm/s de cada roda
+        for lado in (0, 1):
+            self._graus[lado] += self._rpm[lado] * 6.0 * dt
+        v = (vel[0] + vel[1]) / 2
+        omega = (vel[1] - vel[0]) / self.axle_track_mm  # anti-horario positivo
+        if abs(omega) < 1e-12:
+            self.x_mm += v * dt * math.cos(self.theta)
+            self.y_mm += v * dt * math.sin(self.theta)
+        else:
+            novo = self.theta + omega * dt
+            self.x_mm += v / omega * (math.sin(novo) - math.sin(self.theta))
+            self.y_mm -= v / omega * (math.cos(novo) - math.cos(self.theta))
+            self.theta = novo
+
+    def on(self, esquerda, direita):
+        self._integrar()
+        self._rpm = [float(_rpm(esquerda)), float(_rpm(direita))]
+
+    def off(self, brake=True):
+        self._integrar()
+        self._rpm = [0.0, 0.0]
+
+    def reset(self):
+        self.off()
+        self._graus = [0.0, 0.0]
+
+    def on_for_degrees(self, esquerda, direita, graus, brake=True, block=True):
+        """Gira a roda mais rapida `graus` graus (a outra na mesma proporcao), bloqueando."""
+        rpm = max(abs(_rpm(esquerda)), abs(_rpm(direita)))
+        if rpm == 0:
+            return
+        self.on(esquerda, direita)
+        self.relogio.dormir(abs(graus) / (rpm * 6.0))
+        self.off()
+
+    def celula(self):
+        """Casa (x, y) mais proxima da pose atual."""
+        self._integrar()
+        return int(round(self.x_mm / TAMANHO_CASA_MM)), int(round(self.y_mm / TAMANHO_CASA_MM))
+
+
+class SensorCorSimulado:
+    def __init__(self, tanque, mundo):
+        self._tanque = tanque
+        self._mundo = mundo
+
+    @property
+    def color(self):
+        return NOMES.index(self.color_name)
+
+    @property
+    def color_name(self):
+        t = self._tanque
+        t._integrar()
+        return self._mundo.cor(t.x_mm + SENSOR_A_FRENTE_MM * math.cos(t.theta),
+                               t.y_mm + SENSOR_A_FRENTE_MM * math.sin(t.theta))
+
+
+class AmostradorSimulado(AmostradorCor):
+    """O AmostradorCor sem thread: amostra no relogio virtual, dentro de cada dormir()."""
+    def __init__(self, sensor, relogio):
+        AmostradorCor.__init__(self, lambda: sensor.color, relogio.agora)
+        self._relogio = relogio
+
+    def iniciar(self):
+        if self.amostrar not in self._relogio.ouvintes:
+            self._relogio.ouvintes.append(self.amostrar)
+
+    def parar(self):
+        if self.amostrar in self._relogio.ouvintes:
+            self._relogio.ouvintes.remove(self.amostrar)
+
+    def esperar(self, segundos):
+        self._relogio.dormir(segundos, ate=lambda: bool(self._bordas))
+
+
+class GiroscopioSimulado:
+    def __init__(self, tanque):
+        self._tanque = tanque
+        self._inicio = tanque.theta
+
+    @property
+    def angle(self):
+        """Graus girados desde o inicio, horario positivo (como o sensor do EV3)."""
+        self._tanque._integrar()
+        return int(round(math.degrees(self._inicio - self._tanque.theta)))
+
+
+class BotoesSimulados:
+    """
+    Botoes que apertam sozinhos uma sequencia de teclas, uma por leitura que
+    a consulta. Com a sequencia vazia, so 'enter' fica apertado (confirma).
+    """
+    def __init__(self, teclas):
+        self._teclas = list(teclas)
+
+    def _apertado(self, tecla):
+        if not self._teclas:
+            return tecla == 'enter'
+        if self._teclas[0] == tecla:
+            self._teclas.pop(0)
+            return True
+        return False
+
+    up = property(lambda self: self._apertado('up'))
+    down = property(lambda self: self._apertado('down'))
+    left = property(lambda self: self._apertado('left'))
+    right = property(lambda self: self._apertado('right'))
+    enter = property(lambda self: self._apertado('enter'))
+
+
+class TelaSimulada:
+    """Guarda o texto desenhado, no lugar do display."""
+    def __init__(self):
+        self.textos = []
+
+    def clear(self):
+        self.textos = []
+
+    def text_pixels(self, text, clear_screen=True, x=0, y=0, text_color='black', font=None):
+        if clear_screen:
+            self.textos = []
+        self.textos.append(text)
+
+    def update(self):
+        pass
+
+
+class SomSimulado:
+    def __init__(self):
+        self.falas = []
+
+    def speak(self, texto, *args, **kwargs):
+        self.falas.append(texto)
+
+    def beep(self, *args, **kwargs):
+        pass
+
+
+class LedsSimulados:
+    def __init__(self):
+        self.cores = {}
+
+    def set_color(self, grupo, cor, *args, **kwargs):
+        self.cores[grupo] = cor
+
+    def all_off(self):
+        self.cores = {}
+
+
+def teclas_configuracao(posicao, direcao):
+    """Teclas que as telas de configuracao do main.py esperam para chegar a `posicao` e `direcao`."""
+    x, y = posicao
+    teclas = ['right' if x > 0 else 'left'] * abs(x) + ['up' if y > 0 else 'down'] * abs(y)
+    return teclas + ['enter', TECLA_DIRECAO[direcao], 'enter']
+
+
+def carregar(robot_id, posicao=(0, 0), direcao='N', obstaculos=(), escala=0.0):
+    """Cria o Hardware simulado de um robo parado no centro da casa `posicao`."""
+    from hal import Hardware
+    relogio = Relogio(escala)
+    tanque = TanqueSimulado(relogio, posicao[0] * TAMANHO_CASA_MM, posicao[1] * TAMANHO_CASA_MM, direcao)
+    sensor = SensorCorSimulado(tanque, Mundo(obstaculos))
+    return Hardware(
+        sound=SomSimulado(),
+        leds=LedsSimulados(),
+        tank=tanque,
+        color_sensor=sensor,
+        amostrador=AmostradorSimulado(sensor, relogio),
+        gyro=GiroscopioSimulado(tanque),
+        screen=TelaSimulada(),
+        buttons=BotoesSimulados(teclas_configuracao(posicao, direcao)),
+        SpeedRPM=SpeedRPM,
+        fonte=lambda nome: None,
+        dormir=relogio.dormir,
+        agora=relogio.agora,
+        robot_id=robot_id,
+    )
+
+
+def _par(texto):
+    x, y = texto.split(',')
+    return int(x), int(y)
+
+
+def carregar_do_ambiente():
+    """carregar() com a configuracao das variaveis EV3_SIM_* (ver o topo do modulo)."""
+    obstaculos = [_par(p) for p in os.environ.get('EV3_SIM_OBSTACULOS', '').split(';') if p.strip()]
+    return carregar(os.environ.get('EV3_SIM_ID', 'ev3sim-{}'.format(os.getpid())),
+                    _par(os.environ.get('EV3_SIM_POSICAO', '0,0')),
+                    os.environ.get('EV3_SIM_DIRECAO', 'N'),
+                    obstaculos,
+                    float(os.environ.get('EV3_SIM_ESCALA', '0')))
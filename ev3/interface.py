@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tela e som do robo fora do laco de comandos.
+
+No brick, redesenhar a tela (text_pixels + update) e falar (sound.speak)
+levam centenas de milissegundos cada. A Interface faz os dois em threads
+proprias, e quem chama nunca espera:
+
+- mostrar() troca o quadro pendente. Se a thread da tela ainda nao
+  desenhou o anterior, ele e descartado: so o mais recente e desenhado.
+- falar() e bipe() entram numa fila curta, tocada em ordem. Com a fila
+  cheia, o som mais antigo e descartado.
+
+A tela, o som e as fontes so sao abertos pelas proprias threads, no
+primeiro uso. Inativa (modo rapido, sem tela), todos os metodos viram no-op
+e nada disso chega a ser carregado.
+"""
+import threading
+from collections import deque
+
+MAX_SONS = 4  # sons pendentes na fila; os mais antigos sao descartados
+
+
+class Interface:
+    """Desenha quadros e toca sons em segundo plano."""
+    def __init__(self, hw, ativa=True):
+        """
+        Args:
+            hw: O Hardware do robo (hal.py); usa screen, sound e fonte().
+            ativa (bool): Se False, nada e desenhado nem tocado.
+        """
+        self.hw = hw
+        self.ativa = ativa
+        self.desenhados = 0
+        self.descartados = 0  # quadros substituidos antes de serem desenhados
+        self._lock = threading.Lock()
+        self._quadro = None
+        self._sons = deque(maxlen=MAX_SONS)
+        self._tem_quadro = threading.Event()
+        self._tem_som = threading.Event()
+        self._parar = False
+        self._threads = []
+
+    def iniciar(self):
+        if self.ativa and not self._threads:
+            self._parar = False
+            self._threads = [threading.Thread(target=self._executar_tela, name='interface-tela', daemon=True),
+                             threading.Thread(target=self._executar_som, name='interface-som', daemon=True)]
+            for thread in self._threads:
+                thread.start()
+
+    def parar(self, timeout=None):
+        """Desenha o ultimo quadro, toca os sons pendentes e encerra as threads."""
+        self._parar = True
+        self._tem_quadro.set()
+        self._tem_som.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def mostrar(self, *linhas):
+        """
+        Troca o quadro da tela.
+
+        Args:
+            linhas: Tuplas (texto, nome da fonte, x, y), desenhadas em ordem sobre a tela limpa.
+        """
+        if not self.ativa:
+            return
+        with self._lock:
+            if self._quadro is not None:
+                self.descartados += 1
+            self._quadro = linhas
+        self._tem_quadro.set()
+
+    def limpar(self):
+        self.mostrar()
+
+    def falar(self, texto):
+        self._tocar(lambda: self.hw.sound.speak(texto))
+
+    def bipe(self):
+        self._tocar(lambda: self.hw.sound.beep())
+
+    def _tocar(self, som):
+        if self.ativa:
+            self._sons.append(som)
+            self._tem_som.set()
+
+    def _executar_tela(self):
+        while True:
+            self._tem_quadro.wait()
+            with self._lock:
+                quadro, self._quadro = self._quadro, None
+                self._tem_quadro.clear()
+            if quadro is not None:
+                tela = self.hw.screen
+                tela.clear()
+                for texto, fonte, x, y in quadro:
+                    tela.text_pixels(texto, clear_screen=False, font=self.hw.fonte(fonte), x=x, y=y)
+                tela.update()
+                self.desenhados += 1
+            if self._parar and self._quadro is None:
+                return
+
+    def _executar_som(self):
+        while True:
+            self._tem_som.wait()
+            self._tem_som.clear()
+            while self._sons:
+                self._sons.popleft()()
+            if self._parar:
+                return
@@ -1,46 +1,77 @@
 #!/usr/bin/env python3
-import socket
 import time
-from ev3dev2.motor import LargeMotor, OUTPUT_C, OUTPUT_D, SpeedRPM, MoveTank
-from ev3dev2.sensor.lego import ColorSensor, GyroSensor
-from ev3dev2.sound import Sound
-from ev3dev2.display import Display
-from ev3dev2.led import Leds
-from ev3dev2.button import Button
-from ev3dev2.fonts import load as load_font
+INICIO = time.monotonic()  # antes dos outros imports: as fases da inicializacao contam a partir daqui
+
+import os
+import socket
+import threading
+import hal
+import planejador
+from amostrador import PRETO, VERDE, VERMELHO
+from interface import Interface
+from protocol import FrameDecoder, ProtocolError, encode
 
 # --- Variaveis de conexao ---
 TCP_PORT = 65432
 UDP_PORT = 65431
 DISCOVERY_REQUEST = b"EV3_DISCOVERY_REQUEST"
 DISCOVERY_RESPONSE = b"EV3_SERVER_HERE"
+SERVIDOR_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'servidor.txt')  # ultimo servidor
+TIMEOUT_CACHE = 1.5  # segundos tentando o servidor em cache antes da descoberta UDP
+INTERVALO_RECONEXAO = 0.2  # segundos entre tentativas no servidor em cache ao reconectar
+JANELA_RECONEXAO = 10.0    # segundos insistindo no servidor em cache antes de uma rodada de descoberta
+BATIMENTO = 2.0          # segundos entre batimentos ('vivo') enviados ao servidor
+SILENCIO_SERVIDOR = 10.0 # segundos sem nada do servidor (que manda 'vivo' a cada 2 s) ate a conexao ser dada como morta
+MODO_RAPIDO = os.environ.get('EV3_RAPIDO') == '1'  # sem tela nem fala: so LEDs e o console
+MODO_DAEMON = os.environ.get('EV3_DAEMON') == '1'  # sem menus; fica carregado entre execucoes, a pose vem do servidor
 
 # --- Variaveis de controle ---
 VELOCIDADE_DE_MOVIMENTO = 40
 TAMANHO_CASA = 28
+DIAMETRO_RODA_MM = 56
+BITOLA_MM = 120  # distancia entre as rodas
+FONTE_GRANDE = 'helvB14'
+FONTE_PEQUENA = 'lutBS10'
 posicao_inicial = [0,0]
 posicao_atual = posicao_inicial
 fitas_detectadas = [0,0]
-cores_permitidas = ['Black', 'Green']
-direcoes_cardinais = ['N', 'L', 'S', 'O']
+cores_permitidas = [PRETO, VERDE]  # fitas contadas em fitas_detectadas, na mesma ordem
+COR_OBSTACULO = VERMELHO  # fita que marca uma casa bloqueada
+passo_direcao = {'N': (0, 1), 'L': (1, 0), 'S': (0, -1), 'O': (-1, 0)}
 direcao_atual = 'N'
+obstaculos_detectados = []  # casas bloqueadas ainda nao reportadas ao servidor
+PASSO_PROGRESSO_MM = 10  # deslocamento das rodas por incremento do contador de progresso
+progresso = 0  # mandado nos batimentos: se a roda patinar ou travar, para de andar e o servidor percebe
+envio_lock = threading.Lock()  # um frame por vez no socket (o batimento roda em outra thread)
+modelo_custo = planejador.ModeloCusto()  # tempos de retas e giros, ajustados a cada movimento
+marca_fase = INICIO
+
+def fase(nome):
+    """Imprime quanto durou a fase da inicializacao que acabou de terminar."""
+    global marca_fase
+    agora = time.monotonic()
+    print("[INICIO] {}: {:.0f} ms (total {:.0f} ms)".format(nome, (agora - marca_fase) * 1000, (agora - INICIO) * 1000))
+    marca_fase = agora
+
+fase("modulos")
 
 # --- Inicializacao ---
-sound = Sound()
-leds = Leds()
-left_motor = LargeMotor(OUTPUT_C)
-right_motor = LargeMotor(OUTPUT_D)
-color_sensor = ColorSensor('in4')
-giroscopio = GyroSensor('in1')
-screen = Display()
-btn = Button()
-robot = MoveTank(OUTPUT_C, OUTPUT_D)
-robot.wheel_diameter_mm = 56
-robot.axle_track_mm = 120
-
-# Carregando as fontes que voce escolheu
-fonte_grande = load_font('helvB14')
-fonte_pequena = load_font('lutBS10')
+# Dispositivos reais do brick ou o robo simulado (EV3_HAL=sim), ver hal.py. Cada
+# dispositivo (hw.tank, hw.leds, ...) so e criado no primeiro acesso, e as fontes
+# so sao carregadas pela thread da tela: nada disso atrasa o inicio
+hw = hal.carregar()
+dormir = hw.dormir  # pausas do robo; no simulador avancam o relogio virtual
+ui = Interface(hw, ativa=not MODO_RAPIDO)  # tela e fala em threads: nunca atrasam um comando
+fase("hardware")
+
+def preparar_dispositivos():
+    """Abre motores e sensor de cor, liga o amostrador e le o ID do robo (numa thread, durante a conexao)."""
+    inicio = time.monotonic()
+    hw.preparar('leds', 'tank', 'SpeedRPM', 'amostrador', 'robot_id')
+    hw.amostrador.iniciar()  # le o sensor de cor em segundo plano e entrega as bordas das fitas
+    print("[INICIO] dispositivos: {:.0f} ms (em paralelo)".format((time.monotonic() - inicio) * 1000))
+
+preparo = threading.Thread(target=preparar_dispositivos, daemon=True)
 
 def definir_posicao_inicial():
     """
@@ -48,24 +79,23 @@ def definir_posicao_inicial():
     X e Y iniciais usando os botoes de seta. Pressione Enter para confirmar.
     """
     x, y = 0, 0
-    sound.speak("Set initial position")
+    ui.falar("Set initial position")
 
     while True:
-        screen.text_pixels("Definir Posicao Inicial", font=fonte_pequena, x=5, y=10)
-        screen.text_pixels("Use setas. Enter para OK.", font=fonte_pequena, x=5, y=30, clear_screen=False)
-        screen.text_pixels("X: {}".format(x), font=fonte_grande, x=50, y=60, clear_screen=False)
-        screen.text_pixels("Y: {}".format(y), font=fonte_grande, x=50, y=90, clear_screen=False)
-        screen.update()
-
-        if btn.up: y += 1; sound.beep()
-        elif btn.down: y -= 1; sound.beep()
-        elif btn.right: x += 1; sound.beep()
-        elif btn.left: x -= 1; sound.beep()
-        elif btn.enter:
-            sound.speak("Position confirmed")
-            screen.clear(); screen.update()
+        ui.mostrar(("Definir Posicao Inicial", FONTE_PEQUENA, 5, 10),
+                   ("Use setas. Enter para OK.", FONTE_PEQUENA, 5, 30),
+                   ("X: {}".format(x), FONTE_GRANDE, 50, 60),
+                   ("Y: {}".format(y), FONTE_GRANDE, 50, 90))
+
+        if hw.buttons.up: y += 1; ui.bipe()
+        elif hw.buttons.down: y -= 1; ui.bipe()
+        elif hw.buttons.right: x += 1; ui.bipe()
+        elif hw.buttons.left: x -= 1; ui.bipe()
+        elif hw.buttons.enter:
+            ui.falar("Position confirmed")
+            ui.limpar()
             break 
-        time.sleep(0.15)
+        dormir(0.15)
     return [x, y]
 
 def definir_direcao_inicial():
@@ -74,208 +104,408 @@ def definir_direcao_inicial():
     cardeal inicial. Pressione Enter para confirmar.
     """
     direcao_selecionada = 'N'
-    sound.speak("Set initial direction")
+    ui.falar("Set initial direction")
 
     while True:
-        screen.text_pixels("Definir Direcao Inicial", font=fonte_pequena, x=5, y=10)
-        screen.text_pixels("Cima=N Baixo=S", font=fonte_pequena, x=5, y=30, clear_screen=False)
-        screen.text_pixels("Dir=L Esq=O", font=fonte_pequena, x=5, y=45, clear_screen=False)
-        screen.text_pixels(direcao_selecionada, font=fonte_grande, x=80, y=70, clear_screen=False)
-        screen.update()
-
-        if btn.up: direcao_selecionada = 'N'; sound.beep()
-        elif btn.down: direcao_selecionada = 'S'; sound.beep()
-        elif btn.right: direcao_selecionada = 'L'; sound.beep()
-        elif btn.left: direcao_selecionada = 'O'; sound.beep()
-        elif btn.enter:
-            sound.speak("Direction confirmed")
-            screen.clear(); screen.update()
+        ui.mostrar(("Definir Direcao Inicial", FONTE_PEQUENA, 5, 10),
+                   ("Cima=N Baixo=S", FONTE_PEQUENA, 5, 30),
+                   ("Dir=L Esq=O", FONTE_PEQUENA, 5, 45),
+                   (direcao_selecionada, FONTE_GRANDE, 80, 70))
+
+        if hw.buttons.up: direcao_selecionada = 'N'; ui.bipe()
+        elif hw.buttons.down: direcao_selecionada = 'S'; ui.bipe()
+        elif hw.buttons.right: direcao_selecionada = 'L'; ui.bipe()
+        elif hw.buttons.left: direcao_selecionada = 'O'; ui.bipe()
+        elif hw.buttons.enter:
+            ui.falar("Direction confirmed")
+            ui.limpar()
             break
-        time.sleep(0.15)
+        dormir(0.15)
     return direcao_selecionada
 
 # --- As suas funcoes de movimento (mover_e_detectar_cores, etc) continuam aqui sem alteracao ---
+def distancia_percorrida_mm():
+    return abs(hw.tank.left_motor.position * (DIAMETRO_RODA_MM * 3.14159 / 360))
+
 def mover_e_detectar_cores(distancia_cm):
-    global fitas_detectadas, cores_permitidas, VELOCIDADE_DE_MOVIMENTO
-    robot.reset()
-    cor_anterior = color_sensor.color_name
+    """Anda distancia_cm contando as fitas. Retorna False se parou ao ver a fita de obstaculo."""
+    global fitas_detectadas, cores_permitidas, VELOCIDADE_DE_MOVIMENTO, progresso
+    hw.tank.reset()
+    hw.amostrador.descartar()  # so contam as bordas deste movimento
     distancia_alvo_mm = distancia_cm * 10
-    velocidade = SpeedRPM(VELOCIDADE_DE_MOVIMENTO if distancia_cm > 0 else -VELOCIDADE_DE_MOVIMENTO)
-    robot.on(velocidade, velocidade)
-    while abs(robot.left_motor.position * (robot.wheel_diameter_mm * 3.14159 / 360)) < abs(distancia_alvo_mm):
-        cor_atual = color_sensor.color_name
-        if cor_atual != cor_anterior:
-            cor_anterior = cor_atual
-            if cor_atual in cores_permitidas:
-                id_cor = cores_permitidas.index(cor_atual)
-                fitas_detectadas[id_cor] += 1
-        time.sleep(0.03)
-    robot.off()
-
-def orientar_para(direcao_desejada):
-    global direcao_atual
-    rotacao_curta = {
-        'N': {'L': 'direita', 'O': 'esquerda', 'S': 'direita'},
-        'L': {'S': 'direita', 'N': 'esquerda', 'O': 'direita'},
-        'S': {'O': 'direita', 'L': 'esquerda', 'N': 'direita'},
-        'O': {'N': 'direita', 'S': 'esquerda', 'L': 'direita'}
-    }
-    
-    while direcao_atual != direcao_desejada:
-        giro_a_fazer = rotacao_curta[direcao_atual].get(direcao_desejada)
-        if giro_a_fazer == 'direita': girar_direita()
-        elif giro_a_fazer == 'esquerda': girar_esquerda()
+    velocidade = hw.SpeedRPM(VELOCIDADE_DE_MOVIMENTO if distancia_cm > 0 else -VELOCIDADE_DE_MOVIMENTO)
+    hw.tank.on(velocidade, velocidade)
+    marca_mm = 0
+    while True:
+        percorrido = distancia_percorrida_mm()
+        if percorrido >= abs(distancia_alvo_mm):
+            break
+        if percorrido - marca_mm >= PASSO_PROGRESSO_MM:
+            marca_mm = percorrido
+            progresso += 1
+        # As fitas chegam como bordas do amostrador: este laco nao le o sensor
+        for borda in hw.amostrador.bordas():
+            if borda.cor == COR_OBSTACULO:
+                hw.tank.off()
+                return False
+            if borda.cor in cores_permitidas:
+                fitas_detectadas[cores_permitidas.index(borda.cor)] += 1
+        hw.amostrador.esperar(0.03)  # acorda antes se uma borda chegar
+    hw.tank.off()
+    return True
+
+def andar_casas(casas):
+    """
+    Anda `casas` casas na direcao atual e atualiza a posicao. Se encontrar um
+    obstaculo, conta so as casas ja andadas e guarda a casa seguinte em obstaculos_detectados.
+    Retorna False se o movimento foi interrompido.
+    """
+    global posicao_atual
+    inicio = hw.agora()
+    completo = mover_e_detectar_cores(casas * TAMANHO_CASA)
+    modelo_custo.observar_reta(distancia_percorrida_mm() / (TAMANHO_CASA * 10), hw.agora() - inicio)
+    andadas = casas if completo else int(distancia_percorrida_mm() // (TAMANHO_CASA * 10))
+    dx, dy = passo_direcao[direcao_atual]
+    posicao_atual = [posicao_atual[0] + dx * andadas, posicao_atual[1] + dy * andadas]
+    if completo:
+        return True
+    obstaculos_detectados.append((posicao_atual[0] + dx, posicao_atual[1] + dy))
+    print("Obstaculo em {}! Parado em {}".format(obstaculos_detectados[-1], posicao_atual))
+    return False
 
 def ir_para_xy(x_alvo, y_alvo):
+    return seguir_rota([(x_alvo, y_alvo)])
+
+def seguir_rota(waypoints):
+    """
+    Segue os waypoints do servidor pelo plano de menor tempo (planejador.py).
+    Todos entram no plano de uma vez, entao o robo emenda um trecho no outro
+    sem parar nem girar a toa. Para no primeiro obstaculo.
+    """
     global posicao_atual
-    delta_y = y_alvo - posicao_atual[1]
-    if delta_y != 0:
-        direcao_y = 'N' if delta_y > 0 else 'S'
-        orientar_para(direcao_y)
-        mover_e_detectar_cores(abs(delta_y) * TAMANHO_CASA)
-    delta_x = x_alvo - posicao_atual[0]
-    if delta_x != 0:
-        direcao_x = 'L' if delta_x > 0 else 'O'
-        orientar_para(direcao_x)
-        mover_e_detectar_cores(abs(delta_x) * TAMANHO_CASA)
+    alvos = [(int(x), int(y)) for x, y in waypoints]
+    if not alvos:
+        return True
+    passos, estimado = planejador.planejar(posicao_atual, direcao_atual, alvos, modelo_custo)
+    inicio = hw.agora()
+    for tipo, valor in passos:
+        if tipo == 'girar':
+            girar(valor)
+        elif not andar_casas(valor):
+            return False
     pos_final = processa_posicao()
-    if pos_final[0] != x_alvo or pos_final[1] != y_alvo:
+    if pos_final[0] != alvos[-1][0] or pos_final[1] != alvos[-1][1]:
         print("Erro ao movimentar ou calcular localizacao")
-        leds.set_color("LEFT", "RED"); leds.set_color("RIGHT", "RED") 
-        return
+        hw.leds.set_color("LEFT", "RED"); hw.leds.set_color("RIGHT", "RED") 
+        return False
     posicao_atual = pos_final
-    print("Navegacao concluida! Posicao final: {}".format(posicao_atual))
+    print("Navegacao concluida! Posicao final: {} ({:.1f}s, estimado {:.1f}s)".format(
+        posicao_atual, hw.agora() - inicio, estimado))
+    return True
+
+def girar_para_rota(waypoints):
+    """Faz so os giros iniciais do plano, sem sair da casa (ex.: durante uma 'espera')."""
+    passos, _ = planejador.planejar(posicao_atual, direcao_atual, waypoints, modelo_custo)
+    for tipo, valor in passos:
+        if tipo != 'girar':
+            break
+        girar(valor)
 
 def processa_posicao():
     return posicao_atual
     global fitas_detectadas
     return [fitas_detectadas[1], fitas_detectadas[0]]
 
+def girar(quartos):
+    """Gira no lugar `quartos` quartos de volta: 1 a direita, -1 a esquerda, 2 meia volta."""
+    global direcao_atual, progresso
+    inicio = hw.agora()
+    dormir(planejador.PAUSA_GIRO)  # o robo assenta depois da reta antes de girar
+    graus_motor = (BITOLA_MM * 90 * abs(quartos)) / DIAMETRO_RODA_MM
+    velocidade = VELOCIDADE_DE_MOVIMENTO if quartos > 0 else -VELOCIDADE_DE_MOVIMENTO
+    hw.tank.on_for_degrees(hw.SpeedRPM(velocidade), hw.SpeedRPM(-velocidade), graus_motor)
+    direcao_atual = planejador.girar_direcao(direcao_atual, quartos)
+    progresso += 1
+    modelo_custo.observar_giro(quartos, hw.agora() - inicio)
+
 def girar_direita():
-    global direcao_atual
-    time.sleep(1)
-    graus_motor = (robot.axle_track_mm * 90) / robot.wheel_diameter_mm
-    robot.on_for_degrees(SpeedRPM(VELOCIDADE_DE_MOVIMENTO), SpeedRPM(-VELOCIDADE_DE_MOVIMENTO), graus_motor)
-    direcao_atual = atualizar_direcao('direita')
-    
+    girar(1)
+
 def girar_esquerda():
-    global direcao_atual
-    time.sleep(1)
-    graus_motor = (robot.axle_track_mm * 90) / robot.wheel_diameter_mm
-    robot.on_for_degrees(SpeedRPM(-VELOCIDADE_DE_MOVIMENTO), SpeedRPM(VELOCIDADE_DE_MOVIMENTO), graus_motor)
-    direcao_atual = atualizar_direcao('esquerda')
-
-def atualizar_direcao(giro):
-    global direcao_atual, direcoes_cardinais
-    indice_atual = direcoes_cardinais.index(direcao_atual)
-    if giro.lower() == 'direita':
-        return direcoes_cardinais[(indice_atual + 1) % len(direcoes_cardinais)]
-    elif giro.lower() == 'esquerda':
-        return direcoes_cardinais[(indice_atual - 1 + len(direcoes_cardinais)) % len(direcoes_cardinais)]
+    girar(-1)
+
+def enviar(conn, *mensagens):
+    """Envia as mensagens num unico frame."""
+    with envio_lock:
+        conn.sendall(encode(*mensagens))
+
+def batimentos(conn, parar):
+    """Thread que manda 'vivo' com o contador de progresso ate `parar` ou a conexao cair."""
+    while not parar.wait(BATIMENTO):
+        try:
+            enviar(conn, ('vivo', progresso))
+        except OSError:
+            return
 
 def envia_posicao(conn):
+    """Envia a posicao, precedida dos obstaculos encontrados, num unico frame."""
     posicao_atual = processa_posicao()
-    mensagem = "pos:{};{}".format(posicao_atual[0], posicao_atual[1])
-    conn.sendall(mensagem.encode('utf-8'))
+    mensagens = [('obstaculo', casa) for casa in obstaculos_detectados]
+    mensagens.append(('pos', (posicao_atual[0], posicao_atual[1])))
+    enviar(conn, *mensagens)
+    del obstaculos_detectados[:]
+
+def processa_comando(conn, tipo, valor, seguinte=None):
+    """
+    Executa uma mensagem do servidor. Retorna False se o robo deve desligar.
+    `seguinte` e a proxima mensagem do mesmo frame, se houver.
+    """
+    global posicao_atual, direcao_atual
+    if tipo == 'cmd' and valor == 'desligar':
+        return False
+    preparo.join()  # motores e amostrador prontos (na pratica ja estao: abriram durante a conexao)
+    if tipo == 'ir':
+        texto = "{}:{};{}".format(tipo, valor[0], valor[1])
+    elif tipo == 'inicio':
+        texto = "inicio:{};{} {}".format(*valor)
+    elif tipo == 'rota':
+        texto = "rota:{} pts".format(len(valor))
+    elif tipo == 'espera':
+        texto = "espera:{}ms".format(valor)
+    else:
+        texto = valor
+    print("Comando recebido: " + texto)
+
+    ui.mostrar(("Executando Comando:", FONTE_PEQUENA, 5, 40), (texto, FONTE_GRANDE, 5, 60))
+
+    # Processamento dos comandos
+    if tipo == 'inicio':
+        # Pose de partida da execucao, no lugar dos menus (modo daemon)
+        posicao_atual = [valor[0], valor[1]]
+        direcao_atual = valor[2]
+        envia_posicao(conn)
+    elif tipo == 'ir':
+        try:
+            ir_para_xy(int(valor[0]), int(valor[1]))
+            envia_posicao(conn)
+        except Exception as e:
+            print("Erro ao processar comando 'ir': {}".format(e))
+    elif tipo == 'rota':
+        try:
+            seguir_rota(valor)
+            envia_posicao(conn)
+        except Exception as e:
+            print("Erro ao processar comando 'rota': {}".format(e))
+    elif tipo == 'espera':
+        inicio = hw.agora()
+        if seguinte is not None and seguinte[0] in ('ir', 'rota'):
+            # Os giros iniciais nao tiram o robo da casa: ja sao feitos durante a espera
+            girar_para_rota([seguinte[1]] if seguinte[0] == 'ir' else seguinte[1])
+        dormir(max(0.0, valor / 1000.0 - (hw.agora() - inicio)))
+    elif valor == 'frente':
+        mover_e_detectar_cores(50)
+    elif valor == 'tras':
+        mover_e_detectar_cores(-50)
+    elif valor == 'esquerda':
+        girar_esquerda()
+    elif valor == 'direita':
+        girar_direita()
+    elif valor == 'posicao':
+        envia_posicao(conn)
+    return True
     
 
-# --- FLUXO PRINCIPAL DO PROGRAMA ---
-sound.beep()
-print("Inicializando...")
+# --- Descoberta e Conexao ---
+def ler_servidor_cache():
+    """Endereco do ultimo servidor encontrado, ou None."""
+    try:
+        with open(SERVIDOR_CACHE) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
 
-posicao_inicial = definir_posicao_inicial()
-posicao_atual = list(posicao_inicial)
-print("Posicao inicial definida pelo usuario: {}".format(posicao_inicial))
-
-direcao_atual = definir_direcao_inicial()
-print("Direcao inicial definida pelo usuario: {}".format(direcao_atual))
-
-# --- Descoberta do Servidor ---
-server_ip = None
-while server_ip is None:
-    print("Procurando servidor...")
-    leds.set_color("LEFT", "ORANGE"); leds.set_color("RIGHT", "ORANGE")
-    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    s.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-    s.settimeout(2.0)
+def salvar_servidor_cache(ip):
     try:
-        s.sendto(DISCOVERY_REQUEST, ('<broadcast>', UDP_PORT))
-        data, addr = s.recvfrom(1024)
-        if data == DISCOVERY_RESPONSE:
-            server_ip = addr[0]
-            print("Servidor encontrado em " + server_ip)
-            leds.set_color("LEFT", "GREEN"); leds.set_color("RIGHT", "GREEN")
-            sound.speak("Server found")
+        with open(SERVIDOR_CACHE, 'w') as f:
+            f.write(ip)
+    except OSError as e:
+        print("Nao foi possivel salvar o servidor: {}".format(e))
+
+def descobrir_servidor(tentativas=None, timeout=2.0):
+    """Procura o servidor por broadcast UDP. Retorna o IP, ou None depois de `tentativas` sem resposta."""
+    while tentativas is None or tentativas > 0:
+        print("Procurando servidor...")
+        hw.leds.set_color("LEFT", "ORANGE"); hw.leds.set_color("RIGHT", "ORANGE")
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        s.settimeout(timeout)
+        try:
+            s.sendto(DISCOVERY_REQUEST, ('<broadcast>', UDP_PORT))
+            data, addr = s.recvfrom(1024)
+            if data == DISCOVERY_RESPONSE:
+                print("Servidor encontrado em " + addr[0])
+                hw.leds.set_color("LEFT", "GREEN"); hw.leds.set_color("RIGHT", "GREEN")
+                ui.falar("Server found")
+                return addr[0]
+        except socket.timeout:
+            print("Timeout, tentando de novo...")
+            hw.leds.all_off()
+            if tentativas is None:
+                time.sleep(1)
+        except OSError as e:
+            print("Descoberta falhou: {}".format(e))
+            time.sleep(1)
+        finally:
+            s.close()
+        if tentativas is not None:
+            tentativas -= 1
+    return None
+
+def conectar_cache(server_ip, janela):
+    """Tenta o servidor em cache a cada INTERVALO_RECONEXAO por `janela` segundos (0 = uma tentativa)."""
+    limite = time.monotonic() + janela
+    while True:
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.settimeout(TIMEOUT_CACHE)
+        try:
+            s.connect((server_ip, TCP_PORT))
+            s.settimeout(None)
+            return s
+        except OSError:
+            s.close()
+        if time.monotonic() >= limite:
+            return None
+        time.sleep(INTERVALO_RECONEXAO)
+
+def conectar(reconexao=False):
+    """
+    Conecta ao servidor: primeiro no endereco em cache (sem esperar a descoberta),
+    depois pelo broadcast UDP, salvando o endereco encontrado.
+
+    Numa reconexao (queda ou, no modo daemon, a espera pelo servidor da
+    execucao), o servidor em cache e tentado a cada INTERVALO_RECONEXAO,
+    intercalado com rodadas curtas de descoberta, para conectar logo que ele
+    aceitar conexoes.
+    """
+    while True:
+        server_ip = ler_servidor_cache()
+        if server_ip:
+            print("Conectando ao servidor em cache " + server_ip)
+            s = conectar_cache(server_ip, JANELA_RECONEXAO if reconexao else 0)
+            if s is not None:
+                return s
+            print("Servidor em cache indisponivel.")
+        server_ip = descobrir_servidor(tentativas=1, timeout=0.5) if reconexao else descobrir_servidor()
+        if server_ip is None:
+            continue
+        print("Conectando ao servidor")
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            s.connect((server_ip, TCP_PORT))
+            salvar_servidor_cache(server_ip)
+            return s
+        except OSError as e:
+            print("Falha ao conectar: {}".format(e))
+            s.close()
             time.sleep(1)
-    except socket.timeout:
-        print("Timeout, tentando de novo...")
-        leds.all_off()
-        time.sleep(1)
-    finally:
-        s.close()
+
+# --- FLUXO PRINCIPAL DO PROGRAMA ---
+ui.iniciar()
+ui.bipe()
+print("Inicializando...")
+preparo.start()  # motores e sensor abrem enquanto o usuario escolhe a pose e o robo conecta
+
+if MODO_DAEMON:
+    # Sem menus: o robo parte de onde esta e o servidor pode mandar a pose com 'inicio'
+    print("Modo daemon: posicao {} direcao {} ate o servidor mandar 'inicio'".format(posicao_atual, direcao_atual))
+else:
+    posicao_inicial = definir_posicao_inicial()
+    posicao_atual = list(posicao_inicial)
+    print("Posicao inicial definida pelo usuario: {}".format(posicao_inicial))
+
+    direcao_atual = definir_direcao_inicial()
+    print("Direcao inicial definida pelo usuario: {}".format(direcao_atual))
+fase("posicao")
 
 # --- Conexao com o Servidor ---
 client_socket = None
+ativo = True
+reconectando = False
+desconectado_em = None
 try:
-    print("Conectando ao servidor")
-    client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    client_socket.connect((server_ip, TCP_PORT))
-    print("Conectado!")
-
-    # NOVA EXIBICAO DE TELA - MENSAGEM DE CONEXAO
-    screen.clear()
-    screen.text_pixels("Conectado ao Servidor!", font=fonte_pequena, x=10, y=50)
-    screen.update()
-    time.sleep(3) # Mostra a mensagem por 3 segundos
-    
-    client_socket.sendall(b"Ola, sou um EV3!")
-    envia_posicao(client_socket)
-    
-    while True:
-        command_bytes = client_socket.recv(1024)
-        if not command_bytes or command_bytes.decode('utf-8') == 'desligar':
-            break
-        
-        command = command_bytes.decode('utf-8')
-        print("Comando recebido: " + command)
-
-        screen.clear()
-        screen.text_pixels("Executando Comando:", font=fonte_pequena, x=5, y=40, clear_screen=False)
-        screen.text_pixels(command, font=fonte_grande, x=5, y=60)
-        screen.update()
-
-        # Processamento dos comandos
-        if command.startswith("ir:"):
-            try:
-                _, coords = command.split(':')
-                x_str, y_str = coords.split(';')
-                x_alvo, y_alvo = float(x_str), float(y_str)
-                ir_para_xy(int(x_alvo), int(y_alvo))
-                envia_posicao()
-            except Exception as e:
-                print("Erro ao processar comando 'ir': {}".format(e))
-        elif command == 'frente':
-            mover_e_detectar_cores(50)
-        elif command == 'tras':
-            mover_e_detectar_cores(-50)
-        elif command == 'esquerda':
-            girar_esquerda()
-        elif command == 'direita':
-            girar_direita()
-        elif command == 'posicao':
-            envia_posicao(client_socket)
+    # Se a conexao cair, o robo reconecta com o mesmo hw.robot_id e o servidor
+    # devolve a particula dele (P-Best e velocidade) se voltar dentro do prazo.
+    # No modo daemon, o 'desligar' do fim de uma execucao tambem so leva a
+    # reconexao: o robo espera, carregado, o servidor da execucao seguinte
+    while ativo:
+        client_socket = conectar(reconexao=reconectando or MODO_DAEMON)
+        print("Conectado!")
+        if reconectando:
+            hw.leds.set_color("LEFT", "GREEN"); hw.leds.set_color("RIGHT", "GREEN")
+            ui.bipe()
+        else:
+            # Fica na tela ate o primeiro comando, sem segurar o robo
+            ui.mostrar(("Conectado ao Servidor!", FONTE_PEQUENA, 10, 50))
 
+        # Saudacao com o ID do robo e a posicao atual no mesmo frame
+        posicao = processa_posicao()
+        decoder = FrameDecoder()
+        parar_batimentos = threading.Event()
+        fim_execucao = False
+        try:
+            client_socket.settimeout(SILENCIO_SERVIDOR)
+            enviar(client_socket, ('hello', hw.robot_id), ('pos', (posicao[0], posicao[1])))
+            if desconectado_em is None:
+                fase("conexao")
+            else:
+                print("Reconectado em {:.0f} ms".format((time.monotonic() - desconectado_em) * 1000))
+            threading.Thread(target=batimentos, args=(client_socket, parar_batimentos), daemon=True).start()
+            while not fim_execucao:
+                command_bytes = client_socket.recv(4096)
+                if not command_bytes:
+                    break
+                mensagens = [m for m in decoder.feed(command_bytes) if m[0] != 'vivo']  # 'vivo' so prova que a conexao esta viva
+                for i, (tipo, valor) in enumerate(mensagens):
+                    seguinte = mensagens[i + 1] if i + 1 < len(mensagens) else None
+                    if not processa_comando(client_socket, tipo, valor, seguinte):
+                        fim_execucao = True
+                        break
+        except OSError as e:
+            print("Conexao perdida: {}".format(e))
+        except ProtocolError as e:
+            # Um frame corrompido deixa o fluxo dessincronizado: trata como queda e reconecta
+            print("Mensagem invalida do servidor: {}".format(e))
+        parar_batimentos.set()
+        client_socket.close()
+        client_socket = None
+        desconectado_em = time.monotonic()
+        if fim_execucao and not MODO_DAEMON:
+            ativo = False
+        elif fim_execucao:
+            print("Execucao encerrada. Aguardando o servidor da proxima...")
+            hw.leds.set_color("LEFT", "ORANGE"); hw.leds.set_color("RIGHT", "ORANGE")
+            ui.mostrar(("Aguardando servidor", FONTE_PEQUENA, 10, 50))
+            reconectando = True
+        else:
+            print("Reconectando...")
+            hw.leds.set_color("LEFT", "ORANGE"); hw.leds.set_color("RIGHT", "ORANGE")
+            reconectando = True
+
+except KeyboardInterrupt:
+    print("Interrompido.")  # e assim que se encerra o modo daemon
 finally:
     print("Desconectado.")
-    leds.set_color("LEFT", "RED"); leds.set_color("RIGHT", "RED")
-    robot.off()
+    hw.leds.set_color("LEFT", "RED"); hw.leds.set_color("RIGHT", "RED")
+    hw.tank.off()
+    print("Sensor de cor: {:.0f} amostras/s".format(hw.amostrador.taxa()))
+    hw.amostrador.parar()
     if client_socket:
         client_socket.close()
     
     # Exibe mensagem final na tela
-    screen.clear()
-    screen.text_pixels("Desconectado.", font=fonte_grande, x=20, y=50)
-    screen.update()
-    
-    sound.speak("Disconnected")
-    time.sleep(3)
\ No newline at end of file
+    ui.mostrar(("Desconectado.", FONTE_GRANDE, 20, 50))
+    ui.falar("Disconnected")
+    ui.parar()  # desenha e fala o que ficou pendente antes de sair
+    print("Tela: {} quadros desenhados, {} descartados".format(ui.desenhados, ui.descartados))
+    if not MODO_DAEMON and not MODO_RAPIDO:
+        dormir(3)  # mantem a mensagem final na tela
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Planejador de movimento do robo.
+
+Transforma os alvos recebidos do servidor (o alvo de um 'ir' ou a fila de
+waypoints de uma 'rota') na sequencia de giros e retas de menor tempo
+estimado:
+
+- Um alvo fora dos eixos da posicao atual pode ser alcancado andando
+  primeiro em Y ou primeiro em X. A direcao em que um trecho termina muda o
+  custo do seguinte, entao a escolha e feita por programacao dinamica sobre
+  a direcao do robo, com todos os alvos da fila de uma vez.
+- Cada giro vai pelo lado mais curto, e a meia volta e um giro unico de
+  180 graus no lugar, com uma so pausa.
+- Retas seguidas na mesma direcao viram um unico movimento: o robo passa
+  pelo alvo intermediario sem parar.
+
+Os tempos vem de ModeloCusto, que parte dos valores medidos no robo real e
+se ajusta com a duracao observada de cada movimento.
+"""
+
+DIRECOES = ('N', 'L', 'S', 'O')  # sentido horario: girar a direita e somar 1
+EIXOS = {'x': (0, 'L', 'O'), 'y': (1, 'N', 'S')}  # indice na casa, direcao positiva e negativa
+ORDENS = ('yx', 'xy')  # em empate vale a primeira (Y antes de X, como o robo sempre fez)
+
+TEMPO_CASA = 2.4       # segundos por casa (28 cm a 40 RPM, rodas de 56 mm)
+TEMPO_ARRANQUE = 0.2   # aceleracao e frenagem de cada reta
+TEMPO_QUARTO = 0.8     # giro de 90 graus: ~193 graus de motor a 40 RPM
+PAUSA_GIRO = 0.3       # o robo assenta antes de girar
+PESO_OBSERVACAO = 0.2  # peso de cada duracao medida na media movel do modelo
+
+
+def giro(de, para):
+    """Quartos de volta de `de` ate `para`: 0, 1 (direita), -1 (esquerda) ou 2 (meia volta)."""
+    return (0, 1, 2, -1)[(DIRECOES.index(para) - DIRECOES.index(de)) % 4]
+
+
+def girar_direcao(direcao, quartos):
+    """Direcao depois de girar `quartos` quartos de volta (positivo a direita)."""
+    return DIRECOES[(DIRECOES.index(direcao) + quartos) % 4]
+
+
+class ModeloCusto:
+    """Duracao estimada de retas e giros, ajustada pelas duracoes medidas."""
+    def __init__(self, por_casa=TEMPO_CASA, arranque=TEMPO_ARRANQUE, por_quarto=TEMPO_QUARTO,
+                 pausa_giro=PAUSA_GIRO, peso=PESO_OBSERVACAO):
+        """
+        Args:
+            por_casa (float): Segundos por casa andada.
+            arranque (float): Segundos extras de cada reta (aceleracao e frenagem).
+            por_quarto (float): Segundos por giro de 90 graus.
+            pausa_giro (float): Segundos parado antes de cada giro.
+            peso (float): Peso de uma observacao nova (0 = modelo fixo).
+        """
+        self.por_casa = por_casa
+        self.arranque = arranque
+        self.por_quarto = por_quarto
+        self.pausa_giro = pausa_giro
+        self.peso = peso
+
+    def tempo_reta(self, casas):
+        return self.arranque + casas * self.por_casa
+
+    def tempo_giro(self, quartos):
+        return self.pausa_giro + abs(quartos) * self.por_quarto
+
+    def observar_reta(self, casas, segundos):
+        """Ajusta o tempo por casa com uma reta medida (`casas` pode ser fracionario)."""
+        if casas > 0:
+            amostra = max(0.0, segundos - self.arranque) / casas
+            self.por_casa += self.peso * (amostra - self.por_casa)
+
+    def observar_giro(self, quartos, segundos):
+        """Ajusta o tempo por quarto de volta com um giro medido."""
+        if quartos:
+            amostra = max(0.0, segundos - self.pausa_giro) / abs(quartos)
+            self.por_quarto += self.peso * (amostra - self.por_quarto)
+
+
+def trechos(origem, alvo, ordem):
+    """Retas (direcao, casas) de `origem` ate `alvo`, com os eixos na `ordem` dada ('yx' ou 'xy')."""
+    resultado = []
+    for eixo in ordem:
+        i, positiva, negativa = EIXOS[eixo]
+        delta = alvo[i] - origem[i]
+        if delta:
+            resultado.append((positiva if delta > 0 else negativa, abs(delta)))
+    return resultado
+
+
+def planejar(posicao, direcao, alvos, modelo=None):
+    """
+    Plano de menor tempo estimado para visitar os `alvos` em ordem.
+
+    Args:
+        posicao: Casa (x, y) atual.
+        direcao (str): Direcao atual ('N', 'L', 'S' ou 'O').
+        alvos: Casas (x, y) a visitar, em ordem.
+        modelo (ModeloCusto): Tempos usados; se None, os valores padrao.
+
+    Returns:
+        tuple: (passos, segundos). Cada passo e ('girar', quartos) ou
+        ('andar', casas), sempre na direcao em que o robo esta.
+    """
+    modelo = modelo or ModeloCusto()
+    # Melhor plano ate o alvo atual para cada direcao final: direcao -> (segundos, passos)
+    melhores = {direcao: (0.0, ())}
+    origem = (int(posicao[0]), int(posicao[1]))
+    for alvo in alvos:
+        alvo = (int(alvo[0]), int(alvo[1]))
+        novos = {}
+        for inicial in DIRECOES:  # ordem fixa: empates sempre resolvidos do mesmo jeito
+            if inicial not in melhores:
+                continue
+            custo_inicial, passos_iniciais = melhores[inicial]
+            for ordem in ORDENS:
+                custo, passos, atual = custo_inicial, list(passos_iniciais), inicial
+                for sentido, casas in trechos(origem, alvo, ordem):
+                    quartos = giro(atual, sentido)
+                    if quartos:
+                        custo += modelo.tempo_giro(quartos)
+                        passos.append(('girar', quartos))
+                        atual = sentido
+                    if passos and passos[-1][0] == 'andar':
+                        # Mesma direcao da reta anterior: continua sem parar
+                        custo += casas * modelo.por_casa
+                        passos[-1] = ('andar', passos[-1][1] + casas)
+                    else:
+                        custo += modelo.tempo_reta(casas)
+                        passos.append(('andar', casas))
+                if atual not in novos or custo < novos[atual][0]:
+                    novos[atual] = (custo, tuple(passos))
+        melhores = novos
+        origem = alvo
+    custo, passos = min((melhores[d] for d in DIRECOES if d in melhores), key=lambda melhor: melhor[0])
+    return list(passos), custo
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Protocolo de mensagens entre servidor e robôs.
+
+Cada frame é um cabeçalho fixo seguido de uma ou mais mensagens binárias:
+
+    versão (u8) | nº de mensagens (u8) | tamanho do corpo (u16) | corpo
+
+e cada mensagem do corpo é um código de tipo (u8) seguido do seu conteúdo.
+O decodificador é incremental: aceita bytes em pedaços arbitrários (como o
+TCP entrega) e só devolve mensagens de frames completos.
+"""
+import struct
+
+VERSION = 1
+HEADER = struct.Struct('!BBH')
+MAX_MESSAGES = 0xFF
+MAX_BODY = 0xFFFF
+
+_TIPO = struct.Struct('!B')
+_PONTO = struct.Struct('!hh')
+_TAMANHO = struct.Struct('!B')
+_MILISSEGUNDOS = struct.Struct('!H')
+_CONTADOR = struct.Struct('!H')
+_POSE = struct.Struct('!hhB')
+
+DIRECOES = ('N', 'L', 'S', 'O')  # direções cardeais, no fio pelo índice
+
+# Comandos sem argumentos, enviados como um único byte
+COMANDOS = ('frente', 'tras', 'esquerda', 'direita', 'posicao', 'desligar')
+
+
+class ProtocolError(ValueError):
+    """Frame malformado ou de versão incompatível."""
+
+
+# --- Codificação do conteúdo de cada tipo de mensagem ---
+def _enc_ponto(valor):
+    return _PONTO.pack(int(valor[0]), int(valor[1]))
+
+def _dec_ponto(buf, offset):
+    return _PONTO.unpack_from(buf, offset), offset + _PONTO.size
+
+def _enc_texto(valor):
+    dados = valor.encode('utf-8')
+    if len(dados) > 0xFF:
+        raise ProtocolError("Texto longo demais: {} bytes".format(len(dados)))
+    return _TAMANHO.pack(len(dados)) + dados
+
+def _dec_texto(buf, offset):
+    tamanho, = _TAMANHO.unpack_from(buf, offset)
+    inicio = offset + _TAMANHO.size
+    return bytes(buf[inicio:inicio + tamanho]).decode('utf-8'), inicio + tamanho
+
+def _enc_rota(valor):
+    if len(valor) > 0xFF:
+        raise ProtocolError("Rota longa demais: {} pontos".format(len(valor)))
+    return _TAMANHO.pack(len(valor)) + b''.join(_enc_ponto(p) for p in valor)
+
+def _dec_rota(buf, offset):
+    quantidade, = _TAMANHO.unpack_from(buf, offset)
+    offset += _TAMANHO.size
+    pontos = []
+    for _ in range(quantidade):
+        ponto, offset = _dec_ponto(buf, offset)
+        pontos.append(ponto)
+    return pontos, offset
+
+def _enc_espera(valor):
+    return _MILISSEGUNDOS.pack(min(int(valor), 0xFFFF))
+
+def _dec_espera(buf, offset):
+    return _MILISSEGUNDOS.unpack_from(buf, offset)[0], offset + _MILISSEGUNDOS.size
+
+def _enc_contador(valor):
+    return _CONTADOR.pack(int(valor) & 0xFFFF)
+
+def _dec_contador(buf, offset):
+    return _CONTADOR.unpack_from(buf, offset)[0], offset + _CONTADOR.size
+
+def _enc_pose(valor):
+    x, y, direcao = valor
+    if direcao not in DIRECOES:
+        raise ProtocolError("Direção inválida: {!r}".format(direcao))
+    return _POSE.pack(int(x), int(y), DIRECOES.index(direcao))
+
+def _dec_pose(buf, offset):
+    x, y, direcao = _POSE.unpack_from(buf, offset)
+    return (x, y, DIRECOES[direcao]), offset + _POSE.size
+
+def _enc_comando(valor):
+    return _TIPO.pack(COMANDOS.index(valor))
+
+def _dec_comando(buf, offset):
+    codigo, = _TIPO.unpack_from(buf, offset)
+    return COMANDOS[codigo], offset + _TIPO.size
+
+# tipo -> (código no fio, codificador, decodificador)
+_CODECS = {
+    'hello': (1, _enc_texto, _dec_texto),   # ID do robô
+    'pos': (2, _enc_ponto, _dec_ponto),     # posição confirmada (x, y)
+    'ir': (3, _enc_ponto, _dec_ponto),      # alvo (x, y)
+    'cmd': (4, _enc_comando, _dec_comando), # um dos COMANDOS
+    'obstaculo': (5, _enc_ponto, _dec_ponto),  # casa (x, y) bloqueada
+    'livre': (6, _enc_ponto, _dec_ponto),      # casa (x, y) antes bloqueada, agora livre
+    'rota': (7, _enc_rota, _dec_rota),         # waypoints [(x, y), ...] seguidos em linha reta
+    'espera': (8, _enc_espera, _dec_espera),   # milissegundos parado antes do próximo movimento
+    'vivo': (9, _enc_contador, _dec_contador), # batimento; do robô, leva o contador de progresso (mod 2^16)
+    'inicio': (10, _enc_pose, _dec_pose),      # posição (x, y) e direção em que o robô começa a execução
+}
+_POR_CODIGO = {codigo: (tipo, dec) for tipo, (codigo, _, dec) in _CODECS.items()}
+
+
+def encode(*mensagens):
+    """
+    Monta um único frame com uma ou mais mensagens.
+
+    Args:
+        mensagens: Tuplas (tipo, valor), ex: ('pos', (1, 2)) ou ('cmd', 'desligar').
+    """
+    if not 0 < len(mensagens) <= MAX_MESSAGES:
+        raise ProtocolError("Número de mensagens inválido: {}".format(len(mensagens)))
+    partes = []
+    for tipo, valor in mensagens:
+        codigo, enc, _ = _CODECS[tipo]
+        partes.append(_TIPO.pack(codigo))
+        partes.append(enc(valor))
+    corpo = b''.join(partes)
+    if len(corpo) > MAX_BODY:
+        raise ProtocolError("Frame grande demais: {} bytes".format(len(corpo)))
+    return HEADER.pack(VERSION, len(mensagens), len(corpo)) + corpo
+
+
+def decode_body(body, quantidade):
+    """Decodifica as `quantidade` mensagens do corpo de um frame."""
+    mensagens = []
+    offset = 0
+    try:
+        for _ in range(quantidade):
+            codigo, = _TIPO.unpack_from(body, offset)
+            tipo, dec = _POR_CODIGO[codigo]
+            valor, offset = dec(body, offset + _TIPO.size)
+            mensagens.append((tipo, valor))
+    except (KeyError, IndexError, struct.error, UnicodeDecodeError) as e:
+        raise ProtocolError("Corpo de frame inválido: {}".format(e))
+    if offset != len(body):
+        raise ProtocolError("Sobraram {} bytes no frame".format(len(body) - offset))
+    return mensagens
+
+
+class FrameDecoder:
+    """Decodificador incremental de frames."""
+    def __init__(self):
+        self._buf = bytearray()
+
+    def feed(self, data):
+        """
+        Acrescenta bytes recebidos e devolve as mensagens dos frames completos.
+
+        Returns:
+            list: Tuplas (tipo, valor) na ordem em que foram enviadas.
+        """
+        self._buf += data
+        mensagens = []
+        while len(self._buf) >= HEADER.size:
+            versao, quantidade, tamanho = HEADER.unpack_from(self._buf)
+            if versao != VERSION:
+                raise ProtocolError("Versão de protocolo não suportada: {}".format(versao))
+            fim = HEADER.size + tamanho
+            if len(self._buf) < fim:
+                break
+            mensagens.extend(decode_body(bytes(self._buf[HEADER.size:fim]), quantidade))
+            del self._buf[:fim]
+        return mensagens
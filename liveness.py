@@ -0,0 +1,77 @@
+import time
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+class LivenessTracker:
+    """
+    Detecta robôs mortos ou travados a partir dos batimentos ('vivo').
+
+    Um robô com batimento manda 'vivo' periodicamente com um contador de
+    progresso que o laço de movimento incrementa enquanto as rodas andam. A
+    thread do batimento continua viva mesmo com o movimento preso (roda
+    patinando, laço que nunca termina), então só o silêncio não basta: um
+    robô com comando pendente cujo contador não muda há `stall` segundos
+    também é considerado morto.
+
+    Robôs que nunca mandaram 'vivo' (firmware antigo) não são vigiados;
+    para eles valem só os prazos da barreira.
+
+    Todos os métodos devem ser chamados a partir do event loop do servidor.
+    """
+    def __init__(self, silence: float, stall: float):
+        """
+        Args:
+            silence (float): Segundos sem nenhuma mensagem até o robô ser considerado morto.
+            stall (float): Segundos com comando pendente e sem progresso até o robô ser considerado travado.
+        """
+        self.silence = silence
+        self.stall = stall
+        self._seen: Dict[Hashable, float] = {}      # última mensagem dos robôs vigiados
+        self._progress: Dict[Hashable, int] = {}    # último contador de progresso recebido
+        self._stall_at: Dict[Hashable, float] = {}  # robôs com comando pendente -> instante em que contam como travados
+
+    def heartbeat(self, key: Hashable, progress: int):
+        """Registra um 'vivo'; o robô passa a ser vigiado."""
+        now = time.monotonic()
+        self._seen[key] = now
+        if self._progress.get(key) != progress:
+            self._progress[key] = progress
+            if key in self._stall_at:
+                self._stall_at[key] = now + self.stall
+
+    def seen(self, key: Hashable):
+        """Qualquer outra mensagem também prova que a conexão está viva."""
+        if key in self._seen:
+            self._seen[key] = time.monotonic()
+
+    def busy(self, key: Hashable, allowance: float = 0.0):
+        """
+        Marca o envio de um comando de movimento.
+
+        Args:
+            allowance (float): Segundos em que o robô fica parado de propósito ('espera') antes de sair.
+        """
+        self._stall_at[key] = time.monotonic() + allowance + self.stall
+
+    def idle(self, key: Hashable):
+        """O robô confirmou a posição: não há mais movimento pendente."""
+        self._stall_at.pop(key, None)
+
+    def discard(self, key: Hashable):
+        self._seen.pop(key, None)
+        self._progress.pop(key, None)
+        self._stall_at.pop(key, None)
+
+    def dead(self, now: Optional[float] = None) -> List[Tuple[Hashable, str]]:
+        """
+        Returns:
+            List[Tuple[Hashable, str]]: Os robôs vigiados mortos ou travados, com o motivo.
+        """
+        now = time.monotonic() if now is None else now
+        dead = []
+        for key, seen in self._seen.items():
+            if now - seen > self.silence:
+                dead.append((key, f"sem mensagens há {now - seen:.0f}s"))
+            elif self._stall_at.get(key, now) < now:
+                dead.append((key, f"sem progresso há {now - self._stall_at[key] + self.stall:.0f}s"))
+        return dead
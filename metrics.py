@@ -0,0 +1,248 @@
+"""
+Métricas estruturadas do servidor.
+
+Contadores, medidores e histogramas simples, atualizados dentro do event
+loop (sem locks: incrementar uma métrica custa uma busca em dicionário e uma
+soma). O Registry expõe os valores no formato de texto do Prometheus e como
+um snapshot JSON; serve() abre um endpoint HTTP local com os dois formatos e
+write_snapshots() grava o JSON periodicamente em arquivo.
+"""
+import asyncio
+import bisect
+import json
+import math
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Limites (s) dos histogramas de tempo: de milissegundos (processamento) a um movimento inteiro
+TIME_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+Labels = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+def _json_value(value: float) -> Optional[float]:
+    """O valor no snapshot JSON: infinito e NaN (ex.: G-Best antes da primeira avaliação) viram null."""
+    return value if math.isfinite(value) else None
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Labels, '_Metric'] = {}
+
+    def labels(self, *values) -> '_Metric':
+        """A série com estes valores de rótulo (criada na primeira vez)."""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} espera os rótulos {self.labelnames}, recebeu {key}")
+            child = self._children[key] = self._new_child()
+        return child
+
+    def remove(self, *values):
+        """Descarta a série destes rótulos (ex.: robô desconectado)."""
+        self._children.pop(tuple(str(v) for v in values), None)
+
+    def _series(self) -> Iterable[Tuple[Labels, '_Metric']]:
+        return self._children.items() if self.labelnames else [((), self)]
+
+    def _label_text(self, values: Labels, extra: str = '') -> str:
+        pairs = [f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def _new_child(self) -> '_Metric':
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Valor que só cresce (mensagens, bytes, avaliações...)."""
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def _new_child(self) -> 'Counter':
+        return Counter(self.name, self.help)
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{self._label_text(k)} {_format_value(c.value)}" for k, c in self._series()]
+
+    def snapshot(self):
+        if not self.labelnames:
+            return _json_value(self.value)
+        return {','.join(k): _json_value(c.value) for k, c in self._series()}
+
+
+class Gauge(Counter):
+    """Valor que sobe e desce (robôs conectados, G-Best atual...)."""
+    kind = 'gauge'
+
+    def set(self, value: float):
+        self.value = float(value)
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def _new_child(self) -> 'Gauge':
+        return Gauge(self.name, self.help)
+
+
+class Histogram(_Metric):
+    """Distribuição de valores em faixas cumulativas, com soma e contagem."""
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = TIME_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # a última faixa é +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def _new_child(self) -> 'Histogram':
+        return Histogram(self.name, self.help, buckets=self.buckets)
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, h in self._series():
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), h.counts):
+                cumulative += n
+                le = 'le="{}"'.format(_format_value(bound))
+                lines.append(f"{self.name}_bucket{self._label_text(key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(key)} {_format_value(h.sum)}")
+            lines.append(f"{self.name}_count{self._label_text(key)} {h.count}")
+        return lines
+
+    def snapshot(self):
+        def summary(h: 'Histogram') -> dict:
+            return {'count': h.count, 'sum': h.sum, 'mean': h.sum / h.count if h.count else None,
+                    'buckets': dict(zip([_format_value(b) for b in self.buckets + (math.inf,)], h.counts))}
+        if not self.labelnames:
+            return summary(self)
+        return {','.join(k): summary(h) for k, h in self._series()}
+
+
+class Registry:
+    """Conjunto das métricas de um processo, na ordem em que foram criadas."""
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self.started = time.time()
+
+    def _add(self, metric: _Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Métrica '{metric.name}' já registrada")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = TIME_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        """Todas as métricas no formato de texto do Prometheus (versão 0.0.4)."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self) -> dict:
+        return {
+            'timestamp': time.time(),
+            'uptime_s': time.time() - self.started,
+            'metrics': {name: metric.snapshot() for name, metric in self._metrics.items()},
+        }
+
+
+# --- Exposição ---
+async def serve(registry: Registry, host: str, port: int,
+                extra: Optional[Callable[[], dict]] = None) -> asyncio.AbstractServer:
+    """
+    Endpoint HTTP mínimo: GET /metrics (texto do Prometheus) e GET /metrics.json (snapshot).
+
+    Args:
+        registry (Registry): As métricas expostas.
+        host (str): Interface (use 127.0.0.1 para acesso apenas local).
+        port (int): Porta TCP.
+        extra (Optional[Callable[[], dict]]): Campos adicionais do snapshot JSON.
+    """
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await reader.readline()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass  # cabeçalhos ignorados
+            parts = request.decode('latin-1').split()
+            path = parts[1].split('?')[0] if len(parts) > 1 else ''
+            if path == '/metrics':
+                status, ctype, body = '200 OK', 'text/plain; version=0.0.4; charset=utf-8', registry.render()
+            elif path == '/metrics.json':
+                status, ctype, body = '200 OK', 'application/json', json.dumps(snapshot(registry, extra), allow_nan=False)
+            else:
+                status, ctype, body = '404 Not Found', 'text/plain; charset=utf-8', 'use /metrics ou /metrics.json\n'
+            data = body.encode('utf-8')
+            writer.write(f"HTTP/1.0 {status}\r\nContent-Type: {ctype}\r\nContent-Length: {len(data)}\r\n"
+                         f"Connection: close\r\n\r\n".encode('latin-1') + data)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+def snapshot(registry: Registry, extra: Optional[Callable[[], dict]] = None) -> dict:
+    data = registry.snapshot()
+    if extra is not None:
+        data.update(extra())
+    return data
+
+
+async def write_snapshots(registry: Registry, path: str, interval: float,
+                          extra: Optional[Callable[[], dict]] = None):
+    """Grava o snapshot JSON em `path` a cada `interval` segundos (troca atômica do arquivo)."""
+    while True:
+        write_snapshot(registry, path, extra)
+        await asyncio.sleep(interval)
+
+
+def write_snapshot(registry: Registry, path: str, extra: Optional[Callable[[], dict]] = None):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(snapshot(registry, extra), f, indent=2, allow_nan=False)
+    os.replace(tmp, path)
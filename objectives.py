@@ -0,0 +1,178 @@
+"""
+Registro de funções objetivo do PSO.
+
+Toda função objetivo recebe um array (N, 2) de posições e devolve um array
+(N,) de valores (problema de MINIMIZAÇÃO), avaliando o enxame inteiro de uma
+vez. Como os robôs só param em casas inteiras dentro de BOUNDS, a função é
+usada através de um FitnessCache indexado pela casa: pré-calculado para a
+grade inteira quando a função é barata, ou preenchido sob demanda (com
+descarte LRU) quando é cara.
+"""
+from collections import OrderedDict
+from typing import Callable, Dict, NamedTuple, Sequence
+
+import numpy as np
+
+TARGET = (1, 3)  # Casa alvo usada pelas funções baseadas em distância
+STOP_ERROR = 0.35     # Desvio padrão (em casas) de onde o robô realmente para, em cada eixo
+STOP_SAMPLES = 20000  # Amostras de Monte Carlo por ponto em 'distancia_esperada'
+FIELD = 'campo_distancia'  # Distância contornando obstáculos, mantida pelo occupancy.OccupancyGrid
+
+BatchObjective = Callable[[np.ndarray], np.ndarray]
+
+
+class ObjectiveSpec(NamedTuple):
+    func: BatchObjective
+    cheap: bool  # True: pode ser pré-calculada para a grade inteira na inicialização
+
+
+_REGISTRY: Dict[str, ObjectiveSpec] = {}
+
+
+def register(name: str, cheap: bool = True):
+    """Decorador que registra uma função objetivo em lote com o nome `name`."""
+    def decorator(func: BatchObjective) -> BatchObjective:
+        if name in _REGISTRY:
+            raise ValueError(f"Função objetivo '{name}' já registrada")
+        _REGISTRY[name] = ObjectiveSpec(func, cheap)
+        return func
+    return decorator
+
+
+def available() -> Sequence[str]:
+    return sorted(list(_REGISTRY) + [FIELD])
+
+
+def get(name: str) -> ObjectiveSpec:
+    try:
+        return _REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"Função objetivo desconhecida: '{name}'. Disponíveis: {', '.join(available())}") from None
+
+
+# --- Funções Objetivo ---
+@register('distancia')
+def euclidean_distance(points: np.ndarray) -> np.ndarray:
+    """Distância euclidiana até TARGET (a função objetivo original)."""
+    return np.hypot(points[:, 0] - TARGET[0], points[:, 1] - TARGET[1])
+
+
+@register('manhattan')
+def manhattan_distance(points: np.ndarray) -> np.ndarray:
+    """Distância em casas até TARGET, andando só nos eixos como os robôs."""
+    return np.abs(points[:, 0] - TARGET[0]) + np.abs(points[:, 1] - TARGET[1])
+
+
+@register('rastrigin')
+def rastrigin(points: np.ndarray) -> np.ndarray:
+    """Rastrigin centrada em TARGET: vários mínimos locais, útil para testar a exploração."""
+    d = points - np.asarray(TARGET, dtype=float)
+    return 20 + np.sum(d ** 2 - 10 * np.cos(np.pi * d), axis=1)
+
+
+_stop_offsets = None
+
+
+@register('distancia_esperada', cheap=False)
+def expected_distance(points: np.ndarray) -> np.ndarray:
+    """
+    Distância esperada até TARGET com o erro de parada do robô (gaussiano, STOP_ERROR casas),
+    estimada por Monte Carlo com STOP_SAMPLES amostras por ponto. Cara: fica no cache sob demanda.
+    As mesmas amostras valem para todos os pontos, então cada casa tem sempre o mesmo valor.
+    """
+    global _stop_offsets
+    if _stop_offsets is None:
+        _stop_offsets = np.random.default_rng(0).normal(0.0, STOP_ERROR, size=(STOP_SAMPLES, 2))
+    values = np.empty(len(points))
+    for i, (x, y) in enumerate(points):
+        values[i] = np.mean(np.hypot(x + _stop_offsets[:, 0] - TARGET[0], y + _stop_offsets[:, 1] - TARGET[1]))
+    return values
+
+
+# --- Cache por Casa ---
+class FitnessCache:
+    """
+    Memoiza uma função objetivo por casa da grade.
+
+    Pontos fora da grade ou não inteiros são avaliados diretamente, sem cache.
+    """
+    def __init__(self, func: BatchObjective, bounds: Sequence[Sequence[float]],
+                 precompute: bool, maxsize: int = 4096):
+        """
+        Args:
+            func (BatchObjective): A função objetivo em lote.
+            bounds (Sequence): [[x_min, y_min], [x_max, y_max]] da grade.
+            precompute (bool): Avaliar a grade inteira agora (funções baratas) ou sob demanda.
+            maxsize (int): Número máximo de casas guardadas no modo sob demanda.
+        """
+        self.func = func
+        self.lower = np.asarray(bounds[0], dtype=int)
+        self.upper = np.asarray(bounds[1], dtype=int)
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.table = None
+        self._lru: "OrderedDict[tuple, float]" = OrderedDict()
+        if precompute:
+            xs, ys = np.meshgrid(np.arange(self.lower[0], self.upper[0] + 1),
+                                 np.arange(self.lower[1], self.upper[1] + 1), indexing='ij')
+            cells = np.column_stack([xs.ravel(), ys.ravel()]).astype(float)
+            self.table = np.asarray(func(cells), dtype=float).reshape(xs.shape)
+
+    def __call__(self, points: np.ndarray) -> np.ndarray:
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        cells = points.astype(np.intp)
+        rel = cells - self.lower
+        cacheable = (np.all(cells == points, axis=1) & np.all(rel >= 0, axis=1)
+                     & np.all(cells <= self.upper, axis=1))
+
+        if self.table is not None:
+            if cacheable.all():  # caso comum: todos os robôs em casas da grade
+                self.hits += len(points)
+                return self.table[rel[:, 0], rel[:, 1]]
+            values = np.empty(len(points))
+            values[~cacheable] = self.func(points[~cacheable])
+            values[cacheable] = self.table[rel[cacheable, 0], rel[cacheable, 1]]
+            self.hits += int(cacheable.sum())
+            return values
+
+        values = np.empty(len(points))
+        if not cacheable.all():
+            values[~cacheable] = self.func(points[~cacheable])
+        missing = []
+        keys = list(map(tuple, cells.tolist()))
+        for i in np.flatnonzero(cacheable).tolist():
+            key = keys[i]
+            cached = self._lru.get(key)
+            if cached is None:
+                missing.append(i)
+            else:
+                self._lru.move_to_end(key)
+                values[i] = cached
+        self.hits += int(cacheable.sum()) - len(missing)
+        if missing:
+            self.misses += len(missing)
+            missing = np.asarray(missing)
+            values[missing] = self.func(points[missing])
+            for i in missing.tolist():
+                self._lru[keys[i]] = values[i]
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+        return values
+
+
+def make_objective(name: str, bounds: Sequence[Sequence[float]], maxsize: int = 4096,
+                   occupancy=None) -> BatchObjective:
+    """
+    Cria a função objetivo `name` já envolvida no cache por casa adequado ao seu custo.
+
+    Para FIELD, devolve o próprio mapa `occupancy` (ou um novo, sem obstáculos):
+    ele já é uma tabela por casa e muda a cada obstáculo, então não passa pelo cache.
+    """
+    if name == FIELD:
+        if occupancy is None:
+            from occupancy import OccupancyGrid
+            occupancy = OccupancyGrid(bounds)
+        return occupancy
+    spec = get(name)
+    return FitnessCache(spec.func, bounds, precompute=spec.cheap, maxsize=maxsize)
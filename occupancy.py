@@ -0,0 +1,174 @@
+"""
+Mapa de ocupação da arena e campo de distância até o alvo.
+
+O OccupancyGrid guarda as casas bloqueadas reportadas pelos robôs e mantém,
+para cada casa livre, a distância em casas (BFS 4-conectado) até o alvo,
+contornando os obstáculos. Cada obstáculo novo só recalcula as casas cujo
+caminho mais curto passava por ele; cada obstáculo removido só propaga a
+melhora a partir da casa liberada. O campo é então usado como função
+objetivo com consulta O(1) por casa.
+"""
+import heapq
+from collections import deque
+from typing import Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from objectives import TARGET
+
+Cell = Tuple[int, int]
+
+
+class OccupancyGrid:
+    """Grade de ocupação dimensionada por BOUNDS com campo de distância incremental."""
+    def __init__(self, bounds: Sequence[Sequence[float]], goal: Sequence[int] = TARGET):
+        """
+        Args:
+            bounds (Sequence): [[x_min, y_min], [x_max, y_max]] da arena.
+            goal (Sequence[int]): A casa alvo (x, y) do campo de distância.
+        """
+        self.lower = np.asarray(bounds[0], dtype=int)
+        self.upper = np.asarray(bounds[1], dtype=int)
+        self.shape = tuple(int(v) for v in self.upper - self.lower + 1)
+        self.goal: Cell = (int(goal[0]), int(goal[1]))
+        self.blocked = np.zeros(self.shape, dtype=bool)
+        self.dist = np.full(self.shape, np.inf)
+        # Casas inalcançáveis valem mais que qualquer distância possível na grade
+        self.unreachable = float(self.shape[0] * self.shape[1])
+        self.version = 0
+        self.last_update_cells = 0  # casas recalculadas na última atualização
+        self._rebuild()
+
+    # --- Auxiliares de Índice ---
+    def _rel(self, cell: Cell) -> Cell:
+        return cell[0] - int(self.lower[0]), cell[1] - int(self.lower[1])
+
+    def in_bounds(self, cell: Cell) -> bool:
+        x, y = self._rel(cell)
+        return 0 <= x < self.shape[0] and 0 <= y < self.shape[1]
+
+    def neighbors(self, r: Cell) -> Iterator[Cell]:
+        x, y = r
+        if x > 0: yield (x - 1, y)
+        if x < self.shape[0] - 1: yield (x + 1, y)
+        if y > 0: yield (x, y - 1)
+        if y < self.shape[1] - 1: yield (x, y + 1)
+
+    def is_blocked(self, cell: Cell) -> bool:
+        return bool(self.blocked[self._rel(cell)])
+
+    def obstacles(self) -> List[Cell]:
+        return [(int(x + self.lower[0]), int(y + self.lower[1])) for x, y in np.argwhere(self.blocked)]
+
+    # --- Campo de Distância ---
+    def _rebuild(self):
+        """BFS completo a partir do alvo (usado só na criação)."""
+        self.dist.fill(np.inf)
+        goal = self._rel(self.goal)
+        if not self.in_bounds(self.goal) or self.blocked[goal]:
+            return
+        self.dist[goal] = 0
+        queue = deque([goal])
+        while queue:
+            r = queue.popleft()
+            for n in self.neighbors(r):
+                if not self.blocked[n] and self.dist[n] == np.inf:
+                    self.dist[n] = self.dist[r] + 1
+                    queue.append(n)
+        self.last_update_cells = int(np.isfinite(self.dist).sum())
+
+    def set_obstacle(self, cell: Cell, blocked: bool = True) -> bool:
+        """
+        Marca (ou desmarca) uma casa como obstáculo e atualiza o campo localmente.
+
+        Returns:
+            bool: True se o mapa mudou.
+        """
+        if not self.in_bounds(cell):
+            return False
+        r = self._rel(cell)
+        if self.blocked[r] == blocked:
+            return False
+        self.blocked[r] = blocked
+        if blocked:
+            self._block(r)
+        else:
+            self._unblock(r)
+        self.version += 1
+        return True
+
+    def _block(self, r: Cell):
+        """Novo obstáculo: as distâncias só podem aumentar, e só nas casas que dependiam dele."""
+        old = self.dist[r]
+        self.dist[r] = np.inf
+        if old == np.inf:
+            self.last_update_cells = 0
+            return
+
+        # 1. Invalida, em ordem de distância, as casas que perderam todo vizinho
+        #    que as sustentava (vizinho válido com distância exatamente 1 menor).
+        invalid = {r}
+        queue = deque(n for n in self.neighbors(r) if self.dist[n] == old + 1)
+        while queue:
+            n = queue.popleft()
+            if n in invalid:
+                continue
+            d = self.dist[n]
+            if any(m not in invalid and self.dist[m] == d - 1 for m in self.neighbors(n)):
+                continue
+            invalid.add(n)
+            self.dist[n] = np.inf
+            queue.extend(m for m in self.neighbors(n) if self.dist[m] == d + 1)
+
+        # 2. Recalcula só as casas invalidadas a partir da borda ainda válida
+        heap = []
+        for n in invalid:
+            if self.blocked[n]:
+                continue
+            best = min((self.dist[m] + 1 for m in self.neighbors(n) if m not in invalid), default=np.inf)
+            if best < np.inf:
+                heapq.heappush(heap, (best, n))
+        while heap:
+            d, n = heapq.heappop(heap)
+            if d >= self.dist[n]:
+                continue
+            self.dist[n] = d
+            for m in self.neighbors(n):
+                if m in invalid and not self.blocked[m] and d + 1 < self.dist[m]:
+                    heapq.heappush(heap, (d + 1, m))
+        self.last_update_cells = len(invalid)
+
+    def _unblock(self, r: Cell):
+        """Obstáculo removido: as distâncias só podem diminuir, propagando a partir da casa liberada."""
+        if r == self._rel(self.goal):
+            self.dist[r] = 0
+        else:
+            self.dist[r] = min((self.dist[m] + 1 for m in self.neighbors(r)), default=np.inf)
+        touched = 1
+        if self.dist[r] == np.inf:
+            self.last_update_cells = touched
+            return
+        queue = deque([r])
+        while queue:
+            n = queue.popleft()
+            for m in self.neighbors(n):
+                if not self.blocked[m] and self.dist[n] + 1 < self.dist[m]:
+                    self.dist[m] = self.dist[n] + 1
+                    queue.append(m)
+                    touched += 1
+        self.last_update_cells = touched
+
+    # --- Função Objetivo ---
+    def __call__(self, points: np.ndarray) -> np.ndarray:
+        """Distância até o alvo contornando obstáculos, em lote (consulta O(1) por casa)."""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        cells = points.astype(np.intp)
+        rel = cells - self.lower
+        valid = (np.all(cells == points, axis=1) & np.all(rel >= 0, axis=1)
+                 & np.all(cells <= self.upper, axis=1))
+        if valid.all():  # caso comum: todos os robôs em casas da grade
+            values = self.dist[rel[:, 0], rel[:, 1]]
+        else:
+            values = np.full(len(points), np.inf)
+            values[valid] = self.dist[rel[valid, 0], rel[valid, 1]]
+        return np.minimum(values, self.unreachable)
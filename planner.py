@@ -0,0 +1,107 @@
+"""
+Planejador de rotas do servidor.
+
+Calcula, com A* 4-conectado sobre o OccupancyGrid, o caminho mais curto
+livre de obstáculos entre duas casas e o reduz aos pontos de virada
+(waypoints), que é o que o robô precisa para andar em linha reta de um a
+outro. As rotas ficam num cache LRU indexado por (origem, destino, versão do
+mapa): movimentos repetidos entre as mesmas casas não custam nada, e
+qualquer mudança no mapa invalida as rotas antigas naturalmente.
+"""
+import heapq
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from occupancy import Cell, OccupancyGrid
+
+Route = Tuple[Cell, ...]
+
+
+class RoutePlanner:
+    """A* sobre o mapa de ocupação com cache de rotas."""
+    def __init__(self, occupancy: OccupancyGrid, maxsize: int = 4096):
+        """
+        Args:
+            occupancy (OccupancyGrid): O mapa compartilhado com o servidor.
+            maxsize (int): Número máximo de rotas guardadas.
+        """
+        self.occupancy = occupancy
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[tuple, Optional[Route]]" = OrderedDict()
+
+    def route(self, start: Cell, goal: Cell) -> Optional[Route]:
+        """
+        Waypoints de `start` até `goal` (sem a origem, com o destino).
+
+        Returns:
+            Optional[Route]: Os pontos de virada, () se já está no destino, ou
+            None se o destino está bloqueado, fora do mapa ou inalcançável.
+        """
+        start, goal = (int(start[0]), int(start[1])), (int(goal[0]), int(goal[1]))
+        key = (start, goal, self.occupancy.version)
+        if key in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        self.misses += 1
+        path = self._astar(start, goal)
+        waypoints = None if path is None else compress(path)
+        self._cache[key] = waypoints
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return waypoints
+
+    def _astar(self, start: Cell, goal: Cell) -> Optional[List[Cell]]:
+        grid = self.occupancy
+        if not grid.in_bounds(start) or not grid.in_bounds(goal) or grid.is_blocked(goal):
+            return None
+        ox, oy = int(grid.lower[0]), int(grid.lower[1])
+        s, g = (start[0] - ox, start[1] - oy), (goal[0] - ox, goal[1] - oy)
+        blocked = grid.blocked
+
+        def h(r):
+            return abs(r[0] - g[0]) + abs(r[1] - g[1])
+
+        # Empates em f são desfeitos pelo maior g (segue avançando em vez de abrir a fronteira)
+        heap = [(h(s), 0, s)]
+        cost = {s: 0}
+        parent = {s: None}
+        while heap:
+            _, neg_g, r = heapq.heappop(heap)
+            if r == g:
+                break
+            if -neg_g > cost[r]:
+                continue
+            d = cost[r] + 1
+            for n in grid.neighbors(r):
+                if blocked[n] or d >= cost.get(n, d + 1):
+                    continue
+                cost[n] = d
+                parent[n] = r
+                heapq.heappush(heap, (d + h(n), -d, n))
+        else:
+            return None
+
+        path = []
+        r = g
+        while r is not None:
+            path.append((r[0] + ox, r[1] + oy))
+            r = parent[r]
+        path.reverse()
+        return path
+
+
+def compress(path: List[Cell]) -> Route:
+    """Reduz um caminho casa a casa aos pontos onde a direção muda (mais o destino)."""
+    waypoints = []
+    for i in range(1, len(path)):
+        if i == len(path) - 1:
+            waypoints.append(path[i])
+            break
+        before = (path[i][0] - path[i - 1][0], path[i][1] - path[i - 1][1])
+        after = (path[i + 1][0] - path[i][0], path[i + 1][1] - path[i][1])
+        if before != after:
+            waypoints.append(path[i])
+    return tuple(waypoints)
@@ -0,0 +1,280 @@
+from typing import Callable, Dict, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from objectives import make_objective
+
+# -- Parâmetros PSO --
+MAX_ITERATIONS = 5
+W = 0.5   # Inércia
+C1 = 1.5  # Coeficiente cognitivo (pessoal)
+C2 = 1.5  # Coeficiente social (global)
+BOUNDS = [[0, 0], [3, 6]]  # [[x_min, y_min], [x_max, y_max]]
+
+# --- Critérios de Parada ---
+# Cada iteração custa ~20 s de robôs andando: o PSO para antes de MAX_ITERATIONS
+# quando um destes critérios é atingido (None desativa o critério).
+TARGET_FITNESS: Optional[float] = 0.0  # G-Best que encerra a execução (mínimo das funções registradas)
+PATIENCE: Optional[int] = None         # Iterações seguidas sem melhora do G-Best
+MIN_DIAMETER: Optional[float] = None   # Diâmetro do enxame (em casas) abaixo do qual ele convergiu
+
+# --- Agenda dos Coeficientes ---
+# 'constante' usa W, C1 e C2 em todas as iterações; veja SCHEDULES.
+SCHEDULE = 'constante'
+W_START, W_END = 0.9, 0.4  # Inércia no início e no fim da agenda 'linear'
+PHI1 = PHI2 = 2.05         # Agenda 'constricao' (Clerc): exige PHI1 + PHI2 > 4
+
+# --- Função Objetiva ---
+# Nome no registro de objectives.py; o servidor e a simulação aceitam --objetivo para trocar.
+OBJECTIVE = 'distancia'
+objective_function = make_objective(OBJECTIVE, BOUNDS)
+
+# --- PSO Discreto (grade inteira) ---
+# None mantém o comportamento original: o alvo contínuo é truncado com int().
+DISCRETE_MODES = ('truncar', 'arredondar', 'estocastico')
+DISCRETE_MODE: Optional[str] = None
+MIN_STEP = 1  # Passo mínimo, em casas, nos modos 'arredondar' e 'estocastico'
+
+
+class GridDiscretizer:
+    """
+    Converte os alvos contínuos do PSO em casas da grade.
+
+    - 'truncar': int() sobre o alvo, como o servidor sempre fez (referência).
+    - 'arredondar': casa mais próxima do alvo.
+    - 'estocastico': arredonda para cima com probabilidade igual à parte
+      fracionária, então velocidades pequenas ainda movem o robô às vezes.
+
+    Nos dois últimos modos, uma partícula que ficaria parada anda ao menos
+    `min_step` casas no eixo dominante da sua velocidade, e um alvo que já foi
+    avaliado pelo enxame (ou escolhido por outra partícula na mesma rodada) é
+    trocado por uma casa vizinha ainda não avaliada, quando existe.
+    """
+    def __init__(self, bounds: Sequence[Sequence[float]], mode: str = 'arredondar',
+                 min_step: int = MIN_STEP, dedupe: bool = True,
+                 rng: Optional[np.random.Generator] = None):
+        if mode not in DISCRETE_MODES:
+            raise ValueError(f"Modo discreto desconhecido: '{mode}'. Disponíveis: {', '.join(DISCRETE_MODES)}")
+        self.mode = mode
+        self.lower = np.asarray(bounds[0], dtype=np.intp)
+        self.upper = np.asarray(bounds[1], dtype=np.intp)
+        self.min_step = min_step
+        self.dedupe = dedupe
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.seen = np.zeros(tuple(self.upper - self.lower + 1), dtype=bool)
+        self.nudged = 0   # partículas que ficariam paradas e receberam o passo mínimo
+        self.deduped = 0  # alvos trocados por uma casa ainda não avaliada
+
+    def mark(self, points: np.ndarray):
+        """Registra as casas avaliadas (pontos fora da grade ou não inteiros são ignorados)."""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        cells = points.astype(np.intp)
+        ok = (np.all(cells == points, axis=1) & np.all(cells >= self.lower, axis=1)
+              & np.all(cells <= self.upper, axis=1))
+        rel = cells[ok] - self.lower
+        self.seen[rel[:, 0], rel[:, 1]] = True
+
+    def __call__(self, pos: np.ndarray, targets: np.ndarray, velocity: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            pos (np.ndarray): Posições atuais (N, 2).
+            targets (np.ndarray): Alvos contínuos (N, 2), já limitados aos bounds.
+            velocity (np.ndarray): Velocidades (N, 2) que geraram os alvos.
+
+        Returns:
+            np.ndarray: As casas alvo (N, 2) inteiras.
+        """
+        if self.mode == 'truncar':
+            return targets.astype(np.intp)
+        if self.mode == 'arredondar':
+            cells = np.rint(targets)
+        else:
+            floor = np.floor(targets)
+            cells = floor + (self.rng.random(targets.shape) < targets - floor)
+        cells = np.clip(cells, self.lower, self.upper).astype(np.intp)
+        start = np.rint(pos).astype(np.intp)
+
+        stalled = np.abs(cells - start).sum(axis=1) < self.min_step
+        if stalled.any():
+            cells[stalled] = self._nudge(start[stalled], velocity[stalled])
+            self.nudged += int(stalled.sum())
+
+        if self.dedupe and not self.seen.all():
+            self._dedupe(cells, start, velocity)
+        return cells
+
+    def _nudge(self, start: np.ndarray, velocity: np.ndarray) -> np.ndarray:
+        """Passo mínimo no eixo dominante da velocidade (ou num eixo aleatório, se ela é nula)."""
+        rows = np.arange(len(start))
+        axis = np.argmax(np.abs(velocity), axis=1)
+        still = ~np.any(velocity, axis=1)
+        axis[still] = self.rng.integers(2, size=int(still.sum()))
+        sign = np.sign(velocity[rows, axis]).astype(np.intp)
+        zero = sign == 0
+        sign[zero] = self.rng.choice((-1, 1), size=int(zero.sum()))
+        cells = start.copy()
+        cells[rows, axis] += sign * self.min_step
+        # Na borda: vai para o outro lado
+        out = (cells[rows, axis] < self.lower[axis]) | (cells[rows, axis] > self.upper[axis])
+        cells[rows[out], axis[out]] = start[rows[out], axis[out]] - sign[out] * self.min_step
+        return np.clip(cells, self.lower, self.upper)
+
+    def _dedupe(self, cells: np.ndarray, start: np.ndarray, velocity: np.ndarray):
+        rel = cells - self.lower
+        repeated = self.seen[rel[:, 0], rel[:, 1]]
+        _, first = np.unique(cells, axis=0, return_index=True)
+        duplicated = np.ones(len(cells), dtype=bool)
+        duplicated[first] = False  # a primeira partícula de cada casa fica com ela
+        # Só vale tentar trocar quando a casa alvo tem ao menos um vizinho não avaliado
+        unseen = np.pad(~self.seen, 1)
+        px, py = rel[:, 0] + 1, rel[:, 1] + 1
+        has_free = unseen[px + 1, py] | unseen[px - 1, py] | unseen[px, py + 1] | unseen[px, py - 1]
+        conflicting = np.flatnonzero((repeated | duplicated) & has_free)
+        if len(conflicting) == 0:
+            return
+        claimed = set(map(tuple, cells.tolist()))
+        # Casas ainda livres para troca: quando acabam, as demais partículas ficam com o alvo original
+        free = int((~self.seen).sum()) - int((~repeated[first]).sum())
+        exhausted = set()  # casas alvo cujos vizinhos já estão todos avaliados ou escolhidos
+        (x0, y0), (x1, y1) = self.lower.tolist(), self.upper.tolist()
+        for i, (cx, cy), (sx, sy), (vx, vy) in zip(conflicting.tolist(), cells[conflicting].tolist(),
+                                                   start[conflicting].tolist(), velocity[conflicting].tolist()):
+            if free <= 0:
+                break
+            if (cx, cy) in exhausted:
+                continue
+            skipped_start = False
+            # Vizinhos na ordem de alinhamento com a velocidade
+            for dx, dy in sorted(((1, 0), (-1, 0), (0, 1), (0, -1)), key=lambda d: -(d[0] * vx + d[1] * vy)):
+                x, y = cx + dx, cy + dy
+                if not (x0 <= x <= x1 and y0 <= y <= y1):
+                    continue
+                if (x, y) in claimed or self.seen[x - x0, y - y0]:
+                    continue
+                if (x, y) == (sx, sy):
+                    skipped_start = True
+                    continue
+                cells[i] = (x, y)
+                claimed.add((x, y))
+                self.deduped += 1
+                free -= 1
+                break
+            else:
+                if not skipped_start:
+                    exhausted.add((cx, cy))
+
+
+class Coefficients(NamedTuple):
+    w: float
+    c1: float
+    c2: float
+
+
+# Agenda: (iteração começando em 0, total de iterações) -> coeficientes daquela iteração
+Schedule = Callable[[int, int], Coefficients]
+
+
+def constant_schedule(w: float = W, c1: float = C1, c2: float = C2) -> Schedule:
+    """Os mesmos coeficientes em todas as iterações (o comportamento original)."""
+    coefficients = Coefficients(w, c1, c2)
+    return lambda iteration, iterations: coefficients
+
+
+def linear_schedule(w_start: float = W_START, w_end: float = W_END,
+                    c1: float = C1, c2: float = C2) -> Schedule:
+    """
+    Inércia decrescendo linearmente de `w_start` a `w_end` ao longo da execução:
+    passos largos no começo (exploração) e curtos no fim (refinamento).
+    """
+    def schedule(iteration: int, iterations: int) -> Coefficients:
+        fraction = iteration / (iterations - 1) if iterations > 1 else 0.0
+        return Coefficients(w_start + (w_end - w_start) * min(fraction, 1.0), c1, c2)
+    return schedule
+
+
+def constriction_schedule(phi1: float = PHI1, phi2: float = PHI2) -> Schedule:
+    """
+    Fator de constrição de Clerc e Kennedy: com phi = phi1 + phi2 > 4,
+    chi = 2 / |2 - phi - sqrt(phi^2 - 4 phi)| e a atualização vira
+    w = chi, c1 = chi * phi1, c2 = chi * phi2, o que garante convergência
+    sem limitar a velocidade.
+    """
+    phi = phi1 + phi2
+    if phi <= 4:
+        raise ValueError(f"A constrição exige phi1 + phi2 > 4 (recebido {phi})")
+    chi = 2 / abs(2 - phi - np.sqrt(phi * phi - 4 * phi))
+    return constant_schedule(chi, chi * phi1, chi * phi2)
+
+
+SCHEDULES: Dict[str, Callable[[], Schedule]] = {
+    'constante': constant_schedule,
+    'linear': linear_schedule,
+    'constricao': constriction_schedule,
+}
+
+
+def make_schedule(name: str = SCHEDULE) -> Schedule:
+    try:
+        return SCHEDULES[name]()
+    except KeyError:
+        raise ValueError(f"Agenda desconhecida: '{name}'. Disponíveis: {', '.join(SCHEDULES)}") from None
+
+
+class StoppingCriteria:
+    """
+    Decide, ao fim de cada iteração, se o PSO pode parar antes de MAX_ITERATIONS.
+
+    - target_fitness: o G-Best chegou a este valor (ou abaixo).
+    - patience: o G-Best não melhorou nas últimas `patience` iterações.
+    - min_diameter: todas as partículas cabem numa caixa de diagonal menor
+      que este valor (limite superior do diâmetro do enxame, em casas).
+    """
+    def __init__(self, target_fitness: Optional[float] = TARGET_FITNESS,
+                 patience: Optional[int] = PATIENCE, min_diameter: Optional[float] = MIN_DIAMETER):
+        self.target_fitness = target_fitness
+        self.patience = patience
+        self.min_diameter = min_diameter
+        self.reset()
+
+    def reset(self, gbest_val: float = float('inf')):
+        """Recomeça a contagem a partir do G-Best atual (ex.: o da saudação)."""
+        self.best = gbest_val
+        self.stale = 0
+
+    def reached(self, gbest_val: float) -> bool:
+        """True se `gbest_val` já atinge o alvo (checado também antes da primeira iteração)."""
+        return self.target_fitness is not None and gbest_val <= self.target_fitness
+
+    def check(self, gbest_val: float, positions: np.ndarray) -> Optional[str]:
+        """
+        Args:
+            gbest_val (float): G-Best ao fim da iteração.
+            positions (np.ndarray): Posições (N, 2) das partículas ativas.
+
+        Returns:
+            Optional[str]: O motivo da parada, ou None para continuar.
+        """
+        if gbest_val < self.best:
+            self.best, self.stale = gbest_val, 0
+        else:
+            self.stale += 1
+        if self.reached(gbest_val):
+            return f"G-Best {gbest_val:.2f} atingiu o alvo {self.target_fitness:.2f}"
+        if self.patience is not None and self.stale >= self.patience:
+            return f"G-Best sem melhora há {self.stale} iterações"
+        if self.min_diameter is not None and len(positions):
+            diameter = float(np.hypot(*np.ptp(positions, axis=0)))
+            if diameter < self.min_diameter:
+                return f"diâmetro do enxame {diameter:.2f} abaixo de {self.min_diameter:.2f}"
+        return None
+
+
+def optional_value(kind: type):
+    """Tipo para argparse: converte com `kind`, ou None para 'nenhum' (critério desativado)."""
+    return lambda text: None if text == 'nenhum' else kind(text)
+
+
+def make_discretizer(mode: Optional[str], bounds: Sequence[Sequence[float]] = BOUNDS,
+                     rng: Optional[np.random.Generator] = None) -> Optional[GridDiscretizer]:
+    """GridDiscretizer para `mode`, ou None para manter o truncamento original."""
+    return None if mode is None else GridDiscretizer(bounds, mode, rng=rng)
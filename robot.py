@@ -1,37 +1,58 @@
 import numpy as np
-from socket import socket
-from typing import Tuple
+from asyncio import StreamWriter
+from typing import Optional
+
+from swarm import SwarmState
 
 class Robot:
     """
-    Representa um robo sendo uma partícula do PSO, armazenando seu estado e funções necessárias
+    Representa um robo sendo uma partícula do PSO. O estado fica nos arrays do
+    SwarmState; o Robot é apenas um índice nesses arrays mais a conexão.
     """
-    def __init__(self, initial_pos: Tuple[int, int], conn: socket):
+    def __init__(self, index: int, conn: StreamWriter, swarm: SwarmState, robot_id: Optional[str] = None):
         """
-        Inicializa o estado da partícula (robô).
+        Inicializa o handle da partícula (robô).
 
         Args:
-            initial_pos (Tuple[int, int]): A posição inicial (x, y) do robô.
-            conn (socket): O objeto de conexão de socket com este robô.
+            index (int): O índice da partícula nos arrays do enxame.
+            conn (StreamWriter): O lado de escrita da conexão com este robô.
+            swarm (SwarmState): O enxame que guarda o estado da partícula.
+            robot_id (Optional[str]): O ID informado pelo robô na saudação.
         """
-        self.conn: socket = conn
+        self.index: int = index
+        self.conn: StreamWriter = conn
+        self.swarm: SwarmState = swarm
+        self.robot_id: Optional[str] = robot_id
+
+    # --- Atributos de Estado e PSO (visões dos arrays do enxame) ---
+    @property
+    def position(self) -> np.ndarray:
+        return self.swarm.position[self.index]
+
+    @property
+    def velocity(self) -> np.ndarray:
+        return self.swarm.velocity[self.index]
+
+    @property
+    def pbest_pos(self) -> np.ndarray:
+        return self.swarm.pbest_pos[self.index]
+
+    @property
+    def pbest_val(self) -> float:
+        return float(self.swarm.pbest_val[self.index])
 
-        # --- Atributos de Estado e PSO ---
-        self.position: np.ndarray = np.array(initial_pos, dtype=float)
-        self.velocity: np.ndarray = np.random.uniform(-1, 1, size=2)
-        self.pbest_pos: np.ndarray = np.copy(self.position)
-        
-        # Para um problema de MINIMIZAÇÃO, valor inicial é infinito positivo
-        self.pbest_val: float = float('inf')
-        self.fitness: float = float('inf')
+    @property
+    def fitness(self) -> float:
+        return float(self.swarm.fitness[self.index])
 
     def update_position(self, x: int, y: int):
         """
         Atualiza a posição atual do robô.
         """
-        self.position = np.array([x, y], dtype=float)
+        with self.swarm.lock:
+            self.swarm.position[self.index] = (x, y)
 
     def __repr__(self) -> str:
         pos_str = f"[{self.position[0]:.1f}, {self.position[1]:.1f}]"
         pbest_val_str = f"{self.pbest_val:.2f}" if self.pbest_val != float('inf') else "inf"
-        return f"Robot(Pos: {pos_str}, P-Best Value: {pbest_val_str})"
\ No newline at end of file
+        return f"Robot(ID: {self.robot_id}, Pos: {pos_str}, P-Best Value: {pbest_val_str})"
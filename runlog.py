@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Log binário de uma execução do PSO, só de acréscimo.
+
+O arquivo é um cabeçalho JSON curto (parâmetros da execução) seguido de
+registros de tamanho fixo (RECORD, 80 bytes): um por robô em cada iteração,
+com posição, velocidade, P-Best, G-Best e o comando enviado. Como os
+registros têm tamanho fixo e são gravados em ordem de iteração, o RunLog lê
+o arquivo por mmap como um array estruturado do numpy, sem copiá-lo para a
+memória: só as páginas realmente acessadas são lidas do disco, e um
+registro incompleto no fim (execução interrompida) é ignorado.
+
+Uso:
+    python runlog.py resumo execucao.pso
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from typing import Iterator, Optional, Sequence
+
+import numpy as np
+
+MAGIC = b'PSOLOG1\0'
+_HEADER_LEN = struct.Struct('<I')
+
+# Bits do campo 'flags'
+ACKED = 1      # o robô confirmou a posição (foi avaliado)
+STRAGGLER = 2  # perdeu o prazo da barreira nesta iteração
+PBEST = 4      # melhorou o próprio P-Best
+GBEST = 8      # encontrou um novo G-Best
+
+RECORD = np.dtype([
+    ('iteration', '<u4'),
+    ('time', '<f8'),          # segundos desde o início da execução
+    ('robot', 'S16'),         # ID da saudação (truncado em 16 bytes)
+    ('slot', '<u2'),          # índice da partícula no SwarmState
+    ('flags', 'u1'),
+    ('waypoints', 'u1'),      # pontos da rota enviada (0 = 'ir' direto ou parado)
+    ('position', '<f4', 2),   # posição avaliada (ou a atual, se não confirmou)
+    ('velocity', '<f4', 2),
+    ('target', '<i2', 2),     # casa enviada ao robô
+    ('wait', '<f4'),          # espera (s) antes de sair
+    ('fitness', '<f4'),
+    ('pbest_pos', '<f4', 2),
+    ('pbest_val', '<f4'),
+    ('gbest_pos', '<f4', 2),
+    ('gbest_val', '<f4'),
+])
+
+
+class RunLogWriter:
+    """Grava os registros de uma execução, um bloco por iteração."""
+    def __init__(self, path: str, **meta):
+        """
+        Args:
+            path (str): Arquivo de saída (sobrescrito).
+            **meta: Parâmetros da execução guardados no cabeçalho (modo, objetivo, BOUNDS...).
+        """
+        self.path = path
+        self.start = time.monotonic()
+        header = json.dumps({'version': 1, 'record_size': RECORD.itemsize, 'fields': list(RECORD.names),
+                             'started': time.time(), **meta}).encode('utf-8')
+        header += b' ' * (-(len(MAGIC) + _HEADER_LEN.size + len(header)) % 8)  # registros alinhados em 8 bytes
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC + _HEADER_LEN.pack(len(header)) + header)
+        self._file.flush()
+        self.records = 0
+
+    def write(self, iteration: int, swarm, idx: np.ndarray, robots: Sequence[str],
+              targets: np.ndarray, flags: np.ndarray, waits: Optional[np.ndarray] = None,
+              waypoints: Optional[np.ndarray] = None):
+        """
+        Grava o estado das partículas `idx` ao fim de uma iteração.
+
+        Args:
+            iteration (int): Número da iteração (no modo assíncrono, a iteração equivalente).
+            swarm (SwarmState): O enxame, já com P-Best e G-Best atualizados.
+            idx (np.ndarray): Índices das partículas no enxame.
+            robots (Sequence[str]): ID de cada partícula.
+            targets (np.ndarray): Casa (N, 2) enviada a cada robô.
+            flags (np.ndarray): Combinação de ACKED, STRAGGLER, PBEST e GBEST de cada robô.
+            waits (Optional[np.ndarray]): Espera (s) de cada robô antes de sair.
+            waypoints (Optional[np.ndarray]): Número de pontos da rota de cada robô.
+        """
+        rec = np.zeros(len(idx), dtype=RECORD)
+        rec['iteration'] = iteration
+        rec['time'] = time.monotonic() - self.start
+        rec['robot'] = [r.encode('utf-8')[:16] for r in robots]
+        rec['slot'] = idx
+        rec['flags'] = flags
+        rec['position'] = swarm.position[idx]
+        rec['velocity'] = swarm.velocity[idx]
+        rec['target'] = targets
+        rec['fitness'] = swarm.fitness[idx]
+        rec['pbest_pos'] = swarm.pbest_pos[idx]
+        rec['pbest_val'] = swarm.pbest_val[idx]
+        if swarm.gbest_pos is not None:
+            rec['gbest_pos'] = swarm.gbest_pos
+        rec['gbest_val'] = swarm.gbest_val
+        if waits is not None:
+            rec['wait'] = waits
+        if waypoints is not None:
+            rec['waypoints'] = np.minimum(waypoints, 255)
+        self._file.write(rec.tobytes())
+        self._file.flush()  # um crash perde no máximo a iteração em andamento
+        self.records += len(rec)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> 'RunLogWriter':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RunLog:
+    """Leitura de um log por mmap: `records` é um array estruturado sobre o arquivo, sem cópia."""
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        prefix = self._file.read(len(MAGIC) + _HEADER_LEN.size)
+        if len(prefix) < len(MAGIC) + _HEADER_LEN.size or prefix[:len(MAGIC)] != MAGIC:
+            self._file.close()
+            raise ValueError(f"{path} não é um log de execução do PSO")
+        (header_len,) = _HEADER_LEN.unpack(prefix[len(MAGIC):])
+        self.meta = json.loads(self._file.read(header_len))
+        if self.meta['record_size'] != RECORD.itemsize:
+            self._file.close()
+            raise ValueError(f"Registro de {self.meta['record_size']} bytes; esta versão lê {RECORD.itemsize}")
+        offset = len(prefix) + header_len
+        count = (size - offset) // RECORD.itemsize  # ignora um registro incompleto no fim
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self.records = np.frombuffer(self._mmap, dtype=RECORD, count=count, offset=offset) if count else \
+            np.zeros(0, dtype=RECORD)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _bound(self, iteration: int) -> int:
+        """Primeiro registro com iteração >= `iteration` (busca binária: lê só log2(N) registros)."""
+        lo, hi = 0, len(self.records)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.records[mid]['iteration'] < iteration:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def iteration(self, iteration: int) -> np.ndarray:
+        """Registros de uma iteração (uma fatia do mmap, sem cópia)."""
+        return self.records[self._bound(iteration):self._bound(iteration + 1)]
+
+    def iterations(self) -> Iterator[np.ndarray]:
+        """Percorre o log iteração por iteração, sem ler o arquivo inteiro de uma vez."""
+        start = 0
+        while start < len(self.records):
+            end = self._bound(int(self.records[start]['iteration']) + 1)
+            yield self.records[start:end]
+            start = end
+
+    def robot(self, robot_id: str) -> np.ndarray:
+        """Trajetória de um robô (cópia dos registros dele, em ordem)."""
+        return self.records[self.records['robot'] == robot_id.encode('utf-8')[:16]]
+
+    def gbest_curve(self) -> np.ndarray:
+        """Array (iteração, G-Best ao fim dela) da execução inteira."""
+        last = [(int(block['iteration'][-1]), float(block['gbest_val'][-1])) for block in self.iterations()]
+        return np.array(last, dtype=[('iteration', '<u4'), ('gbest_val', '<f8')])
+
+    def close(self):
+        self.records = np.zeros(0, dtype=RECORD)  # solta a referência ao mmap antes de fechá-lo
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass  # ainda há fatias em uso: o mmap é fechado quando a última for descartada
+        self._file.close()
+
+    def __enter__(self) -> 'RunLog':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != 'resumo':
+        print("Uso: python runlog.py resumo <execucao.pso>")
+        sys.exit(1)
+    with RunLog(sys.argv[2]) as log:
+        meta = {k: v for k, v in log.meta.items() if k not in ('fields', 'record_size')}
+        print(f"[LOG] {sys.argv[2]}: {len(log)} registros | {meta}")
+        for block in log.iterations():
+            acked = int(np.count_nonzero(block['flags'] & ACKED))
+            print(f"  iteração {int(block['iteration'][0]):>4} | t={float(block['time'][-1]):7.1f}s | "
+                  f"{acked}/{len(block)} confirmados | G-Best {float(block['gbest_val'][-1]):.2f}")
@@ -0,0 +1,171 @@
+"""
+Escalonador multi-robô com tabela de reservas espaço-tempo.
+
+Fica entre o passo do PSO e o envio dos comandos. O tempo é discretizado em
+ticks (um tick para andar uma casa ou para um giro de 90°) e cada robô
+reserva as casas que vai ocupar em cada tick. Os robôs são planejados um
+de cada vez (planejamento priorizado):
+
+1. O alvo do PSO vira a casa livre mais próxima dele que ninguém mais
+   ocupa ou escolheu nesta rodada.
+2. A rota do RoutePlanner é expandida em uma linha do tempo; se ela colide
+   com uma reserva (mesma casa no mesmo tick, troca de casas entre dois
+   robôs, ou casa onde outro robô já estacionou), o robô espera alguns
+   ticks na origem antes de sair.
+3. Se nenhuma espera resolve, o robô fica parado nesta rodada.
+
+Cada robô custa O(comprimento da rota × esperas tentadas), então o custo
+por iteração cresce linearmente com o número de robôs.
+"""
+from collections import Counter, deque
+from itertools import chain
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from ev3.planejador import TEMPO_CASA
+from occupancy import Cell, OccupancyGrid
+from planner import Route, RoutePlanner
+
+# Segundos de um tick: o tempo do robô para andar uma casa. O servidor converte as esperas
+# em 'espera' e os simuladores as executam com este mesmo valor
+TICK_SECONDS = TEMPO_CASA
+
+
+class Assignment(NamedTuple):
+    goal: Cell       # casa onde o robô termina a rodada
+    waypoints: Route # rota até `goal` (vazia se o robô fica parado)
+    wait: int        # ticks de espera na origem antes de sair
+
+
+def timeline(start: Cell, waypoints: Route) -> List[Cell]:
+    """Casa ocupada em cada tick ao seguir `waypoints`, contando um tick parado por giro."""
+    cells = [start]
+    current, heading = start, None
+    for x, y in waypoints:
+        step = ((x > current[0]) - (x < current[0]), (y > current[1]) - (y < current[1]))
+        if heading is not None and step != heading:
+            cells.append(current)
+        while current != (x, y):
+            current = (current[0] + step[0], current[1] + step[1])
+            cells.append(current)
+        heading = step
+    return cells
+
+
+class ReservationScheduler:
+    """Resolve alvos e rotas conflitantes de um grupo de robôs."""
+    def __init__(self, occupancy: OccupancyGrid, planner: RoutePlanner,
+                 max_wait: int = 6, max_candidates: int = 16):
+        """
+        Args:
+            occupancy (OccupancyGrid): O mapa de obstáculos.
+            planner (RoutePlanner): O planejador de rotas (e seu cache).
+            max_wait (int): Máximo de ticks de espera tentados antes de desistir de mover o robô.
+            max_candidates (int): Máximo de casas livres tentadas como alvo substituto.
+        """
+        self.occupancy = occupancy
+        self.planner = planner
+        self.max_wait = max_wait
+        self.max_candidates = max_candidates
+        self.moved_goals = 0   # alvos trocados pela casa livre mais próxima
+        self.waits = 0         # robôs que receberam espera
+        self.held = 0          # robôs mantidos parados
+
+    def schedule(self, starts: Sequence[Cell], targets: Sequence[Cell],
+                 occupied: Iterable[Cell] = ()) -> List[Assignment]:
+        """
+        Args:
+            starts (Sequence[Cell]): Casa atual de cada robô. Robôs na mesma casa (ex.: partidas
+                aleatórias do simulaCarga) são separados: quem é planejado antes sai sem esperar.
+            targets (Sequence[Cell]): Alvo do PSO de cada robô, já arredondado.
+            occupied (Iterable[Cell]): Casas ocupadas por robôs fora deste grupo durante toda a rodada.
+
+        Returns:
+            List[Assignment]: Alvo, rota e espera de cada robô, na ordem de `starts`.
+        """
+        starts = [(int(s[0]), int(s[1])) for s in starts]
+        targets = [(int(t[0]), int(t[1])) for t in targets]
+        occupied = occupied if isinstance(occupied, (set, frozenset)) else set(occupied)
+        pending = Counter(starts)        # origens de robôs ainda não planejados (com repetição)
+        claimed: Set[Cell] = set()       # alvos já escolhidos nesta rodada
+        vertex: Set[Tuple[Cell, int]] = set()
+        edges: Set[Tuple[Cell, Cell, int]] = set()
+        parked: Dict[Cell, int] = {}     # casa -> tick a partir do qual um robô fica parado nela
+        last_use: Dict[Cell, int] = {}   # casa -> último tick reservado
+
+        def conflicts(cells: List[Cell]) -> bool:
+            for t, c in enumerate(cells):
+                if not t:
+                    continue  # a origem no tick 0 é um dado, não uma escolha (pode ser repetida)
+                if (c, t) in vertex or c in occupied or c in pending or parked.get(c, t + 1) <= t:
+                    return True
+                if cells[t - 1] != c and (c, cells[t - 1], t) in edges:
+                    return True
+            return last_use.get(cells[-1], -1) >= len(cells) - 1
+
+        def reserve(cells: List[Cell]):
+            for t, c in enumerate(cells):
+                vertex.add((c, t))
+                if t and cells[t - 1] != c:
+                    edges.add((cells[t - 1], c, t))
+                if last_use.get(c, -1) < t:
+                    last_use[c] = t
+            parked[cells[-1]] = len(cells) - 1
+
+        # Quem vai mais longe escolhe primeiro: rotas longas são as mais difíceis de encaixar depois
+        order = sorted(range(len(starts)), key=lambda i: -(abs(targets[i][0] - starts[i][0])
+                                                           + abs(targets[i][1] - starts[i][1])))
+        result: List[Optional[Assignment]] = [None] * len(starts)
+        for i in order:
+            start = starts[i]
+            pending[start] -= 1
+            if not pending[start]:
+                del pending[start]
+            assignment = None
+            goals = self._free_cells_near(targets[i], start, (claimed, pending, occupied))
+            if start in pending:
+                # Outro robô ainda parte desta casa: se o alvo não der, qualquer casa livre perto serve para sair
+                goals = chain(goals, self._free_cells_near(start, start, (claimed, pending, occupied)))
+            for goal in goals:
+                waypoints = () if goal == start else self.planner.route(start, goal)
+                if waypoints is None:
+                    continue
+                cells = timeline(start, waypoints)
+                for wait in range(self.max_wait + 1):
+                    if not conflicts([start] * wait + cells):
+                        assignment = Assignment(goal, waypoints, wait)
+                        cells = [start] * wait + cells
+                        break
+                if assignment is not None:
+                    break
+            if assignment is None:
+                assignment = Assignment(start, (), 0)
+                cells = [start]
+                self.held += 1
+            else:
+                self.moved_goals += assignment.goal != targets[i]
+                self.waits += assignment.wait > 0
+            reserve(cells)
+            claimed.add(assignment.goal)
+            result[i] = assignment
+        return result
+
+    def _free_cells_near(self, target: Cell, start: Cell, taken: Sequence[Set[Cell]]) -> Iterable[Cell]:
+        """Casas livres e fora de `taken` em ordem de distância (BFS) a partir de `target`, até max_candidates."""
+        grid = self.occupancy
+        if not grid.in_bounds(target):
+            return
+        lower = (int(grid.lower[0]), int(grid.lower[1]))
+        root = (target[0] - lower[0], target[1] - lower[1])
+        seen = {root}
+        queue = deque([root])
+        found = 0
+        while queue and found < self.max_candidates:
+            r = queue.popleft()
+            cell = (r[0] + lower[0], r[1] + lower[1])
+            if not grid.blocked[r] and (cell == start or not any(cell in s for s in taken)):
+                found += 1
+                yield cell
+            for n in grid.neighbors(r):
+                if n not in seen:
+                    seen.add(n)
+                    queue.append(n)
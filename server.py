@@ -1,10 +1,29 @@
-from socket import socket, timeout, SO_REUSEADDR, SOCK_STREAM, SOL_SOCKET, AF_INET, SOCK_DGRAM
-from typing import Dict, Tuple
+from collections import deque
+from socket import socket, SO_REUSEADDR, SOL_SOCKET, AF_INET, SOCK_DGRAM
+from typing import Deque, Dict, Optional, Tuple
+import argparse
+import asyncio
 import numpy as np
+import sys
 import threading
 import time
 
+from barrier import IterationBarrier
+from ev3.protocol import DIRECOES, FrameDecoder, ProtocolError, encode
+from liveness import LivenessTracker
+import metrics
+import objectives
+from occupancy import OccupancyGrid
+from planner import RoutePlanner
+from scheduler import TICK_SECONDS, Assignment, ReservationScheduler
+from pso import (BOUNDS, DISCRETE_MODE, DISCRETE_MODES, MAX_ITERATIONS, MIN_DIAMETER, OBJECTIVE, PATIENCE,
+                 SCHEDULE, SCHEDULES, TARGET_FITNESS, StoppingCriteria, make_discretizer, make_schedule,
+                 objective_function, optional_value)
 from robot import Robot
+from runlog import ACKED, GBEST, PBEST, STRAGGLER, RunLogWriter
+from stats import RunStats
+from swarm import SwarmState
+from tracing import CAPACITY as TRACE_CAPACITY, Tracer
 
 # -- Configurações do Servidor --
 HOST = '0.0.0.0'  # Escuta em todas as interfaces
@@ -13,213 +32,861 @@ UDP_PORT = 65431
 DISCOVERY_REQUEST = b"EV3_DISCOVERY_REQUEST"
 DISCOVERY_RESPONSE = b"EV3_SERVER_HERE"
 
-# -- Parâmetros PSO --
-MAX_ITERATIONS = 5
-W = 0.5   # Inércia
-C1 = 1.5  # Coeficiente cognitivo (pessoal)
-C2 = 1.5  # Coeficiente social (global)
-BOUNDS = [[0, 0], [3, 6]]
-PSO_ITERATION_INTERVAL = 20
+# -- Parâmetros PSO (W, C1, C2, BOUNDS, MAX_ITERATIONS, critérios de parada e a função objetivo ficam em pso.py) --
+PSO_MODE = 'sync'  # 'sync' (iterações com barreira) ou 'async' (cada robô segue no seu ritmo)
+PSO_ITERATION_INTERVAL = 20  # Prazo máximo (s) de espera por robô em uma iteração
+
+# -- Prazos da Barreira de Iteração --
+SEGUNDOS_POR_CASA = 2.5  # Tempo estimado para andar uma casa
+SEGUNDOS_POR_GIRO = 2.0  # Tempo estimado de um giro de 90° (inclui a pausa antes do giro)
+MARGEM_PRAZO = 3.0       # Folga fixa para comunicação e paradas
+
+# -- Reconexão --
+GRACE_PERIOD = 60.0  # Segundos que a partícula de um robô desconectado (com ID) espera por ele
+
+# -- Batimentos e Vivacidade --
+HEARTBEAT_INTERVAL = 2.0  # Segundos entre batimentos ('vivo') do servidor e checagens de vivacidade
+SILENCE_TIMEOUT = 8.0     # Segundos sem mensagens até um robô com batimento ser considerado morto
+STALL_TIMEOUT = 12.0      # Segundos com comando pendente e sem progresso até o robô ser considerado travado
+
+# -- Métricas (http://127.0.0.1:65433/metrics no formato do Prometheus, /metrics.json em JSON) --
+METRICS_HOST = '127.0.0.1'  # Só acesso local
+METRICS_PORT = 65433        # 0 desativa o endpoint
+METRICS_INTERVAL = 10.0     # Segundos entre snapshots JSON gravados com --metricas-json
 
 # -- Variáveis Globais --
+# Todo o estado abaixo é acessado apenas pelo event loop do servidor.
+swarm = SwarmState()
+barrier = IterationBarrier()
 particulas: Dict[Tuple[str, int], Robot] = {}
-client_threads = []
+client_tasks = set()
 running = True
-start_pso = False
-global_best_pos = None
-global_best_val = float('inf')
-
-# --- Função Objetiva ---
-def objective_function(x, y):
-    target_x, target_y = 1, 3
-    return np.sqrt((x - target_x)**2 + (y - target_y)**2)
-
-# --- Threads de Rede ---
-def listen_for_discovery():
-    with socket(AF_INET, SOCK_DGRAM) as s:
-        s.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
-        s.bind((HOST, UDP_PORT))
-        s.settimeout(1.0)
+start_pso = False    # False antes do primeiro 'pso' e durante um 'pso_pause'
+run_started = False  # True desde o primeiro 'pso'/'pso_async': a partir daí pso_mode não muda mais
+pso_mode = PSO_MODE
+run_stats: Optional[RunStats] = None
+objective = objective_function  # Pode ser trocada na inicialização com --objetivo
+occupancy = OccupancyGrid(BOUNDS)  # Obstáculos reportados pelos robôs
+planner = RoutePlanner(occupancy)  # Rotas livres de obstáculos, com cache por versão do mapa
+scheduler = ReservationScheduler(occupancy, planner)  # Evita dois robôs na mesma casa ao mesmo tempo
+goals: Dict[Tuple[str, int], Tuple[int, int]] = {}  # Casa para onde cada robô foi mandado por último
+# Partículas de robôs desconectados, por ID: continuam no enxame (com P-Best e velocidade)
+# até o robô voltar ou o GRACE_PERIOD acabar
+detached: Dict[str, Tuple[int, asyncio.TimerHandle]] = {}
+liveness = LivenessTracker(SILENCE_TIMEOUT, STALL_TIMEOUT)  # Robôs mortos ou travados
+# Alvos que robôs mortos não alcançaram, esperando um robô ocioso: (ID, índice da partícula, casa)
+orphans: Deque[Tuple[str, int, Tuple[int, int]]] = deque()
+handoffs: Dict[Tuple[str, int], Tuple[str, int]] = {}  # Robô ajudante -> (ID, índice) da partícula avaliada por ele
+start_poses: Dict[str, Tuple[int, int, str]] = {}  # ID -> (x, y, direção) mandada com 'inicio' antes do PSO (--inicio)
+max_iterations = MAX_ITERATIONS  # Pode ser trocado na inicialização com --iteracoes
+schedule = make_schedule()       # W, C1 e C2 de cada iteração (--coeficientes)
+stopping = StoppingCriteria()    # Parada antecipada (--alvo, --paciencia, --diametro)
+
+# Métricas: atualizadas no event loop, lidas pelo endpoint e pelos snapshots
+registry = metrics.Registry()
+metric_iteration = registry.histogram('pso_iteration_seconds', "Duração de uma iteração síncrona")
+metric_phase = registry.histogram('pso_iteration_phase_seconds', "Tempo de cada fase da iteração síncrona", ('phase',))
+metric_latency = registry.histogram('robot_command_latency_seconds',
+                                    "Tempo entre o envio do comando e o 'pos' do robô", ('robot',))
+metric_bytes = registry.counter('net_bytes_total', "Bytes trocados com os robôs", ('direction',))
+metric_messages = registry.counter('net_messages_total', "Mensagens trocadas com os robôs", ('direction', 'kind'))
+metric_robots = registry.gauge('robots_connected', "Robôs conectados")
+metric_detached = registry.gauge('robots_detached', "Robôs desconectados aguardando reconexão")
+metric_resumes = registry.counter('robot_resumes_total', "Reconexões que recuperaram a partícula do robô")
+metric_dead = registry.counter('robots_dead_total', "Robôs derrubados sem batimento ou sem progresso")
+metric_reassigned = registry.counter('pso_reassigned_targets_total', "Alvos de robôs mortos reatribuídos a robôs ociosos")
+metric_evaluations = registry.counter('pso_evaluations_total', "Posições confirmadas e avaliadas pelo PSO")
+metric_gbest = registry.gauge('pso_gbest_value', "G-Best atual")
+metric_gbest_improvements = registry.counter('pso_gbest_improvements_total', "Novos G-Best encontrados")
+bytes_in, bytes_out = metric_bytes.labels('in'), metric_bytes.labels('out')
+command_sent_at: Dict[Tuple[str, int], float] = {}  # Envio do último comando ainda sem 'pos'
+gbest_history = []  # (segundos desde o início do PSO, G-Best) a cada melhora
+metrics_port = METRICS_PORT           # --metricas-porta
+metrics_json: Optional[str] = None    # --metricas-json: arquivo do snapshot periódico
+tracer = Tracer('servidor')           # Linha do tempo (ligada com --trace)
+trace_path: Optional[str] = None      # --trace: arquivo gravado no 'trace' e ao desligar
+run_log_path: Optional[str] = None    # --log-execucao: log binário de cada iteração
+run_log: Optional[RunLogWriter] = None
+objective_name = OBJECTIVE
+last_messages: Dict[Tuple[str, int], list] = {}  # Último comando enviado a cada robô (para o log)
+
+# Eventos do loop (criados em main(), dentro do loop em execução)
+start_event: Optional[asyncio.Event] = None
+stop_event: Optional[asyncio.Event] = None
+
+# -- Estado do Modo Assíncrono --
+async_remaining = 0  # Comandos 'ir' que ainda podem ser despachados
+async_swarm_size = 1  # Robôs no início da execução assíncrona: divisor fixo da iteração equivalente
+parked: Dict[Tuple[str, int], Robot] = {}  # Robôs que confirmaram a posição durante um 'pso_pause'
+async_done: Optional[asyncio.Event] = None
+
+def travel_deadline(start, *waypoints) -> float:
+    """Prazo (s) para um robô ir de `start` passando por `waypoints`, andando em L pela grade."""
+    deadline = MARGEM_PRAZO
+    for target in waypoints:
+        dx, dy = abs(target[0] - start[0]), abs(target[1] - start[1])
+        turns = 2 * ((dx > 0) + (dy > 0))  # até dois giros de 90° para cada eixo percorrido
+        deadline += (dx + dy) * SEGUNDOS_POR_CASA + turns * SEGUNDOS_POR_GIRO
+        start = target
+    return min(deadline, PSO_ITERATION_INTERVAL)
+
+def shutdown():
+    """Sinaliza o encerramento do servidor; todas as tarefas acordam imediatamente."""
+    global running
+    running = False
+    stop_event.set()
+
+# --- Rede (um único event loop para descoberta, conexões e comandos) ---
+class DiscoveryProtocol(asyncio.DatagramProtocol):
+    """Responde aos broadcasts UDP de descoberta dos robôs."""
+    def connection_made(self, transport):
+        self.transport = transport
         print(f"[DISCOVERY] Escutando por broadcasts na porta UDP {UDP_PORT}")
-        while running:
-            try:
-                data, addr = s.recvfrom(1024)
-                if data == DISCOVERY_REQUEST:
-                    print(f"[DISCOVERY] Recebido pedido de {addr}. Respondendo...")
-                    s.sendto(DISCOVERY_RESPONSE, addr)
-            except timeout:
-                continue
-            except Exception as e:
-                if running:
-                    print(f"[DISCOVERY] Erro: {e}")
-
-def handle_client(conn, addr):
+
+    def datagram_received(self, data, addr):
+        if data == DISCOVERY_REQUEST:
+            print(f"[DISCOVERY] Recebido pedido de {addr}. Respondendo...")
+            self.transport.sendto(DISCOVERY_RESPONSE, addr)
+
+    def error_received(self, exc):
+        if running:
+            print(f"[DISCOVERY] Erro: {exc}")
+
+async def listen_for_discovery():
+    sock = socket(AF_INET, SOCK_DGRAM)
+    sock.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
+    sock.bind((HOST, UDP_PORT))
+    transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(DiscoveryProtocol, sock=sock)
+    return transport
+
+async def handle_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    addr = writer.get_extra_info('peername')[:2]
     print(f"[NOVA CONEXÃO TCP] {addr} conectado.")
-    particulas[addr] = Robot((0,0), conn)
+    # Vaga provisória: trocada pela partícula antiga se o 'hello' trouxer o ID de um robô desconectado
+    robot = particulas[addr] = Robot(swarm.add((0, 0)), writer, swarm)
+    metric_robots.set(len(particulas))
+    task = asyncio.current_task()
+    client_tasks.add(task)
+    decoder = FrameDecoder()
     try:
         while running:
-            data = conn.recv(1024)
+            data = await reader.read(4096)
             if not data: break
-            message = data.decode('utf-8')
-            print(f"[{addr}] Enviou: {message}")
-            if message.startswith("pos:"):
-                try:
-                    parts = message.split(':')[1].split(';')
-                    x, y = int(parts[0]), int(parts[1])
-                    particulas[addr].update_position(x, y)
-                    print(f"[ATUALIZAÇÃO] Posição de {addr} confirmada em ({x},{y})")
-                except (ValueError, IndexError, KeyError) as e:
-                    print(f"[ERRO] Formato de mensagem de posição inválido de {addr}: {e}")
-            elif message == 'desligar':
+            bytes_in.inc(len(data))
+            messages = decoder.feed(data)
+            # A conexão pode ter sido substituída por uma nova do mesmo robô durante o processamento
+            if any(particulas.get(addr) is not robot or handle_message(addr, kind, value)
+                   for kind, value in messages):
                 break
+            await writer.drain()
+    except ProtocolError as e:
+        print(f"[ERRO] Mensagem inválida de {addr}: {e}")
     except ConnectionResetError:
         print(f"[CONEXÃO PERDIDA] {addr} desconectou abruptamente.")
     finally:
         print(f"[FIM DA CONEXÃO] {addr} desconectado.")
-        if addr in particulas:
-            del particulas[addr]
-        conn.close()
+        if particulas.get(addr) is robot:
+            detach(addr, robot)
+        writer.close()
+        client_tasks.discard(task)
+
+def detach(addr, robot: Robot):
+    """
+    Desliga a conexão `addr` do PSO. A partícula de um robô com ID fica guardada por
+    GRACE_PERIOD segundos para ser recuperada numa reconexão; a de um robô sem ID é liberada.
+    """
+    barrier.discard(addr)
+    liveness.discard(addr)
+    if run_stats is not None:
+        run_stats.discard(addr)
+        check_async_done()
+    helping = handoffs.pop(addr, None)
+    if helping is not None and addr in goals:
+        orphans.append((*helping, goals[addr]))  # o alvo reatribuído volta para a fila
+    goals.pop(addr, None)
+    command_sent_at.pop(addr, None)
+    last_messages.pop(addr, None)
+    metric_latency.remove(robot_label(addr, robot))  # uma série por conexão; numa reconexão ela recomeça
+    del particulas[addr]
+    metric_robots.set(len(particulas))
+    if robot.robot_id is None or not running:
+        swarm.remove(robot.index)
+        return
+    timer = asyncio.get_running_loop().call_later(GRACE_PERIOD, expire, robot.robot_id)
+    detached[robot.robot_id] = (robot.index, timer)
+    metric_detached.set(len(detached))
+    print(f"[RECONEXÃO] Partícula de '{robot.robot_id}' guardada por {GRACE_PERIOD:.0f}s.")
+
+def expire(robot_id: str):
+    """Fim do prazo de reconexão: libera a partícula (o G-Best encontrado por ela é mantido)."""
+    entry = detached.pop(robot_id, None)
+    if entry is not None:
+        swarm.remove(entry[0])
+        metric_detached.set(len(detached))
+        print(f"[RECONEXÃO] '{robot_id}' não voltou em {GRACE_PERIOD:.0f}s; partícula liberada.")
 
+def attach(addr, robot: Robot, robot_id: str):
+    """
+    Associa o ID da saudação à conexão. Se o robô já tinha uma partícula (desconectado
+    dentro do prazo, ou numa conexão antiga cuja queda o servidor ainda não percebeu),
+    ela volta para ele com P-Best e velocidade.
+    """
+    robot.robot_id = robot_id
+    for old_addr, old in list(particulas.items()):
+        if old is not robot and old.robot_id == robot_id:
+            print(f"[RECONEXÃO] '{robot_id}' reconectou por {addr}; encerrando a conexão antiga {old_addr}.")
+            detach(old_addr, old)
+            old.conn.close()
+    entry = detached.pop(robot_id, None)
+    if entry is None:
+        return
+    index, timer = entry
+    timer.cancel()
+    swarm.remove(robot.index)  # devolve a vaga provisória
+    robot.index = index
+    metric_detached.set(len(detached))
+    metric_resumes.inc()
+    print(f"[RECONEXÃO] Partícula de '{robot_id}' recuperada (P-Best {robot.pbest_val:.2f}).")
+
+def send_start_pose(addr, robot: Robot):
+    """
+    Manda a pose de partida configurada para o ID do robô. Só antes do PSO começar:
+    no meio da execução, a posição do robô é a que ele confirmou.
+    """
+    pose = start_poses.get(robot.robot_id)
+    if pose is None or run_started:
+        return
+    robot.conn.write(encode(('inicio', pose)))
+    metric_messages.labels('out', 'inicio').inc()
+    print(f"[INÍCIO] '{robot.robot_id}' começa em ({pose[0]},{pose[1]}) virado para {pose[2]}.")
+
+def parse_start_pose(text: str) -> Tuple[str, Tuple[int, int, str]]:
+    """Converte 'ID=x,y,D' (D em N, L, S ou O) em (ID, (x, y, D))."""
+    robot_id, _, pose = text.partition('=')
+    x, y, heading = pose.split(',')
+    heading = heading.strip().upper()
+    if not robot_id or heading not in DIRECOES:
+        raise ValueError(f"pose inválida: '{text}' (use ID=x,y,N|L|S|O)")
+    return robot_id, (int(x), int(y), heading)
+
+def handle_message(addr, kind: str, value) -> bool:
+    """
+    Processa uma mensagem decodificada de um robô.
+
+    Returns:
+        bool: True se o robô pediu para encerrar a conexão.
+    """
+    robot = particulas[addr]
+    metric_messages.labels('in', kind).inc()
+    if kind == 'vivo':
+        liveness.heartbeat(addr, value)
+        return False
+    liveness.seen(addr)
+    print(f"[{addr}] Enviou: {kind} {value}")
+    if kind == 'hello':
+        attach(addr, robot, value)
+        send_start_pose(addr, robot)
+    elif kind == 'pos':
+        x, y = value
+        robot.update_position(x, y)
+        liveness.idle(addr)
+        print(f"[ATUALIZAÇÃO] Posição de {addr} confirmada em ({x},{y})")
+        sent = command_sent_at.pop(addr, None)
+        if sent is not None:
+            now = time.perf_counter()
+            label = robot_label(addr, robot)
+            metric_latency.labels(label).observe(now - sent)
+            metric_evaluations.inc()
+            tracer.complete('movimento', sent, now, label, pos=[x, y])
+        credit_handoff(addr, robot)
+        if run_started and pso_mode == 'async':
+            on_async_position(addr, robot)
+        else:
+            if run_stats is not None:
+                run_stats.ack(addr)
+            barrier.ack(addr)
+            if start_pso and orphans and addr in barrier.idle():
+                take_orphan(addr, robot)
+    elif kind in ('obstaculo', 'livre'):
+        update_map(value, kind == 'obstaculo')
+    elif kind == 'cmd' and value == 'desligar':
+        return True
+    return False
 
-# --- Thread de Comandos do Usuário ---
-def command_handler():
-    """Thread que lida com os comandos digitados pelo usuário no terminal."""
-    global running, start_pso
+def update_map(cell, blocked: bool):
+    """Aplica um obstáculo (ou casa liberada) ao mapa e, se o objetivo depende dele, reavalia os bests."""
+    cell = (int(cell[0]), int(cell[1]))
+    if not occupancy.set_obstacle(cell, blocked):
+        return
+    state = 'bloqueada' if blocked else 'liberada'
+    print(f"[MAPA] Casa {cell} {state} (versão {occupancy.version}, "
+          f"{occupancy.last_update_cells} casas recalculadas)")
+    if objective is occupancy:
+        swarm.reevaluate_bests(objective)
+        metric_gbest.set(swarm.gbest_val)
+        if run_stats is not None:
+            run_stats.gbest_val = swarm.gbest_val  # pode piorar: não conta como melhoria
 
+
+# --- Comandos do Usuário ---
+def handle_command(command: str):
+    """Executa um comando digitado no terminal (chamado dentro do event loop)."""
+    global start_pso, run_started, pso_mode, run_stats
+
+    if command.lower() in ('pso', 'pso_async'):
+        mode = 'async' if command.lower() == 'pso_async' else PSO_MODE
+        if start_pso:
+            print("[CONTROLE] O PSO já está em execução.")
+        elif not run_started:
+            pso_mode = mode
+            print(f"[CONTROLE] Comando '{command}' recebido. Iniciando o algoritmo (modo {pso_mode})...")
+            # Criado antes de acordar o PSO: um 'pos' que chegue antes da primeira iteração já o encontra
+            run_stats = RunStats(pso_mode)
+            run_started = start_pso = True
+            start_event.set()
+        elif mode != pso_mode:
+            resume = 'pso_async' if pso_mode == 'async' else 'pso'
+            print(f"[CONTROLE] A execução pausada é no modo {pso_mode}: use '{resume}' para retomá-la.")
+        else:
+            print(f"[CONTROLE] Retomando o algoritmo (modo {pso_mode}).")
+            start_pso = True
+            start_event.set()
+            if pso_mode == 'async':
+                resume_async()
+
+    elif command.lower() == 'pso_pause':
+        if start_pso:
+            print("[CONTROLE] Pausando algoritmo. Os robôs em movimento terminam; nenhum alvo novo até 'pso'.")
+            start_pso = False
+            start_event.clear()
+
+    elif command.lower() == 'list':
+        if not particulas:
+            print("\nNenhum robô conectado.")
+        else:
+            print("\n--- Robôs Conectados ---")
+            for addr, robot in particulas.items():
+                print(f"- Cliente: {addr} | {robot}")
+            print("------------------------\n")
+        for robot_id, (index, timer) in detached.items():
+            remaining = timer.when() - asyncio.get_running_loop().time()
+            print(f"- Desconectado: '{robot_id}' | posição {swarm.position[index].tolist()} | "
+                  f"aguardando mais {remaining:.0f}s")
+        for robot_id, _, target in orphans:
+            print(f"- Alvo {target} de '{robot_id}' aguardando um robô ocioso")
+
+    elif command.lower().startswith(('obstaculo ', 'livre ')):
+        try:
+            kind, x, y = command.split()
+            update_map((int(x), int(y)), kind.lower() == 'obstaculo')
+        except ValueError:
+            print("Uso: obstaculo <x> <y> | livre <x> <y>")
+
+    elif command.lower().startswith('inicio '):
+        try:
+            robot_id, pose = parse_start_pose(command.split(maxsplit=1)[1])
+        except ValueError:
+            print("Uso: inicio <ID>=<x>,<y>,<N|L|S|O>")
+            return
+        start_poses[robot_id] = pose
+        for addr, robot in particulas.items():
+            if robot.robot_id == robot_id:
+                send_start_pose(addr, robot)
+                break
+        else:
+            print(f"[INÍCIO] '{robot_id}' recebe a pose quando se conectar.")
+
+    elif command.lower() == 'mapa':
+        print(f"[MAPA] Versão {occupancy.version} | obstáculos: {occupancy.obstacles()} | "
+              f"rotas em cache: {planner.hits} acertos, {planner.misses} planejadas | "
+              f"escalonador: {scheduler.moved_goals} alvos trocados, {scheduler.waits} esperas, "
+              f"{scheduler.held} robôs parados")
+
+    elif command.lower() == 'trace':
+        dump_trace()
+
+    elif command.lower() == 'exit':
+        print("[CONTROLE] Comando 'exit' recebido. Encerrando o servidor...")
+        shutdown()
+
+    else:
+        print(f"Comando '{command}' desconhecido.")
+
+def dump_trace():
+    if trace_path is None:
+        print("[TRACE] Desligado: inicie o servidor com --trace arquivo.json")
+        return
+    print(f"[TRACE] {tracer.dump(trace_path)} eventos gravados em {trace_path} "
+          f"({tracer.dropped} descartados pelo buffer circular)")
+
+def command_reader(loop: asyncio.AbstractEventLoop):
+    """
+    Thread que lê o terminal. A leitura é bloqueante, então só ela fica aqui;
+    cada linha é repassada ao event loop. Lê direto do descritor (sem o buffer
+    do sys.stdin) para não travar o encerramento do interpretador.
+    """
+    stdin = sys.stdin.buffer.raw
     while running:
-        command = input("Comando [ pso | list | exit ] > ")
-        if not running:
+        print("Comando [ pso | pso_async | pso_pause | list | mapa | obstaculo x y | livre x y | inicio ID=x,y,D | trace | exit ] > ", end='', flush=True)
+        line = stdin.readline()
+        if not line or not running:
             break
-
-        if command.lower() == 'pso':
-            if not start_pso:
-                print("[CONTROLE] Comando 'pso' recebido. Iniciando o algoritmo...")
-                start_pso = True
-            else:
-                print("[CONTROLE] O PSO já está em execução.")
-
-        elif command.lower() == 'pso_pause':
-            if start_pso:
-                print("[CONTROLE] Pausando algoritmo. ")
-                start_pso = False
-
-        elif command.lower() == 'list':
-            if not particulas:
-                print("\nNenhum robô conectado.")
-            else:
-                print("\n--- Robôs Conectados ---")
-                for addr, robot in particulas.items():
-                    print(f"- Cliente: {addr} | {robot}")
-                print("------------------------\n")
-
-        elif command.lower() == 'exit':
-            print("[CONTROLE] Comando 'exit' recebido. Encerrando o servidor...")
-            running = False
+        try:
+            loop.call_soon_threadsafe(handle_command, line.decode('utf-8').strip())
+        except RuntimeError:  # loop já encerrado
             break
-        
-        else:
-            print(f"Comando '{command}' desconhecido.")
 
 
-# --- Thread do PSO (MODIFICADA) ---
-def pso_main_loop():
-    global running, global_best_pos, global_best_val
+# --- Funções Auxiliares do PSO ---
+def robot_label(addr, robot: Robot) -> str:
+    """Nome do robô nas métricas e no trace: o ID da saudação, ou ip:porta antes dela."""
+    return robot.robot_id or f"{addr[0]}:{addr[1]}"
 
-    # Esta parte está correta: a thread fica aqui esperando o comando 'pso'
-    print("[PSO] Thread iniciada. Aguardando comando 'pso' para começar...")
-    while not start_pso and running:
-        time.sleep(1)
+def robot_cell(robot: Robot) -> Tuple[int, int]:
+    return int(robot.position[0]), int(robot.position[1])
 
-    if not running: return
-    print(f"[PSO] {len(particulas)} robôs conectados. Iniciando o algoritmo!")
+def occupied_cells(exclude) -> set:
+    """
+    Casas reservadas pelos robôs fora de `exclude`: o último alvo de cada um, ou a posição
+    atual. Robôs desconectados continuam parados na última posição e também contam.
+    """
+    cells = {goals.get(addr, robot_cell(robot)) for addr, robot in particulas.items() if addr not in exclude}
+    cells.update((int(swarm.position[i][0]), int(swarm.position[i][1])) for i, _ in detached.values())
+    return cells
+
+def schedule_moves(robots, targets) -> list:
+    """
+    Passa os alvos do PSO pelo escalonador de reservas e devolve, para cada
+    robô, as mensagens de movimento e o prazo da barreira.
+    """
+    starts = [robot_cell(robot) for _, robot in robots]
+    assignments = scheduler.schedule(starts, targets, occupied_cells({addr for addr, _ in robots}))
+    moves = []
+    for (addr, _), start, assignment in zip(robots, starts, assignments):
+        goals[addr] = assignment.goal
+        moves.append(move_messages(start, assignment))
+    return moves
 
-    for iteration in range(MAX_ITERATIONS):
+def move_messages(start, assignment: Assignment) -> Tuple[list, float]:
+    """Mensagens ('espera' opcional, depois 'rota' ou 'ir') e prazo de um Assignment."""
+    wait = assignment.wait * TICK_SECONDS
+    messages = [('espera', wait * 1000)] if assignment.wait else []
+    if assignment.waypoints:
+        messages.append(('rota', assignment.waypoints))
+    else:
+        messages.append(('ir', assignment.goal))  # fica parado: só confirma a posição
+    deadline = travel_deadline(start, *assignment.waypoints) + wait
+    return messages, min(deadline, PSO_ITERATION_INTERVAL)
+
+def send_target(addr, robot: Robot, messages) -> bool:
+    """
+    Enfileira os comandos de movimento do robô num único frame e marca o início do movimento.
+    A escrita não bloqueia; quem chama faz o drain de todas as conexões de uma vez.
+    """
+    command = encode(*messages)
+    if run_stats is not None:
+        run_stats.command_sent(addr)
+    command_sent_at[addr] = time.perf_counter()
+    last_messages[addr] = messages
+    liveness.busy(addr, dict(messages).get('espera', 0) / 1000)
+    if tracer.enabled:
+        tracer.instant('comando', robot_label(addr, robot), mensagens=[kind for kind, _ in messages],
+                       alvo=list(goals.get(addr, robot_cell(robot))))
+    try:
+        robot.conn.write(command)
+        bytes_out.inc(len(command))
+        for kind, _ in messages:
+            metric_messages.labels('out', kind).inc()
+        return True
+    except Exception as e:
+        print(f"[PSO] Erro ao enviar comando para {addr}: {e}")
+        if run_stats is not None:
+            run_stats.discard(addr)
+        return False
+
+async def drain_all(robots):
+    """Espera, concorrentemente, o envio dos comandos enfileirados para `robots`."""
+    results = await asyncio.gather(*(robot.conn.drain() for _, robot in robots), return_exceptions=True)
+    for (addr, _), result in zip(robots, results):
+        if isinstance(result, Exception):
+            print(f"[PSO] Erro ao enviar comando para {addr}: {result}")
+
+def report_bests(robots, improved_idx, gbest_idx):
+    """Mostra os novos P-Best/G-Best de uma atualização do enxame."""
+    addr_by_index = {robot.index: addr for addr, robot in robots}
+    for i in improved_idx:
+        print(f"[PSO] Novo P-Best para {addr_by_index[i]}: {swarm.pbest_val[i]:.2f}")
+    if gbest_idx is not None:
+        if run_stats is not None:
+            run_stats.gbest(swarm.gbest_val)
+            gbest_history.append((time.monotonic() - run_stats.start, swarm.gbest_val))
+        metric_gbest.set(swarm.gbest_val)
+        metric_gbest_improvements.inc()
+        print(f"--- [PSO] NOVO G-BEST GLOBAL ENCONTRADO POR {addr_by_index[gbest_idx]}! Valor: {swarm.gbest_val:.2f} ---")
+
+
+def log_round(iteration: int, robots, acked, stragglers, improved_idx, gbest_idx):
+    """Grava no log binário o estado e o último comando de `robots` ao fim de uma iteração."""
+    idx = np.array([robot.index for _, robot in robots], dtype=int)
+    flags = np.array([(ACKED if addr in acked else 0) | (STRAGGLER if addr in stragglers else 0)
+                      for addr, _ in robots], dtype=np.uint8)
+    flags[np.isin(idx, improved_idx)] |= PBEST
+    if gbest_idx is not None:
+        flags[idx == gbest_idx] |= GBEST
+    targets, waits, waypoints = [], [], []
+    for addr, robot in robots:
+        messages = dict(last_messages.get(addr, ()))
+        targets.append(goals.get(addr, robot_cell(robot)))
+        waits.append(messages.get('espera', 0) / 1000)
+        waypoints.append(len(messages.get('rota', ())))
+    run_log.write(iteration, swarm, idx, [robot_label(addr, robot) for addr, robot in robots],
+                  np.array(targets).reshape(-1, 2), flags, np.array(waits), np.array(waypoints))
+
+# --- Vivacidade e Reatribuição ---
+async def watch_liveness():
+    """Manda o batimento do servidor a cada HEARTBEAT_INTERVAL e derruba os robôs mortos ou travados."""
+    frame = encode(('vivo', 0))
+    while True:
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        for robot in particulas.values():
+            robot.conn.write(frame)  # os robôs usam o silêncio do servidor para detectar uma conexão morta
+        bytes_out.inc(len(frame) * len(particulas))
+        for addr, reason in liveness.dead():
+            robot = particulas.get(addr)
+            if robot is not None:
+                declare_dead(addr, robot, reason)
+
+def declare_dead(addr, robot: Robot, reason: str):
+    """
+    Desliga um robô morto ou travado. A partícula fica guardada como numa queda de
+    conexão, e o alvo que ele não alcançou vai para o próximo robô ocioso.
+    """
+    label = robot_label(addr, robot)
+    print(f"[VIVACIDADE] Robô {label} considerado morto: {reason}.")
+    metric_dead.inc()
+    tracer.instant('morto', label, motivo=reason)
+    # Um ajudante devolve à fila o alvo que recebeu (em detach), não um alvo da própria partícula
+    pending = addr in command_sent_at and addr in goals and addr not in handoffs
+    target = goals.get(addr)
+    detach(addr, robot)
+    robot.conn.close()
+    if run_started and pending and robot.robot_id in detached:
+        orphans.append((robot.robot_id, robot.index, target))
+        print(f"[VIVACIDADE] Alvo {target} de '{robot.robot_id}' aguardando um robô ocioso.")
+    if start_pso and pso_mode == 'sync':
+        for idle_addr in barrier.idle():
+            if not orphans:
+                break
+            take_orphan(idle_addr, particulas[idle_addr])
+
+def take_orphan(addr, robot: Robot) -> bool:
+    """
+    Manda o robô ocioso `addr` ao alvo pendente mais antigo de um robô morto.
+
+    Returns:
+        bool: True se o robô recebeu um alvo.
+    """
+    while orphans:
+        robot_id, index, target = orphans.popleft()
+        if detached.get(robot_id, (None,))[0] != index:
+            continue  # o robô voltou (e recebe um alvo novo) ou a partícula expirou
+        if pso_mode == 'sync':
+            # A posição atual do ajudante é avaliada antes de ele sair
+            improved_idx, gbest_idx = swarm.update_bests(objective, np.array([robot.index]))
+            report_bests([(addr, robot)], improved_idx, gbest_idx)
+        [(messages, deadline)] = schedule_moves([(addr, robot)], np.array([target]))
+        handoffs[addr] = (robot_id, index)
+        if pso_mode == 'sync':
+            barrier.extend(addr, deadline)
+        send_target(addr, robot, messages)
+        metric_reassigned.inc()
+        print(f"[VIVACIDADE] Alvo {target} de '{robot_id}' reatribuído a {robot_label(addr, robot)}.")
+        return True
+    return False
+
+def credit_handoff(addr, robot: Robot):
+    """Se `addr` foi avaliar o alvo de um robô morto, a avaliação também vale para a partícula dele."""
+    entry = handoffs.pop(addr, None)
+    if entry is None:
+        return
+    robot_id, index = entry
+    if detached.get(robot_id, (None,))[0] != index:
+        return
+    with swarm.lock:
+        # Avalia a casa do ajudante na partícula do robô morto, que continua parado onde estava
+        cell = swarm.position[index].copy()
+        swarm.position[index] = robot.position
+        improved_idx, gbest_idx = swarm.update_bests(objective, np.array([index]))
+        swarm.position[index] = cell
+    report_bests([(f"'{robot_id}' (avaliado por {robot_label(addr, robot)})", Robot(index, None, swarm, robot_id))],
+                 improved_idx, gbest_idx)
+
+# --- Modo Assíncrono ---
+def dispatch_async(addr, robot: Robot):
+    """Calcula o próximo alvo de um único robô e o despacha imediatamente."""
+    global async_remaining
+    if async_remaining <= 0:
+        return
+    async_remaining -= 1
+    w, c1, c2 = schedule(async_iteration(), max_iterations)
+    target = swarm.step(w, c1, c2, BOUNDS, np.array([robot.index]))
+    [(messages, _)] = schedule_moves([(addr, robot)], target)
+    send_target(addr, robot, messages)
+
+def async_iteration() -> int:
+    """
+    Iteração equivalente do modo assíncrono: avaliações já feitas / robôs no início.
+    Nunca diminui, mesmo quando robôs entram ou se reconectam (o log depende disso).
+    """
+    return run_stats.evaluations // async_swarm_size
+
+def check_stop() -> Optional[str]:
+    """Aplica os critérios de parada ao enxame atual."""
+    return stopping.check(swarm.gbest_val, swarm.position[swarm.indices()])
+
+def check_async_done():
+    """Encerra a execução assíncrona quando o orçamento acabou e não há movimentos pendentes."""
+    if run_started and pso_mode == 'async' and async_remaining <= 0 and run_stats.in_flight() == 0:
+        async_done.set()
+
+def on_async_position(addr, robot: Robot):
+    """
+    Chamado por handle_client a cada 'pos:' no modo assíncrono: avalia o robô,
+    atualiza P-Best e G-Best na hora e já envia o próximo alvo.
+    """
+    global async_remaining
+    if run_stats.ack(addr):
+        improved_idx, gbest_idx = swarm.update_bests(objective, np.array([robot.index]))
+        report_bests([(addr, robot)], improved_idx, gbest_idx)
+        if run_log is not None:
+            log_round(async_iteration(), [(addr, robot)], {addr}, (), improved_idx, gbest_idx)
+        # Critérios de parada uma vez por iteração equivalente; os robôs em movimento terminam normalmente
+        if async_remaining > 0 and run_stats.evaluations % async_swarm_size == 0:
+            reason = check_stop()
+            if reason:
+                print(f"[PSO] Parada antecipada na iteração {async_iteration()}: {reason}.")
+                async_remaining = 0
+    if not start_pso:
+        parked[addr] = robot  # despachado quando o 'pso' retomar a execução
+    elif not take_orphan(addr, robot):
+        dispatch_async(addr, robot)
+    check_async_done()
+
+def resume_async():
+    """Despacha os robôs que ficaram parados durante o 'pso_pause'."""
+    robots = [(addr, robot) for addr, robot in parked.items() if particulas.get(addr) is robot]
+    parked.clear()
+    for addr, robot in robots:
+        if not take_orphan(addr, robot):
+            dispatch_async(addr, robot)
+    check_async_done()
+
+async def run_async():
+    global async_remaining, async_swarm_size
+    robots = list(particulas.items())
+    async_swarm_size = max(1, len(robots))
+    # Mesmo orçamento de avaliações do modo síncrono
+    async_remaining = max_iterations * len(robots)
+    async_done.clear()
+    for addr, robot in robots:
+        dispatch_async(addr, robot)
+    await drain_all(robots)
+    print("[PSO] Modo assíncrono: comandos iniciais enviados. Cada robô segue no seu ritmo...")
+    check_async_done()
+    await async_done.wait()
+
+
+# --- Modo Síncrono ---
+async def sync_iteration(iteration: int):
+    """Uma iteração síncrona: calcula e envia os alvos, espera a barreira e atualiza os bests."""
+    # 1. Calcular o próximo alvo de todos os robôs de uma vez, passar pelo escalonador
+    #    de reservas e enviar os comandos. Retardatários da rodada anterior ainda estão
+    #    se movendo e ficam de fora (suas casas contam como ocupadas).
+    started = time.perf_counter()
+    robots = [(addr, robot) for addr, robot in particulas.items() if not barrier.is_outstanding(addr)]
+    idx = np.array([robot.index for _, robot in robots], dtype=int)
+    w, c1, c2 = schedule(iteration, max_iterations)
+    targets = swarm.step(w, c1, c2, BOUNDS, idx)
+
+    messages, deadlines = {}, {}
+    for (addr, _), (msgs, deadline) in zip(robots, schedule_moves(robots, targets)):
+        messages[addr], deadlines[addr] = msgs, deadline
+    barrier.begin(deadlines)
+    planned = time.perf_counter()
+    metric_phase.labels('planejar').observe(planned - started)
+    tracer.complete('planejar', started, planned, 'pso', robos=len(robots))
+
+    for addr, robot in robots:
+        if not send_target(addr, robot, messages[addr]):
+            barrier.discard(addr)
+    await drain_all(robots)
+    sent = time.perf_counter()
+    metric_phase.labels('enviar').observe(sent - planned)
+    tracer.complete('enviar', planned, sent, 'pso')
+
+    print("[PSO] Comandos enviados. Aguardando movimentos...")
+    acked, stragglers = await barrier.wait()
+    waited = time.perf_counter()
+    metric_phase.labels('barreira').observe(waited - sent)
+    tracer.complete('barreira', sent, waited, 'pso', confirmados=len(acked), atrasados=len(stragglers))
+    print(f"[PSO] {len(acked)}/{len(robots)} robôs confirmaram em {waited - sent:.1f}s.")
+    for addr in stragglers:
+        print(f"[PSO] Robô {addr} não confirmou no prazo e ficou fora desta iteração.")
+
+    # 3. Atualizar P-Best e G-Best (somente robôs que confirmaram a posição)
+    connected = [(addr, robot) for addr, robot in robots if particulas.get(addr) is robot]
+    robots = [(addr, robot) for addr, robot in connected if addr in acked]
+    idx = np.array([robot.index for _, robot in robots], dtype=int)
+    improved_idx, gbest_idx = swarm.update_bests(objective, idx)
+    report_bests(robots, improved_idx, gbest_idx)
+    if run_log is not None:
+        log_round(iteration + 1, connected, acked, stragglers, improved_idx, gbest_idx)
+    finished = time.perf_counter()
+    metric_phase.labels('atualizar').observe(finished - waited)
+    metric_iteration.observe(finished - started)
+    tracer.complete('atualizar', waited, finished, 'pso', gbest=swarm.gbest_val)
+    tracer.complete(f"iteração {iteration + 1}", started, finished, 'iterações')
+
+async def run_sync():
+    for iteration in range(max_iterations):
         if not running: break
-        print(f"\n--- [PSO] ITERAÇÃO {iteration + 1}/{MAX_ITERATIONS} ---")
-
-        # 1. Para cada robô, calcular o próximo alvo e enviar o comando
-        for addr, robot in list(particulas.items()):
-            r1, r2 = np.random.random(2), np.random.random(2)
-            
-            ## CALCULO VETORIAIS
-            cognitive_vel = C1 * r1 * (robot.pbest_pos - robot.position)
-            social_vel = C2 * r2 * (global_best_pos - robot.position) if global_best_pos is not None else 0
-            robot.velocity = W * robot.velocity + cognitive_vel + social_vel
-            
-            target_pos = robot.position + robot.velocity
-            target_pos[0] = np.clip(target_pos[0], BOUNDS[0][0], BOUNDS[0][1])
-            target_pos[1] = np.clip(target_pos[1], BOUNDS[1][0], BOUNDS[1][1])
-
-            command = f"ir:{int(target_pos[0])};{int(target_pos[1])}"
-            try:
-                robot.conn.sendall(command.encode('utf-8'))
-            except Exception as e:
-                print(f"[PSO] Erro ao enviar comando para {addr}: {e}")
-        
-        print("[PSO] Comandos enviados. Aguardando movimentos...")
-        time.sleep(PSO_ITERATION_INTERVAL) 
-        
-        # 3. Atualizar P-Best e G-Best
-        for addr, robot in list(particulas.items()):
-            robot.fitness = objective_function(robot.position[0], robot.position[1])
-
-            if robot.fitness < robot.pbest_val:
-                robot.pbest_val = robot.fitness
-                robot.pbest_pos = robot.position
-                print(f"[PSO] Novo P-Best para {addr}: {robot.pbest_val:.2f}")
-
-            if robot.fitness < global_best_val:
-                global_best_val = robot.fitness
-                global_best_pos = robot.position
-                print(f"--- [PSO] NOVO G-BEST GLOBAL ENCONTRADO POR {addr}! Valor: {global_best_val:.2f} ---")
-        
-    
-    if running:
-        print("\n[PSO] Algoritmo finalizado!")
-        running = False
+        if not start_event.is_set():
+            print("[PSO] Pausado. Aguardando 'pso' para continuar...")
+            await start_event.wait()
+        print(f"\n--- [PSO] ITERAÇÃO {iteration + 1}/{max_iterations} ---")
+        await sync_iteration(iteration)
+        reason = check_stop()
+        if reason:
+            print(f"[PSO] Parada antecipada na iteração {iteration + 1}: {reason}.")
+            break
 
 
-# --- Lógica Principal do Servidor ---
-if __name__ == "__main__":
-    discovery_thread = threading.Thread(target=listen_for_discovery, daemon=True)
-    discovery_thread.start()
+# --- Tarefa do PSO ---
+async def pso_main_loop():
+    global run_log
 
-    pso_thread = threading.Thread(target=pso_main_loop)
-    pso_thread.start()
+    print("[PSO] Aguardando comando 'pso' para começar...")
+    await start_event.wait()
 
-    command_thread = threading.Thread(target=command_handler)
-    command_thread.start()
+    print(f"[PSO] {len(particulas)} robôs conectados. Iniciando o algoritmo!")
+
+    run_stats.gbest_val = swarm.gbest_val  # G-Best anterior ao início (ex.: mapa já reavaliado)
+    stopping.reset(swarm.gbest_val)
+    metric_gbest.set(swarm.gbest_val)
+    gbest_history.clear()
+    if run_log_path is not None:
+        run_log = RunLogWriter(run_log_path, mode=pso_mode, objective=objective_name, bounds=BOUNDS,
+                               max_iterations=max_iterations, robots=len(particulas))
+        print(f"[LOG] Gravando a execução em {run_log_path}")
+    if stopping.reached(swarm.gbest_val):
+        print(f"[PSO] G-Best {swarm.gbest_val:.2f} já atinge o alvo na saudação: nenhuma iteração necessária.")
+    elif pso_mode == 'async':
+        await run_async()
+    else:
+        await run_sync()
+    run_stats.finish()
+    print(run_stats.report())
+    if run_log is not None:
+        run_log.close()
+        print(f"[LOG] {run_log.records} registros gravados em {run_log_path}")
+
+    print("\n[PSO] Algoritmo finalizado!")
+    shutdown()
 
-    server_socket = socket(AF_INET, SOCK_STREAM)
-    server_socket.bind((HOST, TCP_PORT))
-    server_socket.listen()
 
+# --- Lógica Principal do Servidor ---
+async def main():
+    global start_event, stop_event, async_done
+    start_event, stop_event, async_done = asyncio.Event(), asyncio.Event(), asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    discovery_transport = await listen_for_discovery()
+    server = await asyncio.start_server(handle_client, HOST, TCP_PORT)
     print(f"[ESCUTANDO TCP] Servidor está escutando em {HOST}:{TCP_PORT}")
-    server_socket.settimeout(1.0)
+
+    extra = lambda: {'gbest_history': gbest_history}
+    metrics_server = None
+    if metrics_port:
+        metrics_server = await metrics.serve(registry, METRICS_HOST, metrics_port, extra)
+        print(f"[MÉTRICAS] http://{METRICS_HOST}:{metrics_port}/metrics (Prometheus) e /metrics.json")
+    snapshot_task = None
+    if metrics_json:
+        snapshot_task = asyncio.create_task(metrics.write_snapshots(registry, metrics_json, METRICS_INTERVAL, extra))
+
+    pso_task = asyncio.create_task(pso_main_loop())
+    liveness_task = asyncio.create_task(watch_liveness())
+    threading.Thread(target=command_reader, args=(loop,), daemon=True).start()
 
     try:
-        while running:
-            try:
-                conn, addr = server_socket.accept()
-                thread = threading.Thread(target=handle_client, args=(conn, addr))
-                thread.daemon = True
-                thread.start()
-                client_threads.append(thread)
-            except timeout:
-                continue
-    except KeyboardInterrupt:
-        print("\n[INTERRUPÇÃO] Recebido Ctrl+C. Desligando...")
-        running = False
+        await stop_event.wait()
     finally:
         print("[DESLIGANDO] Fechando o servidor...")
+        pso_task.cancel()
+        liveness_task.cancel()
+        server.close()
+        discovery_transport.close()
+        if metrics_server is not None:
+            metrics_server.close()
+        if snapshot_task is not None:
+            snapshot_task.cancel()
+            metrics.write_snapshot(registry, metrics_json, extra)  # estado final da execução
         for robot in list(particulas.values()):
             try:
-                robot.conn.sendall(b'desligar')
-                robot.conn.close()
+                robot.conn.write(encode(('cmd', 'desligar')))
             except Exception:
                 pass
-        
-        pso_thread.join(timeout=2.0)
-        command_thread.join(timeout=1.0) 
-        server_socket.close()
-        print("[FINALIZADO] Servidor desligado.")
\ No newline at end of file
+        await drain_all(list(particulas.items()))
+        for robot in list(particulas.values()):
+            robot.conn.close()
+        await asyncio.gather(*client_tasks, return_exceptions=True)
+        await server.wait_closed()
+        if trace_path is not None:
+            dump_trace()
+        print("[FINALIZADO] Servidor desligado.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor PSO dos robôs EV3.")
+    parser.add_argument('--objetivo', choices=objectives.available(), default=OBJECTIVE,
+                        help="Função objetivo do PSO")
+    parser.add_argument('--discreto', choices=DISCRETE_MODES, default=DISCRETE_MODE,
+                        help="Conversão dos alvos do PSO em casas (padrão: truncamento com int())")
+    parser.add_argument('--iteracoes', type=int, default=MAX_ITERATIONS, help="Máximo de iterações")
+    parser.add_argument('--coeficientes', choices=SCHEDULES, default=SCHEDULE,
+                        help="Agenda de W, C1 e C2 ao longo das iterações")
+    parser.add_argument('--alvo', type=optional_value(float), default=TARGET_FITNESS,
+                        help="Parar quando o G-Best chegar a este valor ('nenhum' desativa)")
+    parser.add_argument('--paciencia', type=optional_value(int), default=PATIENCE,
+                        help="Parar após este número de iterações sem melhora do G-Best")
+    parser.add_argument('--diametro', type=optional_value(float), default=MIN_DIAMETER,
+                        help="Parar quando o enxame couber numa caixa de diagonal menor que esta (em casas)")
+    parser.add_argument('--metricas-porta', type=int, default=METRICS_PORT,
+                        help="Porta local do endpoint de métricas (0 desativa)")
+    parser.add_argument('--metricas-json', default=None,
+                        help=f"Gravar um snapshot JSON das métricas neste arquivo a cada {METRICS_INTERVAL:.0f}s")
+    parser.add_argument('--trace', default=None,
+                        help="Registrar a linha do tempo (formato de trace do Chrome) e gravá-la neste arquivo")
+    parser.add_argument('--trace-capacidade', type=int, default=TRACE_CAPACITY,
+                        help="Eventos guardados no buffer circular do trace")
+    parser.add_argument('--log-execucao', default=None,
+                        help="Gravar posições, velocidades, bests e comandos de cada iteração neste arquivo binário")
+    parser.add_argument('--inicio', action='append', type=parse_start_pose, default=[], metavar='ID=x,y,D',
+                        help="Pose de partida mandada ao robô com este ID quando ele se conectar (repetível)")
+    args = parser.parse_args()
+    start_poses.update(args.inicio)
+    metrics_port, metrics_json = args.metricas_porta, args.metricas_json
+    run_log_path, objective_name = args.log_execucao, args.objetivo
+    if args.trace:
+        trace_path = args.trace
+        tracer.enable(args.trace_capacidade)
+    objective = objectives.make_objective(args.objetivo, BOUNDS, occupancy=occupancy)
+    swarm.discretizer = make_discretizer(args.discreto, BOUNDS, swarm.rng)
+    max_iterations = args.iteracoes
+    schedule = make_schedule(args.coeficientes)
+    stopping = StoppingCriteria(args.alvo, args.paciencia, args.diametro)
+    print(f"[PSO] Função objetivo: {args.objetivo} | alvos: {args.discreto or 'truncados'} | "
+          f"coeficientes: {args.coeficientes} | até {max_iterations} iterações")
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n[INTERRUPÇÃO] Recebido Ctrl+C. Servidor desligado.")
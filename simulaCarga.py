@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Gerador de carga: N robôs simulados em um único processo, falando o
+protocolo real (descoberta UDP + frames TCP) com o server.py.
+
+Cada robô usa o modelo de movimento do simulaConn.py (RoboSimulado) e
+pode ter latência de movimento, jitter, perda de comandos (o robô
+"trava" e nunca confirma, mas continua mandando batimentos sem progresso,
+como um EV3 com a roda patinando) e tempestades de reconexão. Ao final são
+reportadas as latências comando->confirmação e confirmação->próximo
+comando de cada robô e a vazão observada do servidor.
+
+Uso:
+    python simulaCarga.py --robos 200 --duracao 60 --escala 0.1 --jitter 0.05 --json carga.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ev3.protocol import FrameDecoder, ProtocolError, encode
+from pso import BOUNDS
+from simulaConn import (BATIMENTO, DISCOVERY_REQUEST, DISCOVERY_RESPONSE, PASSO_PROGRESSO, TCP_PORT, UDP_PORT,
+                        RoboSimulado)
+
+
+class ConfigCarga:
+    """Parâmetros da carga simulada."""
+    def __init__(self, escala: float = 1.0, latencia: Optional[float] = None, jitter: float = 0.0,
+                 perda: float = 0.0, reconexao_max: float = 1.0, servidor: Optional[str] = None,
+                 porta: int = TCP_PORT, porta_udp: int = UDP_PORT, batimento: float = BATIMENTO):
+        """
+        Args:
+            escala (float): Fator sobre o tempo do modelo de movimento (0 = instantâneo).
+            latencia (Optional[float]): Se definido, tempo fixo por movimento no lugar do modelo.
+            jitter (float): Desvio padrão (s) somado ao tempo de cada movimento.
+            perda (float): Probabilidade de um comando 'ir' nunca ser confirmado.
+            reconexao_max (float): Espera máxima (s) antes de reconectar após uma queda.
+            servidor (Optional[str]): IP do servidor; se None, usa a descoberta UDP.
+            batimento (float): Segundos entre batimentos ('vivo'); 0 desliga (robô sem batimento).
+        """
+        self.escala = escala
+        self.latencia = latencia
+        self.jitter = jitter
+        self.perda = perda
+        self.reconexao_max = reconexao_max
+        self.servidor = servidor
+        self.porta = porta
+        self.porta_udp = porta_udp
+        self.batimento = batimento
+
+
+class EstatisticasCarga:
+    """Métricas coletadas por todos os robôs do processo."""
+    def __init__(self):
+        self.inicio = time.monotonic()
+        self.comando_ack: Dict[str, List[float]] = {}  # comando recebido -> 'pos' enviado
+        self.ack_comando: Dict[str, List[float]] = {}  # 'pos' enviado -> próximo comando
+        self.comandos = 0
+        self.acks = 0
+        self.perdidos = 0
+        self.conexoes = 0
+        self.quedas = 0
+        self.bytes_recebidos = 0
+        self.bytes_enviados = 0
+
+    def resumo(self) -> dict:
+        duracao = time.monotonic() - self.inicio
+
+        def percentis(series: Dict[str, List[float]]) -> dict:
+            valores = np.concatenate([np.asarray(v) for v in series.values() if v]) if any(series.values()) else np.array([])
+            if len(valores) == 0:
+                return {}
+            p50, p95, p99 = np.percentile(valores, [50, 95, 99])
+            return {'n': int(len(valores)), 'p50': float(p50), 'p95': float(p95),
+                    'p99': float(p99), 'max': float(valores.max())}
+
+        return {
+            'duracao_s': duracao,
+            'robos': len(self.comando_ack),
+            'conexoes': self.conexoes,
+            'quedas': self.quedas,
+            'comandos': self.comandos,
+            'acks': self.acks,
+            'comandos_perdidos': self.perdidos,
+            'comandos_por_s': self.comandos / duracao if duracao > 0 else 0.0,
+            'bytes_recebidos_por_s': self.bytes_recebidos / duracao if duracao > 0 else 0.0,
+            'bytes_enviados_por_s': self.bytes_enviados / duracao if duracao > 0 else 0.0,
+            'latencia_comando_ack_s': percentis(self.comando_ack),
+            'latencia_ack_comando_s': percentis(self.ack_comando),
+            'por_robo': {nome: {'comando_ack_medio_s': float(np.mean(v)) if v else None,
+                                'ack_comando_medio_s': float(np.mean(self.ack_comando[nome])) if self.ack_comando[nome] else None}
+                         for nome, v in self.comando_ack.items()},
+        }
+
+
+class _DescobertaProtocol(asyncio.DatagramProtocol):
+    def __init__(self, resposta: asyncio.Future):
+        self.resposta = resposta
+
+    def datagram_received(self, data, addr):
+        if data == DISCOVERY_RESPONSE and not self.resposta.done():
+            self.resposta.set_result(addr[0])
+
+async def descobrir_servidor(porta_udp: int = UDP_PORT, timeout: float = 2.0) -> str:
+    """Descobre o IP do servidor via broadcast UDP, tentando até obter resposta."""
+    loop = asyncio.get_running_loop()
+    while True:
+        resposta = loop.create_future()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _DescobertaProtocol(resposta), local_addr=('0.0.0.0', 0), allow_broadcast=True)
+        try:
+            transport.sendto(DISCOVERY_REQUEST, ('<broadcast>', porta_udp))
+            return await asyncio.wait_for(resposta, timeout)
+        except asyncio.TimeoutError:
+            continue
+        finally:
+            transport.close()
+
+
+class RoboCarga:
+    """Um robô simulado do gerador de carga (uma conexão TCP com reconexão)."""
+    def __init__(self, nome: str, config: ConfigCarga, stats: EstatisticasCarga, rng: random.Random):
+        self.nome = nome
+        self.config = config
+        self.stats = stats
+        self.rng = rng
+        self.robo = RoboSimulado((rng.randint(BOUNDS[0][0], BOUNDS[1][0]), rng.randint(BOUNDS[0][1], BOUNDS[1][1])))
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.progresso = 0  # contador mandado nos batimentos; só anda durante um movimento
+        self.stats.comando_ack[nome] = []
+        self.stats.ack_comando[nome] = []
+
+    def derrubar(self):
+        """Fecha a conexão atual (usado pelas tempestades de reconexão)."""
+        if self.writer is not None:
+            self.stats.quedas += 1
+            self.writer.close()
+
+    def _tempo_movimento(self, duracao_modelo: float) -> float:
+        base = self.config.latencia if self.config.latencia is not None else duracao_modelo * self.config.escala
+        if self.config.jitter:
+            base += self.rng.gauss(0.0, self.config.jitter)
+        return max(0.0, base)
+
+    def _enviar(self, frame: bytes):
+        self.stats.bytes_enviados += len(frame)
+        self.writer.write(frame)
+
+    async def _mover(self, tempo: float):
+        """Espera o movimento em passos curtos, contando progresso como o laço das rodas do robô real."""
+        fim = time.monotonic() + tempo
+        while True:
+            restante = fim - time.monotonic()
+            if restante <= 0:
+                return
+            await asyncio.sleep(min(restante, PASSO_PROGRESSO))
+            self.progresso += 1
+
+    async def _batimentos(self):
+        """Manda 'vivo' com o contador de progresso, como a thread de batimento do robô real."""
+        while True:
+            await asyncio.sleep(self.config.batimento)
+            self._enviar(encode(('vivo', self.progresso)))
+
+    async def executar(self, parar: asyncio.Event):
+        """Mantém o robô conectado até `parar`, reconectando após cada queda."""
+        while not parar.is_set():
+            try:
+                host = self.config.servidor or await descobrir_servidor(self.config.porta_udp)
+                await self._sessao(host, parar)
+            except (ConnectionError, OSError, ProtocolError):
+                pass
+            finally:
+                self.writer = None
+            if not parar.is_set():
+                await asyncio.sleep(self.rng.uniform(0, self.config.reconexao_max))
+
+    async def _sessao(self, host: str, parar: asyncio.Event):
+        reader, self.writer = await asyncio.open_connection(host, self.config.porta)
+        self.stats.conexoes += 1
+        self._enviar(encode(('hello', self.nome), ('pos', tuple(self.robo.posicao))))
+        decoder = FrameDecoder()
+        ultimo_ack: Optional[float] = None
+        batimentos = asyncio.create_task(self._batimentos()) if self.config.batimento > 0 else None
+        try:
+            while not parar.is_set():
+                data = await reader.read(4096)
+                if not data:
+                    return
+                self.stats.bytes_recebidos += len(data)
+                mensagens = decoder.feed(data)
+                for i, (tipo, valor) in enumerate(mensagens):
+                    recebido = time.monotonic()
+                    if tipo == 'cmd' and valor == 'desligar':
+                        return
+                    if tipo == 'espera':
+                        # Os giros iniciais do movimento seguinte são feitos durante a espera
+                        seguinte = mensagens[i + 1] if i + 1 < len(mensagens) else None
+                        giros = 0.0
+                        if seguinte is not None and seguinte[0] in ('ir', 'rota'):
+                            giros = self.robo.girar_para_rota([seguinte[1]] if seguinte[0] == 'ir' else seguinte[1])
+                        await asyncio.sleep(max(valor / 1000, giros) * self.config.escala)
+                        continue
+                    if tipo not in ('ir', 'rota'):
+                        continue
+                    self.stats.comandos += 1
+                    if ultimo_ack is not None:
+                        self.stats.ack_comando[self.nome].append(recebido - ultimo_ack)
+                        ultimo_ack = None
+                    if self.rng.random() < self.config.perda:
+                        self.stats.perdidos += 1
+                        continue
+                    duracao = self.robo.seguir_rota([valor] if tipo == 'ir' else valor)
+                    await self._mover(self._tempo_movimento(duracao))
+                    self._enviar(encode(('pos', tuple(self.robo.posicao))))
+                    await self.writer.drain()
+                    ultimo_ack = time.monotonic()
+                    self.stats.acks += 1
+                    self.stats.comando_ack[self.nome].append(ultimo_ack - recebido)
+        finally:
+            if batimentos is not None:
+                batimentos.cancel()
+            self.writer.close()
+
+
+async def tempestades(robos: List[RoboCarga], intervalo: float, fracao: float,
+                      rng: random.Random, parar: asyncio.Event):
+    """A cada `intervalo` segundos derruba ao mesmo tempo uma fração dos robôs conectados."""
+    while not parar.is_set():
+        try:
+            await asyncio.wait_for(parar.wait(), timeout=intervalo)
+            return
+        except asyncio.TimeoutError:
+            pass
+        conectados = [r for r in robos if r.writer is not None]
+        alvo = rng.sample(conectados, int(len(conectados) * fracao))
+        print(f"[CARGA] Tempestade de reconexão: derrubando {len(alvo)} robôs")
+        for robo in alvo:
+            robo.derrubar()
+
+
+async def gerar_carga(n_robos: int, duracao: float, config: ConfigCarga,
+                      intervalo_tempestade: float = 0.0, fracao_tempestade: float = 0.0,
+                      seed: Optional[int] = None) -> dict:
+    """
+    Executa `n_robos` robôs simulados por `duracao` segundos e retorna o resumo das métricas.
+    """
+    rng = random.Random(seed)
+    stats = EstatisticasCarga()
+    parar = asyncio.Event()
+    if config.servidor is None:
+        config.servidor = await descobrir_servidor(config.porta_udp)
+        print(f"[CARGA] Servidor encontrado em {config.servidor}")
+
+    robos = [RoboCarga(f"carga-{i:04d}", config, stats, random.Random(rng.random())) for i in range(n_robos)]
+    tarefas = [asyncio.create_task(robo.executar(parar)) for robo in robos]
+    if intervalo_tempestade > 0 and fracao_tempestade > 0:
+        tarefas.append(asyncio.create_task(tempestades(robos, intervalo_tempestade, fracao_tempestade, rng, parar)))
+
+    try:
+        await asyncio.sleep(duracao)
+    finally:
+        parar.set()
+        for robo in robos:
+            if robo.writer is not None:
+                robo.writer.close()
+        await asyncio.gather(*tarefas, return_exceptions=True)
+    return stats.resumo()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gerador de carga com N robôs simulados em um processo.")
+    parser.add_argument('--robos', type=int, default=50)
+    parser.add_argument('--duracao', type=float, default=60.0, help="Duração do teste em segundos")
+    parser.add_argument('--servidor', default=None, help="IP do servidor (padrão: descoberta UDP)")
+    parser.add_argument('--escala', type=float, default=1.0, help="Fator sobre o tempo do modelo de movimento")
+    parser.add_argument('--latencia', type=float, default=None, help="Tempo fixo por movimento (s)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Desvio padrão somado ao movimento (s)")
+    parser.add_argument('--perda', type=float, default=0.0, help="Probabilidade de um comando nunca ser confirmado")
+    parser.add_argument('--tempestade-intervalo', type=float, default=0.0, help="Segundos entre tempestades de reconexão")
+    parser.add_argument('--tempestade-fracao', type=float, default=0.0, help="Fração dos robôs derrubados por tempestade")
+    parser.add_argument('--reconexao-max', type=float, default=1.0, help="Espera máxima antes de reconectar (s)")
+    parser.add_argument('--batimento', type=float, default=BATIMENTO, help="Segundos entre batimentos (0 = sem batimento)")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--json', default=None, help="Arquivo para salvar o resumo em JSON")
+    args = parser.parse_args()
+
+    config = ConfigCarga(args.escala, args.latencia, args.jitter, args.perda, args.reconexao_max, args.servidor,
+                         batimento=args.batimento)
+    try:
+        resumo = asyncio.run(gerar_carga(args.robos, args.duracao, config, args.tempestade_intervalo,
+                                         args.tempestade_fracao, args.seed))
+    except KeyboardInterrupt:
+        raise SystemExit(1)
+
+    print(f"[CARGA] {resumo['robos']} robôs | {resumo['conexoes']} conexões | {resumo['quedas']} quedas | "
+          f"{resumo['comandos']} comandos ({resumo['comandos_por_s']:.1f}/s) | {resumo['comandos_perdidos']} perdidos")
+    for nome in ('latencia_comando_ack_s', 'latencia_ack_comando_s'):
+        p = resumo[nome]
+        if p:
+            print(f"[CARGA] {nome}: p50 {p['p50']*1000:.1f} ms | p95 {p['p95']*1000:.1f} ms | p99 {p['p99']*1000:.1f} ms")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(resumo, f, indent=2)
+        print(f"[CARGA] Resumo salvo em {args.json}")
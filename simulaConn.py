@@ -1,18 +1,167 @@
 #!/usr/bin/env python3
+import os
 import socket
+import sys
+import tempfile
+import threading
 import time
 
+from ev3.planejador import TEMPO_CASA, ModeloCusto, girar_direcao, planejar
+from ev3.protocol import FrameDecoder, ProtocolError, encode
+from tracing import Tracer
+
 # --- Configurações (devem ser iguais às do robô e servidor) ---
 TCP_PORT = 65432
 UDP_PORT = 65431
 DISCOVERY_REQUEST = b"EV3_DISCOVERY_REQUEST"
 DISCOVERY_RESPONSE = b"EV3_SERVER_HERE"
+SERVIDOR_CACHE = os.path.join(tempfile.gettempdir(), 'ev3_pso_servidor.txt')  # último servidor encontrado
+TIMEOUT_CACHE = 1.5  # Segundos tentando o servidor em cache antes da descoberta UDP
+ESPERA_RECONEXAO = 1.0  # Segundos entre tentativas de reconexão
+BATIMENTO = 2.0          # Segundos entre batimentos ('vivo') enviados ao servidor
+SILENCIO_SERVIDOR = 10.0 # Segundos sem nada do servidor (que manda 'vivo' a cada 2 s) até a conexão ser dada como morta
+PASSO_PROGRESSO = 0.5    # Segundos de movimento por incremento do contador de progresso
+
+# --- Modelo de Tempo do Movimento (medido no robô real) ---
+MODELO = ModeloCusto(por_casa=TEMPO_CASA, peso=0.0)  # Retas e giros com os tempos do ev3/planejador.py, fixos
+ESCALA_TEMPO = 1.0 # Fator aplicado às esperas reais (0 = sem espera)
+
+# --- Trace (opcional) ---
+# SIMULA_TRACE=robo-{id}.json grava a linha do tempo do robô ao sair ({id} vira o ID do robô);
+# junte com a do servidor usando: python tracing.py juntar ...
+tracer = Tracer('simulaConn')
 
-# --- Variáveis de Estado do Robô Simulado ---
-# Mantém o controle da posição e direção atuais do robô
-posicao_atual = [0, 0]
 direcoes_cardinais = ['N', 'L', 'S', 'O'] # Norte, Leste, Sul, Oeste
-direcao_atual = 'N'
+
+# Deslocamento de uma casa para frente em cada direção
+passo_direcao = {'N': (0, 1), 'L': (1, 0), 'S': (0, -1), 'O': (-1, 0)}
+
+def ler_obstaculos(texto):
+  """Converte 'x,y;x,y' no conjunto de casas bloqueadas do mundo simulado."""
+  return {tuple(int(v) for v in par.split(',')) for par in texto.split(';') if par.strip()}
+
+class RoboSimulado:
+  """
+  Modelo de movimento de um robô na grade: posição, direção cardeal, giros e
+  passos para frente/trás. Não dorme nem usa rede; quem o usa decide como o
+  tempo passa (espera real neste script, relógio virtual na simulação).
+  """
+  def __init__(self, posicao=(0, 0), direcao='N', obstaculos=frozenset()):
+    self.posicao = list(posicao)
+    self.direcao = direcao
+    self.obstaculos = obstaculos  # Casas bloqueadas do mundo (o robô só as descobre ao encontrá-las)
+    self.detectados = []          # Obstáculos encontrados e ainda não reportados
+
+  def atualizar_direcao(self, giro):
+    """Atualiza a direção cardeal do robô com base no giro."""
+    indice_atual = direcoes_cardinais.index(self.direcao)
+
+    if giro.lower() == 'direita':
+      novo_indice = (indice_atual + 1) % len(direcoes_cardinais)
+    elif giro.lower() == 'esquerda':
+      novo_indice = (indice_atual - 1 + len(direcoes_cardinais)) % len(direcoes_cardinais)
+    self.direcao = direcoes_cardinais[novo_indice]
+
+  def simular_movimento_frente_tras(self, passos):
+    """Simula o movimento para frente ou para trás atualizando a posição."""
+    if self.direcao == 'N':
+      self.posicao[1] += passos
+    elif self.direcao == 'S':
+      self.posicao[1] -= passos
+    elif self.direcao == 'L':
+      self.posicao[0] += passos
+    elif self.direcao == 'O':
+      self.posicao[0] -= passos
+
+  def andar(self, casas):
+    """
+    Anda até `casas` casas para frente. Se a próxima casa for um obstáculo,
+    para antes dela e a registra em `detectados`.
+
+    Returns:
+      int: O número de casas efetivamente andadas.
+    """
+    if not self.obstaculos:
+      self.simular_movimento_frente_tras(casas)
+      return casas
+    dx, dy = passo_direcao[self.direcao]
+    for andadas in range(casas):
+      proxima = (self.posicao[0] + dx, self.posicao[1] + dy)
+      if proxima in self.obstaculos:
+        self.detectados.append(proxima)
+        return andadas
+      self.simular_movimento_frente_tras(1)
+    return casas
+
+  def ir_para(self, x_alvo, y_alvo):
+    """Vai até (x_alvo, y_alvo); ver seguir_rota."""
+    return self.seguir_rota([(x_alvo, y_alvo)])
+
+  def seguir_rota(self, waypoints):
+    """
+    Segue os waypoints com o plano de menor tempo do robô real (ev3/planejador.py).
+    Um obstáculo no caminho interrompe o movimento onde o robô estiver.
+
+    Returns:
+      float: A duração estimada do percurso, em segundos.
+    """
+    passos, _ = planejar(self.posicao, self.direcao, waypoints, MODELO)
+    duracao = 0.0
+    for tipo, valor in passos:
+      if tipo == 'girar':
+        self.direcao = girar_direcao(self.direcao, valor)
+        duracao += MODELO.tempo_giro(valor)
+        continue
+      andadas = self.andar(valor)
+      duracao += MODELO.tempo_reta(andadas) if andadas else 0.0
+      if andadas < valor:
+        break
+    return duracao
+
+  def girar_para_rota(self, waypoints):
+    """
+    Faz só os giros iniciais do plano, sem sair da casa (como o robô real durante uma 'espera').
+
+    Returns:
+      float: A duração estimada dos giros, em segundos.
+    """
+    passos, _ = planejar(self.posicao, self.direcao, waypoints, MODELO)
+    duracao = 0.0
+    for tipo, valor in passos:
+      if tipo != 'girar':
+        break
+      self.direcao = girar_direcao(self.direcao, valor)
+      duracao += MODELO.tempo_giro(valor)
+    return duracao
+
+# --- Estado do Robô Simulado deste processo ---
+robo = RoboSimulado()
+progresso = 0                  # Contador mandado nos batimentos; só anda durante um movimento
+envio_lock = threading.Lock()  # Um frame por vez no socket (o batimento roda em outra thread)
+
+def enviar(client_socket, *mensagens):
+  """Envia as mensagens num único frame."""
+  with envio_lock:
+    client_socket.sendall(encode(*mensagens))
+
+def batimentos(client_socket, parar):
+  """Thread que manda 'vivo' com o contador de progresso até `parar` ou a conexão cair."""
+  while not parar.wait(BATIMENTO):
+    try:
+      enviar(client_socket, ('vivo', progresso))
+    except OSError:
+      return
+
+def mover(segundos):
+  """Espera o tempo do movimento em passos, contando progresso como o laço das rodas do robô real."""
+  global progresso
+  fim = time.monotonic() + segundos
+  while True:
+    restante = fim - time.monotonic()
+    if restante <= 0:
+      return
+    time.sleep(min(restante, PASSO_PROGRESSO))
+    progresso += 1
 
 def discover_server():
   """Encontra o IP do servidor na rede local via broadcast UDP."""
@@ -36,133 +185,199 @@ def discover_server():
         print(f"[ERRO] Falha na descoberta: {e}")
         return None
 
-def atualizar_direcao(giro):
-  """Atualiza a direção cardeal do robô com base no giro."""
-  global direcao_atual, direcoes_cardinais
-  
-  indice_atual = direcoes_cardinais.index(direcao_atual)
-  
-  if giro.lower() == 'direita':
-    novo_indice = (indice_atual + 1) % len(direcoes_cardinais)
-  elif giro.lower() == 'esquerda':
-    novo_indice = (indice_atual - 1 + len(direcoes_cardinais)) % len(direcoes_cardinais)
-  direcao_atual = direcoes_cardinais[novo_indice]
-
-def simular_movimento_frente_tras(passos):
-  """Simula o movimento para frente ou para trás atualizando a posição."""
-  global posicao_atual, direcao_atual
-  if direcao_atual == 'N':
-    posicao_atual[1] += passos
-  elif direcao_atual == 'S':
-    posicao_atual[1] -= passos
-  elif direcao_atual == 'L':
-    posicao_atual[0] += passos
-  elif direcao_atual == 'O':
-    posicao_atual[0] -= passos
+def ler_servidor_cache():
+  """IP do último servidor encontrado, ou None."""
+  try:
+    with open(SERVIDOR_CACHE) as f:
+      return f.read().strip() or None
+  except OSError:
+    return None
+
+def conectar():
+  """
+  Conecta ao servidor: primeiro no IP em cache (sem esperar o broadcast),
+  depois pela descoberta UDP, guardando o IP encontrado.
+  Retorna o socket conectado, ou None se a descoberta falhar.
+  """
+  server_ip = ler_servidor_cache()
+  if server_ip:
+    try:
+      client_socket = socket.create_connection((server_ip, TCP_PORT), timeout=TIMEOUT_CACHE)
+      client_socket.settimeout(None)
+      print(f"[TCP] Conectado ao servidor em cache {server_ip}:{TCP_PORT}")
+      return client_socket
+    except OSError:
+      print(f"[TCP] Servidor em cache ({server_ip}) indisponível; usando a descoberta.")
+  while True:
+    server_ip = discover_server()
+    if not server_ip:
+      return None
+    try:
+      print(f"[TCP] Conectando ao servidor em {server_ip}:{TCP_PORT}...")
+      client_socket = socket.create_connection((server_ip, TCP_PORT))
+    except OSError as e:
+      print(f"[ERRO] Falha ao conectar: {e}. Tentando novamente...")
+      time.sleep(ESPERA_RECONEXAO)
+      continue
+    try:
+      with open(SERVIDOR_CACHE, 'w') as f:
+        f.write(server_ip)
+    except OSError:
+      pass
+    print("[TCP] Conectado com sucesso!")
+    return client_socket
+
+def enviar_posicao(client_socket):
+  """Envia a posição atual ao servidor."""
+  with tracer.span('enviar pos', pos=list(robo.posicao)):
+    enviar(client_socket, ('pos', tuple(robo.posicao)))
+  print(f"[ROBÔ] Posição enviada: {robo.posicao}")
+
+def processar_comando(client_socket, tipo, valor, seguinte=None):
+  """
+  Executa uma mensagem recebida do servidor. `seguinte` é a próxima mensagem
+  do mesmo frame, se houver.
+
+  Returns:
+    bool: False se o robô deve encerrar.
+  """
+  print(f"\n[SERVIDOR] Comando recebido: {tipo} {valor}")
+
+  if tipo in ('ir', 'rota'):
+    rota = [valor] if tipo == 'ir' else valor
+    print(f"--> Simulando movimento de {robo.posicao} por {rota}...")
+    duracao = robo.seguir_rota(rota)
+    with tracer.span('movimento', rota=[list(p) for p in rota], duracao_simulada=duracao):
+      mover(duracao * ESCALA_TEMPO) # Simula o tempo que o robô leva para se mover
+    print(f"--> Movimento concluído em {duracao:.1f}s. Nova posição: {robo.posicao}")
+    if robo.detectados:
+      # Obstáculos encontrados vão no mesmo frame da posição
+      print(f"--> Obstáculos encontrados: {robo.detectados}")
+      with tracer.span('enviar pos', pos=list(robo.posicao), obstaculos=len(robo.detectados)):
+        enviar(client_socket, *[('obstaculo', c) for c in robo.detectados], ('pos', tuple(robo.posicao)))
+      print(f"[ROBÔ] Posição enviada: {robo.posicao}")
+      robo.detectados.clear()
+    else:
+      enviar_posicao(client_socket)
+
+  elif tipo == 'inicio':
+    robo.posicao, robo.direcao = [valor[0], valor[1]], valor[2]
+    print(f"--> Pose de partida: {robo.posicao} virado para {robo.direcao}")
+    enviar_posicao(client_socket)
+
+  elif tipo == 'espera':
+    print(f"--> Aguardando {valor} ms para liberar o caminho...")
+    giros = 0.0
+    if seguinte is not None and seguinte[0] in ('ir', 'rota'):
+      # Como no robô real: os giros iniciais não tiram o robô da casa e são feitos durante a espera
+      giros = robo.girar_para_rota([seguinte[1]] if seguinte[0] == 'ir' else seguinte[1])
+    with tracer.span('espera', ms=valor, giros=giros):
+      time.sleep(max(valor / 1000, giros) * ESCALA_TEMPO)
+
+  elif valor == 'frente':
+    print("--> Simulando: Mover para frente...")
+    robo.simular_movimento_frente_tras(1)
+    print(f"--> Nova posição: {robo.posicao}")
+
+  elif valor == 'tras':
+    print("--> Simulando: Mover para trás...")
+    robo.simular_movimento_frente_tras(-1)
+    print(f"--> Nova posição: {robo.posicao}")
+
+  elif valor == 'esquerda':
+    print("--> Simulando: Girar para a esquerda...")
+    robo.atualizar_direcao('esquerda')
+    print(f"--> Nova direção: {robo.direcao}")
+
+  elif valor == 'direita':
+    print("--> Simulando: Girar para a direita...")
+    robo.atualizar_direcao('direita')
+    print(f"--> Nova direção: {robo.direcao}")
+
+  elif valor == 'posicao':
+    enviar_posicao(client_socket)
+
+  elif valor == 'desligar':
+    print("[ROBÔ] Comando de desligamento recebido. Encerrando.")
+    return False
+
+  return True
 
 def processar_comandos(client_socket):
-  """Loop principal para receber e processar comandos do servidor."""
-  global posicao_atual, direcao_atual
+  """
+  Loop principal para receber e processar comandos do servidor.
+  Retorna True se a conexão caiu (vale reconectar) e False após 'desligar'.
+  """
+  decoder = FrameDecoder()
   try:
     while True:
       # Espera por um comando do servidor
-      command_bytes = client_socket.recv(1024)
+      command_bytes = client_socket.recv(4096)
       if not command_bytes:
         print("[CONEXÃO] O servidor fechou a conexão.")
-        break
-      
-      command = command_bytes.decode('utf-8')
-      print(f"\n[SERVIDOR] Comando recebido: '{command}'")
-
-      # --- Processamento dos comandos ---
-      if command.startswith("ir:"):
-        try:
-          _, coords = command.split(':')
-          x_str, y_str = coords.split(';')
-          x_alvo, y_alvo = int(x_str), int(y_str)
-
-          print(f"--> Simulando movimento de {posicao_atual} para [{x_alvo}, {y_alvo}]...")
-          time.sleep(2) # Simula o tempo que o robô leva para se mover
-          posicao_atual = [x_alvo, y_alvo]
-          print(f"--> Movimento concluído. Nova posição: {posicao_atual}")
-          
-          mensagem = f"pos:{posicao_atual[0]};{posicao_atual[1]}"
-          client_socket.sendall(mensagem.encode('utf-8'))
-          print(f"[ROBÔ] Posição atualizada enviada: '{mensagem}'")
-
-        except Exception as e:
-          print(f"[ERRO] Falha ao processar comando 'ir': {e}")
-      
-      elif command == 'frente':
-        print("--> Simulando: Mover para frente...")
-        simular_movimento_frente_tras(1)
-        print(f"--> Nova posição: {posicao_atual}")
-
-      elif command == 'tras':
-        print("--> Simulando: Mover para trás...")
-        simular_movimento_frente_tras(-1)
-        print(f"--> Nova posição: {posicao_atual}")
-
-      elif command == 'esquerda':
-        print("--> Simulando: Girar para a esquerda...")
-        atualizar_direcao('esquerda')
-        print(f"--> Nova direção: {direcao_atual}")
-
-      elif command == 'direita':
-        print("--> Simulando: Girar para a direita...")
-        atualizar_direcao('direita')
-        print(f"--> Nova direção: {direcao_atual}")
-
-      elif command == 'posicao':
-        mensagem = f"pos:{posicao_atual[0]};{posicao_atual[1]}"
-        client_socket.sendall(mensagem.encode('utf-8'))
-        print(f"[ROBÔ] Posição atual enviada: '{mensagem}'")
-
-      elif command == 'desligar':
-        print("[ROBÔ] Comando de desligamento recebido. Encerrando.")
-        break
-      
-      else:
-        print(f"[AVISO] Comando desconhecido: '{command}'")
+        return True
 
-  except ConnectionResetError:
-    print("[ERRO] Conexão com o servidor foi perdida.")
-  except Exception as e:
-    print(f"[ERRO] Ocorreu um erro inesperado na comunicação: {e}")
+      # Um único recv pode trazer vários comandos (ou só parte de um).
+      # O batimento do servidor ('vivo') só conta como sinal de vida (ver SILENCIO_SERVIDOR)
+      mensagens = [m for m in decoder.feed(command_bytes) if m[0] != 'vivo']
+      for i, (tipo, valor) in enumerate(mensagens):
+        tracer.instant('comando recebido', tipo=tipo)
+        seguinte = mensagens[i + 1] if i + 1 < len(mensagens) else None
+        if not processar_comando(client_socket, tipo, valor, seguinte):
+          return False
+
+  except ProtocolError as e:
+    # Um frame corrompido deixa o fluxo dessincronizado: como no firmware, trata como queda e reconecta
+    print(f"[ERRO] Mensagem inválida do servidor: {e}")
+    return True
+  except OSError as e:
+    print(f"[ERRO] Conexão com o servidor foi perdida: {e}")
+    return True
 
 
 # --- Lógica Principal do Robô Simulado ---
 if __name__ == "__main__":
-  server_ip = discover_server()
+  robot_id = sys.argv[1] if len(sys.argv) > 1 else f"sim-{os.getpid()}"
+  if len(sys.argv) > 2:  # Obstáculos do mundo simulado, ex: "1,1;2,1"
+    robo.obstaculos = ler_obstaculos(sys.argv[2])
+  trace_path = os.environ.get('SIMULA_TRACE')
+  if trace_path:
+    trace_path = trace_path.replace('{id}', robot_id)
+    tracer.process = f"robô {robot_id}"
+    tracer.enable()
+  client_socket = None
+  try:
+    # Se a conexão cair, reconecta com o mesmo ID: o servidor devolve a
+    # partícula (P-Best e velocidade) se o robô voltar dentro do prazo
+    while True:
+      client_socket = conectar()
+      if client_socket is None:
+        break
 
-  if server_ip:
-    client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    try:
-      # Conecta ao servidor
-      print(f"[TCP] Conectando ao servidor em {server_ip}:{TCP_PORT}...")
-      client_socket.connect((server_ip, TCP_PORT))
-      print("[TCP] Conectado com sucesso!")
-
-      # 1. Envia a mensagem de saudação inicial (como no robô real)
-      client_socket.sendall(b"Ola, sou um EV3!")
-      print("[ROBÔ] Mensagem de saudação enviada.")
-      
-      # 2. Envia a posição inicial (como no robô real)
-      posicao_atual = [0, 0] 
-      direcao_atual = 'N'
-      initial_pos_msg = f"pos:{posicao_atual[0]};{posicao_atual[1]}"
-      client_socket.sendall(initial_pos_msg.encode('utf-8'))
-      print(f"[ROBÔ] Posição inicial ({posicao_atual}) e direção ('{direcao_atual}') definidas e enviadas.")
-      
-      # 3. Entra no loop de escuta e processamento de comandos
-      processar_comandos(client_socket)
-
-    except ConnectionRefusedError:
-      print("[ERRO] Conexão recusada. Verifique se o servidor está rodando e acessível.")
-    except KeyboardInterrupt:
-      print("\n[SAINDO] Interrupção do usuário. Desconectando...")
-    except Exception as e:
-      print(f"[ERRO] Ocorreu um erro inesperado na execução principal: {e}")
-    finally:
-      print("[FIM] Fechando o socket do cliente.")
-      client_socket.close()
\ No newline at end of file
+      # 1. Envia a saudação com o ID e a posição atual num único frame (como no robô real)
+      client_socket.settimeout(SILENCIO_SERVIDOR)
+      enviar(client_socket, ('hello', robot_id), ('pos', tuple(robo.posicao)))
+      print(f"[ROBÔ] Saudação ({robot_id}), posição ({robo.posicao}) e direção ('{robo.direcao}') enviadas.")
+      parar_batimentos = threading.Event()
+      threading.Thread(target=batimentos, args=(client_socket, parar_batimentos), daemon=True).start()
+
+      # 2. Entra no loop de escuta e processamento de comandos
+      reconectar = processar_comandos(client_socket)
+      parar_batimentos.set()
+      if not reconectar:
+        break
+      client_socket.close()
+      client_socket = None
+      print(f"[CONEXÃO] Reconectando em {ESPERA_RECONEXAO:.0f}s...")
+      time.sleep(ESPERA_RECONEXAO)
+
+  except KeyboardInterrupt:
+    print("\n[SAINDO] Interrupção do usuário. Desconectando...")
+  except Exception as e:
+    print(f"[ERRO] Ocorreu um erro inesperado na execução principal: {e}")
+  finally:
+    print("[FIM] Fechando o socket do cliente.")
+    if trace_path:
+      print(f"[TRACE] {tracer.dump(trace_path)} eventos gravados em {trace_path}")
+    if client_socket is not None:
+      client_socket.close()
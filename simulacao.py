@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Simulador headless do enxame: roda o PSO do servidor diretamente sobre o
+SwarmState, sem sockets, com robôs RoboSimulado (o mesmo modelo de movimento
+do simulaConn.py) e um relógio virtual. O tempo de cada movimento vem do
+modelo de giros e casas, então milhares de partículas por centenas de
+iterações rodam em segundos enquanto o tempo simulado é reportado.
+
+Uso:
+    python simulacao.py --particulas 1000 --iteracoes 500 [--modo async] [--seed 42]
+"""
+import argparse
+import heapq
+import time
+from typing import Callable, Iterable, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+import objectives
+from pso import (BOUNDS, C1, C2, DISCRETE_MODE, DISCRETE_MODES, MAX_ITERATIONS, OBJECTIVE, SCHEDULE, SCHEDULES, W,
+                 Schedule, StoppingCriteria, constant_schedule, make_discretizer, make_schedule, optional_value)
+from occupancy import OccupancyGrid
+from planner import RoutePlanner
+from runlog import ACKED, GBEST, PBEST, RunLogWriter
+from scheduler import TICK_SECONDS, ReservationScheduler
+from simulaConn import RoboSimulado, ler_obstaculos
+from swarm import SwarmState
+
+# Ida e volta de cada comando (envio, 'pos' de volta e avaliação no servidor), somada a todo
+# movimento: nem um robô que já está no alvo, ou bloqueado logo na saída, responde no mesmo instante
+COMMAND_LATENCY = 0.3
+
+
+class VirtualClock:
+    """Relógio simulado: só avança quando a simulação manda."""
+    def __init__(self):
+        self.now: float = 0.0
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+    def advance_to(self, instant: float):
+        self.now = max(self.now, instant)
+
+
+class SimulationResult(NamedTuple):
+    mode: str
+    particles: int
+    evaluations: int
+    gbest_val: float
+    gbest_pos: Optional[np.ndarray]
+    simulated_time: float          # segundos no relógio virtual
+    convergence_time: float        # instante simulado do último novo G-Best
+    utilization: float             # fração do tempo simulado em que os robôs estavam se movendo
+    wall_time: float               # segundos reais gastos na simulação
+    target_iteration: Optional[int] = None  # primeira iteração com G-Best <= target_fitness (0 = na saudação)
+    stop_reason: Optional[str] = None       # motivo da parada antecipada, se houve
+
+    def report(self) -> str:
+        target = f"iteração {self.target_iteration}" if self.target_iteration is not None else "não atingido"
+        if self.stop_reason:
+            target += f" | parada antecipada: {self.stop_reason}"
+        return (f"[SIMULAÇÃO] Resumo ({self.mode}, {self.particles} partículas): "
+                f"{self.evaluations} avaliações | G-Best {self.gbest_val:.2f} em {self.gbest_pos} | "
+                f"tempo simulado {self.simulated_time:.1f}s | convergência {self.convergence_time:.1f}s | "
+                f"alvo {target} | utilização {self.utilization:.0%} | tempo real {self.wall_time:.2f}s")
+
+
+def run_headless(n_particles: int, iterations: int = MAX_ITERATIONS, mode: str = 'sync',
+                 seed: Optional[int] = None, w: float = W, c1: float = C1, c2: float = C2,
+                 bounds: Sequence[Sequence[float]] = BOUNDS,
+                 objective: Optional[Callable] = None,
+                 start: Optional[Sequence[int]] = None,
+                 obstacles: Iterable[Sequence[int]] = (),
+                 reserve: bool = False,
+                 discrete: Optional[str] = DISCRETE_MODE,
+                 target_fitness: float = 0.0,
+                 schedule: Optional[Schedule] = None,
+                 stop: Optional[StoppingCriteria] = None,
+                 log_path: Optional[str] = None,
+                 latency: float = COMMAND_LATENCY) -> SimulationResult:
+    """
+    Executa uma rodada completa do PSO no relógio virtual.
+
+    Args:
+        n_particles (int): Número de robôs simulados.
+        iterations (int): Iterações (no modo 'async', o orçamento é iterations * n_particles avaliações).
+        mode (str): 'sync' (barreira por iteração, como run_sync) ou 'async' (como run_async).
+        seed (Optional[int]): Semente do gerador aleatório.
+        objective (Optional[Callable]): Função objetivo em lote; se None, OBJECTIVE com cache por casa.
+        start (Optional[Sequence[int]]): Posição inicial comum a todos; se None, casas aleatórias dentro de `bounds`.
+        obstacles (Iterable): Casas bloqueadas do mundo; os robôs as reportam ao encontrá-las e
+            passam a andar pelas rotas do RoutePlanner sobre o mapa conhecido. Se `objective`
+            for um OccupancyGrid, ele é esse mapa e o campo de distância é atualizado na hora.
+        reserve (bool): Passar os alvos pelo ReservationScheduler, como o servidor (cada robô numa
+            casa distinta, sem colisões); exige no máximo uma partícula por casa livre.
+        discrete (Optional[str]): Modo do GridDiscretizer (um de DISCRETE_MODES); None trunca os
+            alvos com int(), como o servidor original.
+        target_fitness (float): Valor do G-Best que conta como alvo atingido (target_iteration).
+        schedule (Optional[Schedule]): Agenda dos coeficientes; se None, `w`, `c1` e `c2` constantes.
+        stop (Optional[StoppingCriteria]): Critérios de parada antecipada, checados a cada
+            iteração (no modo 'async', a cada `n_particles` avaliações); se None, roda todas.
+        log_path (Optional[str]): Gravar o log binário da execução (runlog.py) neste arquivo;
+            o campo 'time' dos registros é o tempo real, não o simulado.
+        latency (float): Segundos de ida e volta somados a cada comando despachado
+            (não contam como tempo em movimento na utilização).
+    """
+    wall_start = time.perf_counter()
+    if schedule is None:
+        schedule = constant_schedule(w, c1, c2)
+    if objective is None:
+        objective = objectives.make_objective(OBJECTIVE, bounds)
+    rng = np.random.default_rng(seed)
+    swarm = SwarmState(capacity=n_particles, rng=rng, discretizer=make_discretizer(discrete, bounds, rng))
+    clock = VirtualClock()
+
+    world = frozenset(tuple(int(v) for v in c) for c in obstacles)
+    lower, upper = np.asarray(bounds[0], dtype=int), np.asarray(bounds[1], dtype=int)
+    if start is None:
+        starts = rng.integers(lower, upper + 1, size=(n_particles, 2))
+        if world or reserve:  # ninguém começa dentro de um obstáculo (nem, com reservas, junto de outro)
+            free = np.array([(x, y) for x in range(lower[0], upper[0] + 1)
+                             for y in range(lower[1], upper[1] + 1) if (x, y) not in world])
+            if reserve and n_particles > len(free):
+                raise ValueError(f"{n_particles} partículas não cabem em {len(free)} casas livres")
+            starts = free[rng.choice(len(free), size=n_particles, replace=not reserve)]
+    else:
+        starts = np.tile(start, (n_particles, 1))
+    robots = [RoboSimulado(tuple(int(v) for v in p), obstaculos=world) for p in starts]
+
+    known = objective if isinstance(objective, OccupancyGrid) else OccupancyGrid(bounds)
+    planner = RoutePlanner(known)
+
+    def move(i, x, y):
+        """Leva o robô `i` até (x, y), pela rota planejada quando há obstáculos no mundo."""
+        if not world:
+            return robots[i].ir_para(x, y)
+        waypoints = planner.route(tuple(robots[i].posicao), (x, y))
+        return robots[i].seguir_rota(waypoints) if waypoints else robots[i].ir_para(x, y)
+
+    scheduler = ReservationScheduler(known, planner) if reserve else None
+    goal_cells = [tuple(int(v) for v in p) for p in starts]  # casa reservada por cada robô
+    reserved = set(goal_cells)
+
+    def move_all(batch, targets):
+        """Leva os robôs de `batch` aos alvos; com reservas, pelas rotas e esperas do escalonador."""
+        if scheduler is None:
+            return [move(i, int(x), int(y)) for i, (x, y) in zip(batch, targets)]
+        for i in batch:
+            reserved.discard(goal_cells[i])
+        assignments = scheduler.schedule([goal_cells[i] for i in batch], targets, reserved)
+        durations = []
+        for i, a in zip(batch, assignments):
+            # Os giros iniciais são feitos durante a espera, como no robô real
+            turns = robots[i].girar_para_rota(a.waypoints) if a.wait else 0.0
+            durations.append(max(a.wait * TICK_SECONDS, turns) + robots[i].seguir_rota(a.waypoints))
+            goal_cells[i] = tuple(robots[i].posicao)
+            reserved.add(goal_cells[i])
+        return durations
+
+    def report_obstacles(batch):
+        """Aplica ao mapa conhecido os obstáculos que os robôs de `batch` encontraram."""
+        changed = False
+        for i in batch:
+            for cell in robots[i].detectados:
+                changed |= known.set_obstacle(cell)
+            robots[i].detectados.clear()
+        if changed and known is objective:
+            swarm.reevaluate_bests(objective)
+    idx = np.array([swarm.add(tuple(p)) for p in starts], dtype=int)
+    names = [f"sim-{i:04d}" for i in range(n_particles)]
+    log = None
+    if log_path is not None:
+        log = RunLogWriter(log_path, mode=mode, objective=getattr(getattr(objective, 'func', objective), '__name__', type(objective).__name__),
+                           bounds=[list(b) for b in bounds], max_iterations=iterations, robots=n_particles,
+                           seed=seed, discrete=discrete)
+
+    def log_batch(iteration, batch, targets, improved_idx, gbest_idx):
+        flags = np.full(len(batch), ACKED, dtype=np.uint8)
+        flags[np.isin(idx[batch], improved_idx)] |= PBEST
+        if gbest_idx is not None:
+            flags[idx[batch] == gbest_idx] |= GBEST
+        log.write(iteration, swarm, idx[batch], [names[i] for i in batch], targets, flags)
+
+    # Avaliação da posição inicial, como o 'pos:' de saudação
+    swarm.update_bests(objective, idx)
+    target_iteration = 0 if swarm.gbest_val <= target_fitness else None
+    stop_reason = None
+    if stop is not None:
+        stop.reset(swarm.gbest_val)
+        if stop.reached(swarm.gbest_val):
+            iterations, stop_reason = 0, "alvo atingido na saudação"
+    convergence = 0.0
+    busy = 0.0
+    evaluations = 0
+
+    if mode == 'sync':
+        for iteration in range(1, iterations + 1):
+            targets = swarm.step(*schedule(iteration - 1, iterations), bounds, idx).astype(int)
+            durations = move_all(range(n_particles), targets)
+            # A barreira libera a iteração quando o movimento mais longo termina
+            clock.advance(max(durations) + latency)
+            busy += sum(durations)
+            if world:
+                report_obstacles(range(n_particles))
+            swarm.position[idx] = [robot.posicao for robot in robots]
+            improved_idx, gbest_idx = swarm.update_bests(objective, idx)
+            evaluations += len(idx)
+            if log is not None:
+                log_batch(iteration, np.arange(n_particles), targets, improved_idx, gbest_idx)
+            if gbest_idx is not None:
+                convergence = clock.now
+                if target_iteration is None and swarm.gbest_val <= target_fitness:
+                    target_iteration = iteration
+            if stop is not None:
+                stop_reason = stop.check(swarm.gbest_val, swarm.position[idx])
+                if stop_reason:
+                    break
+    elif mode == 'async':
+        remaining = iterations * n_particles
+        events = []
+
+        sent = np.zeros((n_particles, 2), dtype=int)  # último alvo de cada robô (para o log)
+
+        def dispatch(batch):
+            """Despacha o próximo alvo para os robôs de `batch` (índices locais)."""
+            targets = swarm.step(*schedule(evaluations // n_particles, iterations), bounds, idx[batch]).astype(int)
+            sent[batch] = targets
+            durations = move_all(batch, targets)
+            for i, duration in zip(batch, durations):
+                heapq.heappush(events, (clock.now + duration + latency, i))
+            return sum(durations)
+
+        checked = 0  # última iteração equivalente em que os critérios de parada foram checados
+        first = np.arange(min(remaining, n_particles))
+        remaining -= len(first)
+        busy += dispatch(first)
+        while events:
+            # Robôs que terminam no mesmo instante são avaliados juntos (mesmo
+            # resultado de processá-los um a um, com uma única operação vetorizada)
+            instant = events[0][0]
+            batch = []
+            while events and events[0][0] == instant:
+                batch.append(heapq.heappop(events)[1])
+            clock.advance_to(instant)
+            batch = np.array(batch, dtype=int)
+            if world:
+                report_obstacles(batch)
+            swarm.position[idx[batch]] = [robots[i].posicao for i in batch]
+            improved_idx, gbest_idx = swarm.update_bests(objective, idx[batch])
+            evaluations += len(batch)
+            if log is not None:
+                log_batch(-(-evaluations // n_particles), batch, sent[batch], improved_idx, gbest_idx)
+            if gbest_idx is not None:
+                convergence = clock.now
+                if target_iteration is None and swarm.gbest_val <= target_fitness:
+                    target_iteration = -(-evaluations // n_particles)  # em iterações equivalentes
+            if stop is not None and stop_reason is None and evaluations // n_particles > checked:
+                checked = evaluations // n_particles
+                stop_reason = stop.check(swarm.gbest_val, swarm.position[idx])
+                if stop_reason:
+                    remaining = 0  # os robôs em movimento terminam, mas ninguém recebe novo alvo
+            if remaining > 0:
+                batch = batch[:remaining]
+                remaining -= len(batch)
+                busy += dispatch(batch)
+    else:
+        raise ValueError(f"Modo desconhecido: {mode}")
+
+    if log is not None:
+        log.close()
+    utilization = busy / (n_particles * clock.now) if clock.now > 0 else 0.0
+    return SimulationResult(mode, n_particles, evaluations, swarm.gbest_val, swarm.gbest_pos,
+                            clock.now, convergence, utilization, time.perf_counter() - wall_start,
+                            target_iteration, stop_reason)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulador headless do PSO com relógio virtual.")
+    parser.add_argument('--particulas', type=int, default=10)
+    parser.add_argument('--iteracoes', type=int, default=MAX_ITERATIONS)
+    parser.add_argument('--modo', choices=('sync', 'async'), default='sync')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--objetivo', choices=objectives.available(), default=OBJECTIVE)
+    parser.add_argument('--obstaculos', type=ler_obstaculos, default=(), help="Casas bloqueadas, ex: '1,1;2,1'")
+    parser.add_argument('--reservas', action='store_true', help="Evitar colisões com o escalonador de reservas")
+    parser.add_argument('--discreto', choices=DISCRETE_MODES, default=DISCRETE_MODE,
+                        help="Conversão dos alvos em casas (padrão: truncamento original)")
+    parser.add_argument('--alvo-fitness', type=float, default=0.0, help="G-Best que conta como alvo atingido")
+    parser.add_argument('--parar-no-alvo', action='store_true', help="Encerrar quando o G-Best atingir --alvo-fitness")
+    parser.add_argument('--paciencia', type=optional_value(int), default=None,
+                        help="Encerrar após este número de iterações sem melhora do G-Best")
+    parser.add_argument('--diametro', type=optional_value(float), default=None,
+                        help="Encerrar quando o enxame couber numa caixa de diagonal menor que esta")
+    parser.add_argument('--coeficientes', choices=SCHEDULES, default=SCHEDULE,
+                        help="Agenda de W, C1 e C2 ao longo das iterações")
+    parser.add_argument('--log-execucao', default=None, help="Gravar o log binário da execução neste arquivo")
+    parser.add_argument('--latencia', type=float, default=COMMAND_LATENCY,
+                        help="Ida e volta de cada comando, em segundos simulados")
+    args = parser.parse_args()
+    stop = None
+    if args.parar_no_alvo or args.paciencia is not None or args.diametro is not None:
+        stop = StoppingCriteria(args.alvo_fitness if args.parar_no_alvo else None, args.paciencia, args.diametro)
+
+    result = run_headless(args.particulas, args.iteracoes, args.modo, args.seed,
+                          objective=objectives.make_objective(args.objetivo, BOUNDS),
+                          obstacles=args.obstaculos, reserve=args.reservas,
+                          discrete=args.discreto, target_fitness=args.alvo_fitness,
+                          schedule=make_schedule(args.coeficientes), stop=stop, log_path=args.log_execucao,
+                          latency=args.latencia)
+    print(result.report())
@@ -0,0 +1,72 @@
+import threading
+import time
+from typing import Dict, Hashable, Optional
+
+
+class RunStats:
+    """
+    Estatísticas de uma execução do PSO, usadas para comparar o modo síncrono
+    (com barreira) e o assíncrono: utilização dos robôs (fração do tempo em
+    movimento) e tempo até a convergência (último novo G-Best).
+    """
+    def __init__(self, mode: str):
+        self.mode = mode
+        self._lock = threading.Lock()
+        self.start: float = time.monotonic()
+        self.end: Optional[float] = None
+        self.evaluations: int = 0
+        self.gbest_val: float = float('inf')
+        self.last_improvement: Optional[float] = None
+        self._in_flight: Dict[Hashable, float] = {}
+        self._busy: Dict[Hashable, float] = {}
+
+    def command_sent(self, key: Hashable):
+        """Marca o início do movimento de um robô."""
+        with self._lock:
+            self._in_flight[key] = time.monotonic()
+            self._busy.setdefault(key, 0.0)
+
+    def ack(self, key: Hashable) -> bool:
+        """
+        Marca o fim do movimento de um robô.
+
+        Returns:
+            bool: True se havia um comando em andamento para este robô.
+        """
+        with self._lock:
+            sent = self._in_flight.pop(key, None)
+            if sent is None:
+                return False
+            self._busy[key] += time.monotonic() - sent
+            self.evaluations += 1
+            return True
+
+    def discard(self, key: Hashable):
+        """Esquece o comando em andamento de um robô desconectado."""
+        with self._lock:
+            self._in_flight.pop(key, None)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._in_flight)
+
+    def gbest(self, value: float):
+        """Registra um novo G-Best."""
+        with self._lock:
+            self.gbest_val = value
+            self.last_improvement = time.monotonic()
+
+    def finish(self):
+        self.end = time.monotonic()
+
+    def report(self) -> str:
+        end = self.end if self.end is not None else time.monotonic()
+        wall = end - self.start
+        with self._lock:
+            robots = len(self._busy)
+            busy = sum(self._busy.values())
+        utilization = busy / (robots * wall) if robots and wall > 0 else 0.0
+        convergence = f"{self.last_improvement - self.start:.1f}s" if self.last_improvement else "-"
+        return (f"[PSO] Resumo ({self.mode}): tempo total {wall:.1f}s | {self.evaluations} avaliações | "
+                f"utilização dos robôs {utilization:.0%} | tempo até convergência {convergence} | "
+                f"G-Best {self.gbest_val:.2f}")
@@ -0,0 +1,161 @@
+import threading
+from typing import Callable, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class SwarmState:
+    """
+    Estado do enxame em formato struct-of-arrays: cada atributo é um array
+    contíguo (N, 2) ou (N,), e cada partícula é apenas um índice nesses arrays.
+    Isso permite que a atualização de velocidade, o clip nos limites e a
+    atualização de P-Best/G-Best rodem como uma única operação vetorizada.
+    """
+    def __init__(self, capacity: int = 16, rng: Optional[np.random.Generator] = None,
+                 discretizer=None):
+        """
+        Inicializa os arrays do enxame.
+
+        Args:
+            capacity (int): Número inicial de vagas. Cresce automaticamente quando necessário.
+            rng (Optional[np.random.Generator]): Gerador aleatório (permite execuções reprodutíveis).
+            discretizer (Optional[pso.GridDiscretizer]): Converte os alvos em casas da grade no
+                step() e registra as casas avaliadas no update_bests(); None devolve alvos contínuos.
+        """
+        self.lock = threading.RLock()
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.discretizer = discretizer
+
+        self.position: np.ndarray = np.zeros((capacity, 2), dtype=float)
+        self.velocity: np.ndarray = np.zeros((capacity, 2), dtype=float)
+        self.pbest_pos: np.ndarray = np.zeros((capacity, 2), dtype=float)
+        self.pbest_val: np.ndarray = np.full(capacity, np.inf)
+        self.fitness: np.ndarray = np.full(capacity, np.inf)
+        self.active: np.ndarray = np.zeros(capacity, dtype=bool)
+
+        # Para um problema de MINIMIZAÇÃO, valor inicial é infinito positivo
+        self.gbest_pos: Optional[np.ndarray] = None
+        self.gbest_val: float = float('inf')
+
+    @property
+    def capacity(self) -> int:
+        return len(self.active)
+
+    def _grow(self):
+        """Dobra a capacidade dos arrays mantendo o conteúdo atual."""
+        old = self.capacity
+        new = max(1, old * 2)
+        for name in ('position', 'velocity', 'pbest_pos'):
+            arr = np.zeros((new, 2), dtype=float)
+            arr[:old] = getattr(self, name)
+            setattr(self, name, arr)
+        for name in ('pbest_val', 'fitness'):
+            arr = np.full(new, np.inf)
+            arr[:old] = getattr(self, name)
+            setattr(self, name, arr)
+        active = np.zeros(new, dtype=bool)
+        active[:old] = self.active
+        self.active = active
+
+    def add(self, initial_pos: Tuple[float, float]) -> int:
+        """
+        Aloca uma vaga para uma nova partícula e retorna seu índice.
+
+        Args:
+            initial_pos (Tuple[float, float]): A posição inicial (x, y) da partícula.
+        """
+        with self.lock:
+            free = np.flatnonzero(~self.active)
+            if len(free) == 0:
+                self._grow()
+                free = np.flatnonzero(~self.active)
+            idx = int(free[0])
+            self.position[idx] = initial_pos
+            self.velocity[idx] = self.rng.uniform(-1, 1, size=2)
+            self.pbest_pos[idx] = initial_pos
+            self.pbest_val[idx] = np.inf
+            self.fitness[idx] = np.inf
+            self.active[idx] = True
+            return idx
+
+    def remove(self, idx: int):
+        """Libera a vaga da partícula. O G-Best encontrado por ela é mantido."""
+        with self.lock:
+            self.active[idx] = False
+
+    def indices(self) -> np.ndarray:
+        """Índices de todas as partículas ativas."""
+        return np.flatnonzero(self.active)
+
+    def step(self, w: float, c1: float, c2: float, bounds: Sequence[Sequence[float]],
+             idx: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Atualiza a velocidade das partículas em `idx` e retorna os alvos já
+        limitados a `bounds` ([[x_min, y_min], [x_max, y_max]]), convertidos em
+        casas pelo discretizer quando há um.
+        """
+        with self.lock:
+            if idx is None:
+                idx = self.indices()
+            pos = self.position[idx]
+            r1 = self.rng.random((len(idx), 2))
+            r2 = self.rng.random((len(idx), 2))
+
+            ## CALCULO VETORIAIS
+            cognitive_vel = c1 * r1 * (self.pbest_pos[idx] - pos)
+            social_vel = c2 * r2 * (self.gbest_pos - pos) if self.gbest_pos is not None else 0
+            self.velocity[idx] = w * self.velocity[idx] + cognitive_vel + social_vel
+
+            targets = np.clip(pos + self.velocity[idx], bounds[0], bounds[1])
+            if self.discretizer is not None:
+                return self.discretizer(pos, targets, self.velocity[idx])
+            return targets
+
+    def update_bests(self, objective: Callable[[np.ndarray], np.ndarray],
+                     idx: Optional[np.ndarray] = None) -> Tuple[np.ndarray, Optional[int]]:
+        """
+        Avalia a função objetivo (em lote, sobre um array (N, 2)) nas posições
+        atuais de `idx` e atualiza P-Best e G-Best.
+
+        Returns:
+            Tuple[np.ndarray, Optional[int]]: Os índices que melhoraram o P-Best e o
+            índice que definiu um novo G-Best (ou None).
+        """
+        with self.lock:
+            if idx is None:
+                idx = self.indices()
+            if len(idx) == 0:
+                return idx, None
+            pos = self.position[idx]
+            fitness = np.asarray(objective(pos), dtype=float)
+            self.fitness[idx] = fitness
+            if self.discretizer is not None:
+                self.discretizer.mark(pos)
+
+            improved = fitness < self.pbest_val[idx]
+            improved_idx = idx[improved]
+            self.pbest_val[improved_idx] = fitness[improved]
+            self.pbest_pos[improved_idx] = pos[improved]
+
+            best = int(np.argmin(fitness))
+            gbest_idx = None
+            if fitness[best] < self.gbest_val:
+                self.gbest_val = float(fitness[best])
+                self.gbest_pos = pos[best].copy()
+                gbest_idx = int(idx[best])
+            return improved_idx, gbest_idx
+
+    def reevaluate_bests(self, objective: Callable[[np.ndarray], np.ndarray]):
+        """
+        Reavalia P-Best e G-Best de todas as partículas ativas com a função
+        objetivo atual. Usado quando a função muda (ex.: novo obstáculo no mapa)
+        e os valores guardados deixaram de valer.
+        """
+        with self.lock:
+            idx = self.indices()
+            if len(idx) == 0:
+                return
+            self.pbest_val[idx] = np.asarray(objective(self.pbest_pos[idx]), dtype=float)
+            best = int(idx[np.argmin(self.pbest_val[idx])])
+            self.gbest_val = float(self.pbest_val[best])
+            self.gbest_pos = self.pbest_pos[best].copy()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Varredura de hiperparâmetros do PSO em paralelo.
+
+Cada tentativa é uma rodada do simulador headless (simulacao.run_headless,
+a mesma atualização do enxame do servidor) com uma combinação de W, C1, C2,
+número de partículas e BOUNDS. As tentativas rodam num ProcessPoolExecutor
+usando todos os núcleos, e cada resultado é gravado numa linha de um arquivo
+JSONL assim que fica pronto: rodar o mesmo comando de novo pula as
+tentativas já gravadas, então uma varredura interrompida continua de onde
+parou. A semente de cada tentativa vem da sua chave (parâmetros +
+repetição), então o resultado não depende da ordem nem do número de processos.
+
+Uso:
+    python sweep.py --w 0.4 0.5 0.7 --c1 1.0 1.5 2.0 --c2 1.0 1.5 2.0 --particulas 4 10 \\
+        --bounds 3x6 5x8 --repeticoes 50 --iteracoes 30 --saida sweep.jsonl
+"""
+import argparse
+import itertools
+import json
+import os
+import statistics
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set
+
+import numpy as np
+
+import objectives
+from pso import (BOUNDS, C1, C2, DISCRETE_MODE, DISCRETE_MODES, MAX_ITERATIONS, OBJECTIVE, SCHEDULES, W,
+                 StoppingCriteria, constant_schedule, constriction_schedule, linear_schedule, optional_value)
+from simulacao import run_headless
+
+
+class Trial(NamedTuple):
+    objective: str
+    schedule: str
+    w: Optional[float]   # None quando a agenda não usa o valor (ex.: W na agenda 'linear')
+    c1: Optional[float]
+    c2: Optional[float]
+    particles: int
+    upper: Sequence[int]  # BOUNDS = [[0, 0], upper]
+    iterations: int
+    mode: str
+    discrete: Optional[str]
+    stop_at_target: bool
+    repetition: int
+    base_seed: int
+
+    @property
+    def config(self) -> str:
+        """Chave da combinação de parâmetros (igual para todas as repetições)."""
+        return (f"{self.objective} {self.schedule} w={self.w} c1={self.c1} c2={self.c2} "
+                f"n={self.particles} bounds={self.upper[0]}x{self.upper[1]} it={self.iterations} "
+                f"{self.mode} {self.discrete or 'truncar'}{' parar' if self.stop_at_target else ''}")
+
+    @property
+    def key(self) -> str:
+        return f"{self.config} rep={self.repetition} seed={self.base_seed}"
+
+    @property
+    def seed(self) -> int:
+        """Semente derivada da chave: reprodutível e independente da ordem de execução."""
+        return int(np.random.SeedSequence([self.base_seed, zlib.crc32(self.key.encode())]).generate_state(1)[0])
+
+
+def parse_bounds(text: str) -> List[int]:
+    """'3x6' -> [3, 6], o canto superior de BOUNDS (o inferior é sempre [0, 0])."""
+    try:
+        x, y = (int(v) for v in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"BOUNDS inválido: '{text}' (use LARGURAxALTURA, ex: 3x6)") from None
+    return [x, y]
+
+
+def make_trials(objective: str, schedules: Sequence[str], ws: Sequence[float], c1s: Sequence[float],
+                c2s: Sequence[float], particles: Sequence[int], uppers: Sequence[Sequence[int]],
+                iterations: int, mode: str, discrete: Optional[str], stop_at_target: bool,
+                repetitions: int, base_seed: int) -> List[Trial]:
+    """Grade completa de tentativas, sem repetir combinações que a agenda torna iguais."""
+    trials, seen = [], set()
+    for schedule, w, c1, c2, n, upper in itertools.product(schedules, ws, c1s, c2s, particles, uppers):
+        if schedule == 'linear':
+            w = None  # a inércia segue W_START -> W_END
+        elif schedule == 'constricao':
+            w = c1 = c2 = None  # todos vêm de PHI1 e PHI2
+        config = (schedule, w, c1, c2, n, tuple(upper))
+        if config in seen:
+            continue
+        seen.add(config)
+        trials.extend(Trial(objective, schedule, w, c1, c2, n, list(upper), iterations, mode, discrete,
+                            stop_at_target, rep, base_seed) for rep in range(repetitions))
+    return trials
+
+
+def run_trial(trial: Trial) -> dict:
+    """Executa uma tentativa e devolve a linha do JSONL."""
+    bounds = [[0, 0], list(trial.upper)]
+    if trial.schedule == 'linear':
+        schedule = linear_schedule(c1=trial.c1, c2=trial.c2)
+    elif trial.schedule == 'constricao':
+        schedule = constriction_schedule()
+    else:
+        schedule = constant_schedule(trial.w, trial.c1, trial.c2)
+    result = run_headless(trial.particles, trial.iterations, trial.mode, trial.seed, bounds=bounds,
+                          objective=objectives.make_objective(trial.objective, bounds),
+                          discrete=trial.discrete, schedule=schedule,
+                          stop=StoppingCriteria(0.0, None, None) if trial.stop_at_target else None)
+    return {
+        'key': trial.key,
+        'config': trial.config,
+        'params': trial._asdict(),
+        'seed': trial.seed,
+        'gbest_val': float(result.gbest_val),
+        'gbest_pos': None if result.gbest_pos is None else result.gbest_pos.tolist(),
+        'target_iteration': result.target_iteration,
+        'evaluations': result.evaluations,
+        'simulated_time': result.simulated_time,
+        'convergence_time': result.convergence_time,
+        'wall_time': result.wall_time,
+    }
+
+
+def run_chunk(trials: List[Trial]) -> List[dict]:
+    return [run_trial(trial) for trial in trials]
+
+
+def load_results(path: str) -> List[dict]:
+    """Lê o JSONL de resultados, ignorando uma última linha truncada por uma interrupção."""
+    if not os.path.exists(path):
+        return []
+    results = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                results.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return results
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b'\n'
+
+
+def run_sweep(trials: Sequence[Trial], path: str, workers: Optional[int] = None,
+              chunk_size: Optional[int] = None) -> int:
+    """
+    Executa as tentativas que ainda não estão em `path`, gravando cada resultado ao terminar.
+
+    Args:
+        trials (Sequence[Trial]): A grade completa.
+        path (str): Arquivo JSONL de resultados (criado ou continuado).
+        workers (Optional[int]): Número de processos; None usa todos os núcleos.
+        chunk_size (Optional[int]): Tentativas por tarefa do pool; None divide a grade em ~8 tarefas por processo.
+
+    Returns:
+        int: Quantas tentativas foram executadas agora.
+    """
+    done: Set[str] = {r['key'] for r in load_results(path)}
+    pending = [t for t in trials if t.key not in done]
+    if not pending:
+        return 0
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, len(pending) // (workers * 8))
+    chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+    finished = 0
+    started = time.monotonic()
+    with open(path, 'a', encoding='utf-8') as out, ProcessPoolExecutor(max_workers=workers) as pool:
+        if out.tell() and not _ends_with_newline(path):
+            out.write('\n')  # fecha a linha truncada para não colar o próximo resultado nela
+        futures = [pool.submit(run_chunk, chunk) for chunk in chunks]
+        for future in as_completed(futures):
+            records = future.result()
+            for record in records:
+                out.write(json.dumps(record) + '\n')
+            out.flush()
+            finished += len(records)
+            print(f"\r[SWEEP] {finished}/{len(pending)} tentativas "
+                  f"em {time.monotonic() - started:.1f}s", end='', flush=True)
+    print()
+    return len(pending)
+
+
+def aggregate(results: Iterable[dict]) -> List[dict]:
+    """
+    Estatísticas de convergência por combinação de parâmetros, da melhor para a pior
+    (maior taxa de sucesso, depois menos iterações até o alvo).
+    """
+    groups: Dict[str, List[dict]] = {}
+    for r in results:
+        groups.setdefault(r['config'], []).append(r)
+    summary = []
+    for config, rows in groups.items():
+        hits = [r['target_iteration'] for r in rows if r['target_iteration'] is not None]
+        gbest = [r['gbest_val'] for r in rows]
+        summary.append({
+            'config': config,
+            'trials': len(rows),
+            'success_rate': len(hits) / len(rows),
+            'mean_target_iteration': statistics.mean(hits) if hits else None,
+            'median_target_iteration': statistics.median(hits) if hits else None,
+            'mean_gbest': statistics.mean(gbest),
+            'std_gbest': statistics.pstdev(gbest),
+            'mean_simulated_time': statistics.mean(r['simulated_time'] for r in rows),
+        })
+    summary.sort(key=lambda s: (-s['success_rate'], s['mean_target_iteration'] or 0.0, s['mean_gbest']))
+    return summary
+
+
+def format_summary(summary: Sequence[dict], top: Optional[int] = None) -> str:
+    lines = [f"{'sucesso':>8} {'it. alvo':>9} {'G-Best':>14} {'t. sim.':>8} {'n':>5}  combinação"]
+    for s in summary[:top]:
+        iters = f"{s['mean_target_iteration']:.1f}" if s['mean_target_iteration'] is not None else '-'
+        lines.append(f"{s['success_rate']:>8.0%} {iters:>9} {s['mean_gbest']:>7.2f} ±{s['std_gbest']:<5.2f} "
+                     f"{s['mean_simulated_time']:>7.0f}s {s['trials']:>5}  {s['config']}")
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Varredura paralela de hiperparâmetros do PSO (simulação headless).")
+    parser.add_argument('--w', type=float, nargs='+', default=[W])
+    parser.add_argument('--c1', type=float, nargs='+', default=[C1])
+    parser.add_argument('--c2', type=float, nargs='+', default=[C2])
+    parser.add_argument('--particulas', type=int, nargs='+', default=[4])
+    parser.add_argument('--bounds', type=parse_bounds, nargs='+', default=[BOUNDS[1]],
+                        help="Canto superior de BOUNDS, ex: 3x6 5x8")
+    parser.add_argument('--coeficientes', choices=SCHEDULES, nargs='+', default=['constante'])
+    parser.add_argument('--objetivo', choices=objectives.available(), default=OBJECTIVE)
+    parser.add_argument('--iteracoes', type=int, default=MAX_ITERATIONS)
+    parser.add_argument('--modo', choices=('sync', 'async'), default='sync')
+    parser.add_argument('--discreto', choices=DISCRETE_MODES, default=DISCRETE_MODE)
+    parser.add_argument('--parar-no-alvo', action='store_true', help="Encerrar cada tentativa quando o G-Best chegar a 0")
+    parser.add_argument('--repeticoes', type=int, default=20, help="Tentativas (sementes) por combinação")
+    parser.add_argument('--seed', type=int, default=0, help="Semente base; trocar gera outra amostra")
+    parser.add_argument('--processos', type=optional_value(int), default=None, help="Padrão: todos os núcleos")
+    parser.add_argument('--saida', default='sweep.jsonl', help="Resultados (JSONL); continua se já existir")
+    parser.add_argument('--top', type=int, default=20, help="Combinações mostradas no resumo")
+    args = parser.parse_args()
+
+    trials = make_trials(args.objetivo, args.coeficientes, args.w, args.c1, args.c2, args.particulas,
+                         args.bounds, args.iteracoes, args.modo, args.discreto, args.parar_no_alvo,
+                         args.repeticoes, args.seed)
+    print(f"[SWEEP] {len(trials)} tentativas ({len(trials) // args.repeticoes} combinações × "
+          f"{args.repeticoes} repetições) em {args.processos or os.cpu_count()} processos -> {args.saida}")
+    ran = run_sweep(trials, args.saida, args.processos)
+    if ran < len(trials):
+        print(f"[SWEEP] {len(trials) - ran} tentativas já estavam em {args.saida} e foram puladas.")
+    keys = {t.key for t in trials}
+    print(format_summary(aggregate(r for r in load_results(args.saida) if r['key'] in keys), args.top))
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Os módulos do servidor ficam na raiz do repositório, sem pacote
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -0,0 +1,102 @@
+"""
+Firmware do EV3 com o backend simulado (EV3_HAL=sim) contra o server.py de
+verdade, cada um no seu processo, como na arena: saudação, 'pso' no console,
+iterações síncronas e 'desligar' no fim.
+"""
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pytest
+
+from runlog import ACKED, RunLog
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TCP_PORT = 65432
+UDP_PORT = 65431
+ITERATIONS = 3
+
+
+def ports_free() -> bool:
+    for kind, port in ((socket.SOCK_STREAM, TCP_PORT), (socket.SOCK_DGRAM, UDP_PORT)):
+        with socket.socket(socket.AF_INET, kind) as s:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)  # como o servidor: ignora TIME_WAIT
+            try:
+                s.bind(('', port))
+            except OSError:
+                return False
+    return True
+
+
+pytestmark = pytest.mark.skipif(not ports_free(), reason="portas do servidor em uso")
+
+
+def wait_for(path, condition, proc, timeout: float) -> bool:
+    """Espera o log em `path` satisfazer `condition` enquanto `proc` roda."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            if condition(f.read()):
+                return True
+        if proc.poll() is not None:
+            return False
+        time.sleep(0.1)
+    return False
+
+
+def test_sim_firmware_runs_a_pso_against_the_server(tmp_path):
+    # Cópia do firmware com o servidor em cache, sem mexer no ev3/ do repositório
+    ev3 = tmp_path / 'ev3'
+    shutil.copytree(os.path.join(ROOT, 'ev3'), ev3, ignore=shutil.ignore_patterns('__pycache__', 'servidor.txt'))
+    (ev3 / 'servidor.txt').write_text('127.0.0.1')
+    run_log = tmp_path / 'execucao.pso'
+    server_log = tmp_path / 'servidor.log'
+
+    procs = []
+    try:
+        with open(server_log, 'w') as out:
+            server = subprocess.Popen(
+                [sys.executable, '-u', 'server.py', '--metricas-porta', '0', '--iteracoes', str(ITERATIONS),
+                 '--alvo', 'nenhum', '--log-execucao', str(run_log)],
+                cwd=ROOT, stdin=subprocess.PIPE, stdout=out, stderr=subprocess.STDOUT, text=True)
+        procs.append(server)
+        assert wait_for(server_log, lambda log: 'ESCUTANDO TCP' in log, server, 15)
+
+        robots = []
+        for i, start in enumerate(('0,0', '3,0')):
+            env = dict(os.environ, EV3_HAL='sim', EV3_SIM_ID=f'fw-{i}', EV3_SIM_POSICAO=start, EV3_RAPIDO='1')
+            with open(tmp_path / f'fw-{i}.log', 'w') as out:
+                robots.append(subprocess.Popen([sys.executable, '-u', str(ev3 / 'main.py')], cwd=str(ev3), env=env,
+                                               stdout=out, stderr=subprocess.STDOUT))
+        procs.extend(robots)
+        assert wait_for(server_log, lambda log: log.count('Enviou: hello') == 2, server, 30)
+
+        server.stdin.write('pso\n')
+        server.stdin.flush()
+        assert server.wait(timeout=90) == 0
+        for robot in robots:
+            assert robot.wait(timeout=30) == 0
+    finally:
+        for proc in procs:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+
+    log = server_log.read_text()
+    assert 'Algoritmo finalizado' in log and 'Traceback' not in log
+    for i in range(2):
+        firmware = (tmp_path / f'fw-{i}.log').read_text()
+        assert 'Desconectado.' in firmware and 'Traceback' not in firmware
+
+    with RunLog(str(run_log)) as replay:
+        assert [int(block['iteration'][0]) for block in replay.iterations()] == list(range(1, ITERATIONS + 1))
+        for robot_id in ('fw-0', 'fw-1'):
+            records = replay.robot(robot_id)
+            assert len(records) == ITERATIONS
+            assert np.all(records['flags'] & ACKED)
+            # A posição avaliada é a casa que o firmware simulado confirmou: o alvo enviado
+            np.testing.assert_array_equal(records['position'], records['target'])
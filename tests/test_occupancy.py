@@ -0,0 +1,57 @@
+from collections import deque
+
+import numpy as np
+import pytest
+
+from occupancy import OccupancyGrid
+
+BOUNDS = [[0, 0], [9, 7]]
+GOAL = (4, 3)
+
+
+def full_bfs(grid: OccupancyGrid) -> np.ndarray:
+    """Campo de distância calculado do zero, para comparar com o incremental."""
+    dist = np.full(grid.shape, np.inf)
+    goal = grid._rel(grid.goal)
+    if grid.blocked[goal]:
+        return dist
+    dist[goal] = 0
+    queue = deque([goal])
+    while queue:
+        r = queue.popleft()
+        for n in grid.neighbors(r):
+            if not grid.blocked[n] and dist[n] == np.inf:
+                dist[n] = dist[r] + 1
+                queue.append(n)
+    return dist
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_incremental_updates_match_full_bfs(seed):
+    rng = np.random.default_rng(seed)
+    grid = OccupancyGrid(BOUNDS, goal=GOAL)
+    cells = [(x, y) for x in range(10) for y in range(8)]
+    for _ in range(200):
+        cell = cells[rng.integers(len(cells))]
+        grid.set_obstacle(cell, not grid.is_blocked(cell))
+        np.testing.assert_array_equal(grid.dist, full_bfs(grid))
+
+
+def test_wall_forces_detour():
+    grid = OccupancyGrid(BOUNDS, goal=(0, 0))
+    for y in range(7):
+        grid.set_obstacle((1, y))
+    assert grid(np.array([[2.0, 0.0]]))[0] == 16  # sobe até y=7, atravessa e desce de volta
+    grid.set_obstacle((1, 7))
+    assert grid(np.array([[2.0, 0.0]]))[0] == grid.unreachable
+    grid.set_obstacle((1, 3), False)
+    assert grid(np.array([[2.0, 0.0]]))[0] == 8
+
+
+def test_version_only_changes_with_the_map():
+    grid = OccupancyGrid(BOUNDS, goal=GOAL)
+    assert grid.set_obstacle((2, 2))
+    assert not grid.set_obstacle((2, 2))
+    assert not grid.set_obstacle((20, 2))
+    assert grid.version == 1
+    assert grid.obstacles() == [(2, 2)]
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from occupancy import OccupancyGrid
+from planner import RoutePlanner
+from scheduler import timeline
+
+BOUNDS = [[0, 0], [9, 9]]
+
+
+def random_grid(seed: int, density: float = 0.25) -> OccupancyGrid:
+    rng = np.random.default_rng(seed)
+    grid = OccupancyGrid(BOUNDS, goal=(0, 0))
+    for x, y in np.argwhere(rng.random((10, 10)) < density):
+        grid.set_obstacle((int(x), int(y)))
+    return grid
+
+
+def path_cells(start, route):
+    """Casas visitadas ao seguir a rota, sem os ticks parados dos giros."""
+    cells = timeline(start, route)
+    return [c for i, c in enumerate(cells) if i == 0 or c != cells[i - 1]]
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_routes_are_shortest_and_avoid_obstacles(seed):
+    grid = random_grid(seed)
+    planner = RoutePlanner(grid)
+    free = [(x, y) for x in range(10) for y in range(10) if not grid.is_blocked((x, y))]
+    rng = np.random.default_rng(seed)
+    for _ in range(30):
+        start, goal = (free[i] for i in rng.choice(len(free), 2, replace=False))
+        # O campo de distância do mapa com alvo em `goal` é a referência de caminho mínimo
+        reference = OccupancyGrid(BOUNDS, goal=goal)
+        for cell in grid.obstacles():
+            reference.set_obstacle(cell)
+        shortest = reference.dist[start]
+        route = planner.route(start, goal)
+        if shortest == np.inf:
+            assert route is None
+            continue
+        cells = path_cells(start, route)
+        assert cells[-1] == goal
+        assert not any(grid.is_blocked(c) for c in cells)
+        assert all(abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 for a, b in zip(cells, cells[1:]))
+        assert len(cells) - 1 == shortest
+
+
+def test_blocked_or_outside_goal_has_no_route():
+    grid = OccupancyGrid(BOUNDS, goal=(0, 0))
+    grid.set_obstacle((5, 5))
+    planner = RoutePlanner(grid)
+    assert planner.route((0, 0), (5, 5)) is None
+    assert planner.route((0, 0), (10, 0)) is None
+    assert planner.route((3, 3), (3, 3)) == ()
+
+
+def test_cache_is_invalidated_by_map_changes():
+    grid = OccupancyGrid(BOUNDS, goal=(0, 0))
+    planner = RoutePlanner(grid)
+    assert planner.route((0, 0), (0, 4)) == ((0, 4),)
+    assert planner.route((0, 0), (0, 4)) == ((0, 4),)
+    assert (planner.hits, planner.misses) == (1, 1)
+    grid.set_obstacle((0, 2))
+    route = planner.route((0, 0), (0, 4))
+    assert (0, 2) not in path_cells((0, 0), route)
+    assert len(path_cells((0, 0), route)) - 1 == 6
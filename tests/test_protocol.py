@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from ev3.protocol import HEADER, FrameDecoder, ProtocolError, encode
+
+FRAMES = [
+    [('hello', 'robo-1'), ('pos', (0, 0))],
+    [('espera', 1500), ('rota', [(2, 0), (2, 3)])],
+    [('ir', (-3, 7))],
+    [('vivo', 65535)],
+    [('obstaculo', (1, 2)), ('livre', (3, 3)), ('pos', (1, 1))],
+    [('inicio', (2, 5, 'O'))],
+    [('cmd', 'desligar')],
+    [('hello', 'ação-ç')],
+]
+
+
+def expected_messages():
+    return [(tipo, tuple(valor) if tipo == 'rota' else valor) for frame in FRAMES for tipo, valor in frame]
+
+
+def decode_all(decoder, chunks):
+    out = []
+    for chunk in chunks:
+        out.extend((tipo, tuple(valor) if tipo == 'rota' else valor) for tipo, valor in decoder.feed(chunk))
+    return out
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_arbitrary_chunking(seed):
+    stream = b''.join(encode(*frame) for frame in FRAMES)
+    rng = random.Random(seed)
+    chunks, i = [], 0
+    while i < len(stream):
+        n = rng.choice((1, 1, 2, 3, 5, 8, 64))
+        chunks.append(stream[i:i + n])
+        i += n
+    assert decode_all(FrameDecoder(), chunks) == expected_messages()
+
+
+def test_one_byte_at_a_time_and_all_at_once():
+    stream = b''.join(encode(*frame) for frame in FRAMES)
+    assert decode_all(FrameDecoder(), [stream[i:i + 1] for i in range(len(stream))]) == expected_messages()
+    assert decode_all(FrameDecoder(), [stream]) == expected_messages()
+
+
+def test_partial_frame_yields_nothing():
+    frame = encode(('pos', (4, 2)))
+    decoder = FrameDecoder()
+    assert decoder.feed(frame[:-1]) == []
+    assert decoder.feed(frame[-1:]) == [('pos', (4, 2))]
+
+
+def test_malformed_frames():
+    with pytest.raises(ProtocolError):
+        FrameDecoder().feed(HEADER.pack(99, 1, 0))
+    body = b'\x02\x00'  # 'pos' com o ponto cortado
+    with pytest.raises(ProtocolError):
+        FrameDecoder().feed(HEADER.pack(1, 1, len(body)) + body)
+    with pytest.raises(ProtocolError):
+        encode(('inicio', (0, 0, 'X')))
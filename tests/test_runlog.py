@@ -0,0 +1,51 @@
+import numpy as np
+
+from objectives import euclidean_distance
+from runlog import ACKED, RECORD, RunLog, RunLogWriter
+from swarm import SwarmState
+
+BOUNDS = [[0, 0], [3, 6]]
+ROBOTS = ['r0', 'r1', 'r2']
+
+
+def write_run(path, iterations: int = 5):
+    """Grava uma execução curta e devolve os G-Best esperados ao fim de cada iteração."""
+    swarm = SwarmState(rng=np.random.default_rng(0))
+    idx = np.array([swarm.add((x, 0)) for x in range(len(ROBOTS))])
+    gbests = []
+    with RunLogWriter(str(path), mode='sync', bounds=BOUNDS, robots=len(ROBOTS)) as writer:
+        for iteration in range(1, iterations + 1):
+            targets = np.floor(swarm.step(0.5, 1.5, 1.5, BOUNDS, idx))
+            swarm.position[idx] = targets
+            swarm.update_bests(euclidean_distance, idx)
+            writer.write(iteration, swarm, idx, ROBOTS, targets, np.full(len(idx), ACKED))
+            gbests.append(swarm.gbest_val)
+    return gbests
+
+
+def test_replay_by_iteration_and_robot(tmp_path):
+    path = tmp_path / 'execucao.pso'
+    gbests = write_run(path)
+    with RunLog(str(path)) as log:
+        assert log.meta['mode'] == 'sync' and log.meta['robots'] == 3
+        assert len(log) == 15
+        for iteration in range(1, 6):
+            block = log.iteration(iteration)
+            assert block['iteration'].tolist() == [iteration] * 3
+            assert [r.decode() for r in block['robot']] == ROBOTS
+        assert len(log.iteration(0)) == len(log.iteration(6)) == 0
+        assert [len(block) for block in log.iterations()] == [3] * 5
+        assert log.robot('r1')['iteration'].tolist() == [1, 2, 3, 4, 5]
+        curve = log.gbest_curve()
+        assert curve['iteration'].tolist() == [1, 2, 3, 4, 5]
+        np.testing.assert_allclose(curve['gbest_val'], gbests, rtol=1e-6)
+
+
+def test_truncated_record_is_ignored(tmp_path):
+    path = tmp_path / 'execucao.pso'
+    write_run(path, iterations=2)
+    with open(path, 'ab') as f:
+        f.write(b'\0' * (RECORD.itemsize // 2))  # execução interrompida no meio de um registro
+    with RunLog(str(path)) as log:
+        assert len(log) == 6
+        assert log.iteration(2)['iteration'].tolist() == [2, 2, 2]
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from occupancy import OccupancyGrid
+from planner import RoutePlanner
+from scheduler import ReservationScheduler, timeline
+
+SIDE = 8
+
+
+def make_round(seed: int, robots: int, obstacles: int = 6):
+    rng = np.random.default_rng(seed)
+    grid = OccupancyGrid([[0, 0], [SIDE - 1, SIDE - 1]], goal=(0, 0))
+    cells = rng.choice(SIDE * SIDE, size=robots + obstacles, replace=False)
+    for flat in cells[robots:]:
+        grid.set_obstacle((int(flat // SIDE), int(flat % SIDE)))
+    starts = [(int(flat // SIDE), int(flat % SIDE)) for flat in cells[:robots]]
+    targets = [tuple(int(v) for v in t) for t in rng.integers(0, SIDE, size=(robots, 2))]
+    return grid, starts, targets
+
+
+def occupied_cells(starts, assignments):
+    """Casa de cada robô em cada tick; depois de chegar, o robô fica parado no alvo."""
+    lines = [[s] * a.wait + timeline(s, a.waypoints) for s, a in zip(starts, assignments)]
+    horizon = max(len(line) for line in lines)
+    return [line + [line[-1]] * (horizon - len(line)) for line in lines]
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_schedule_has_no_conflicts(seed):
+    grid, starts, targets = make_round(seed, robots=12)
+    occupied = {(SIDE - 1, SIDE - 1)} - set(starts) - set(grid.obstacles())
+    scheduler = ReservationScheduler(grid, RoutePlanner(grid))
+    assignments = scheduler.schedule(starts, targets, occupied)
+    lines = occupied_cells(starts, assignments)
+
+    goals = [a.goal for a in assignments]
+    assert len(set(goals)) == len(goals)
+    assert not set(goals) & occupied
+    for start, a, line in zip(starts, assignments, lines):
+        assert line[-1] == a.goal
+        assert (a.goal == start) == (a.waypoints == ())
+        assert not any(grid.is_blocked(c) or c in occupied for c in line)
+    for t in range(len(lines[0])):
+        at_tick = [line[t] for line in lines]
+        assert len(set(at_tick)) == len(at_tick), f"duas casas iguais no tick {t}"
+        if t:
+            moves = {(line[t - 1], line[t]) for line in lines if line[t - 1] != line[t]}
+            assert not any((b, a) in moves for a, b in moves), f"troca de casas no tick {t}"
+
+
+def test_conflicting_targets_get_distinct_goals():
+    grid = OccupancyGrid([[0, 0], [SIDE - 1, SIDE - 1]], goal=(0, 0))
+    scheduler = ReservationScheduler(grid, RoutePlanner(grid))
+    starts = [(0, 0), (4, 0), (0, 4)]
+    assignments = scheduler.schedule(starts, [(2, 2)] * 3)
+    assert len({a.goal for a in assignments}) == 3
+    assert scheduler.moved_goals == 2
+
+
+def test_head_on_swap_is_resolved():
+    grid = OccupancyGrid([[0, 0], [SIDE - 1, 0]], goal=(0, 0))  # um corredor de uma casa de largura
+    scheduler = ReservationScheduler(grid, RoutePlanner(grid))
+    starts = [(0, 0), (1, 0)]
+    assignments = scheduler.schedule(starts, [(1, 0), (0, 0)])
+    lines = occupied_cells(starts, assignments)
+    for t in range(1, len(lines[0])):
+        assert lines[0][t] != lines[1][t]
+        assert (lines[0][t - 1], lines[0][t]) != (lines[1][t], lines[1][t - 1])
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_shared_starts_are_separated(seed):
+    # Partidas aleatórias (como no simulaCarga) podem repetir a mesma casa
+    grid, starts, targets = make_round(seed, robots=8)
+    starts[1] = starts[2] = starts[0]
+    scheduler = ReservationScheduler(grid, RoutePlanner(grid))
+    assignments = scheduler.schedule(starts, targets)
+    lines = occupied_cells(starts, assignments)
+
+    goals = [a.goal for a in assignments]
+    assert len(set(goals)) == len(goals)
+    for t in range(1, len(lines[0])):
+        at_tick = [line[t] for line in lines]
+        assert len(set(at_tick)) == len(at_tick), f"duas casas iguais no tick {t}"
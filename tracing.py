@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Linha do tempo de uma execução no formato de trace do Chrome.
+
+O Tracer guarda eventos (spans com início e duração, e eventos instantâneos)
+num buffer circular em memória: quando enche, os mais antigos são
+descartados, então pode ficar ligado durante uma execução longa sem crescer.
+dump() grava o JSON "trace event" que o chrome://tracing e o Perfetto
+(ui.perfetto.dev) abrem, com uma linha por robô.
+
+Desligado (o padrão), cada chamada custa só a checagem de `enabled`.
+
+Os instantes são medidos com time.perf_counter e convertidos para o relógio
+de parede, então traces gravados por processos diferentes na mesma máquina
+(servidor e robôs simulados) ficam alinhados ao serem juntados:
+
+    python tracing.py juntar execucao.json servidor.json robo-*.json
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+CAPACITY = 100000  # Eventos guardados no buffer circular
+
+
+class Tracer:
+    def __init__(self, process: str, capacity: int = CAPACITY, enabled: bool = False):
+        """
+        Args:
+            process (str): Nome do processo na linha do tempo (ex.: 'servidor').
+            capacity (int): Máximo de eventos guardados; os mais antigos são descartados.
+            enabled (bool): Se False, nada é registrado até enable().
+        """
+        self.process = process
+        self.pid = os.getpid()
+        self.enabled = enabled
+        self.events = deque(maxlen=capacity)
+        self.dropped = 0
+        self._tids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # Converte perf_counter em microssegundos do relógio de parede
+        self._offset = time.time() - time.perf_counter()
+
+    def enable(self, capacity: Optional[int] = None):
+        if capacity is not None and capacity != self.events.maxlen:
+            self.events = deque(self.events, maxlen=capacity)
+        self.enabled = True
+
+    def _ts(self, instant: float) -> float:
+        return (instant + self._offset) * 1e6
+
+    def _tid(self, track: str) -> int:
+        tid = self._tids.get(track)
+        if tid is None:
+            tid = self._tids[track] = len(self._tids) + 1
+        return tid
+
+    def _add(self, event: dict):
+        with self._lock:
+            if len(self.events) == self.events.maxlen:
+                self.dropped += 1
+            self.events.append(event)
+
+    def complete(self, name: str, start: float, end: float, track: str = 'principal', **args):
+        """Span de `start` a `end` (instantes de time.perf_counter) na linha `track`."""
+        if not self.enabled:
+            return
+        self._add({'name': name, 'ph': 'X', 'ts': self._ts(start), 'dur': (end - start) * 1e6,
+                   'pid': self.pid, 'tid': self._tid(track), 'args': args})
+
+    def instant(self, name: str, track: str = 'principal', **args):
+        """Evento pontual, agora, na linha `track`."""
+        if not self.enabled:
+            return
+        self._add({'name': name, 'ph': 'i', 's': 't', 'ts': self._ts(time.perf_counter()),
+                   'pid': self.pid, 'tid': self._tid(track), 'args': args})
+
+    @contextmanager
+    def span(self, name: str, track: str = 'principal', **args) -> Iterator[None]:
+        """Span em volta de um bloco `with`."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.complete(name, start, time.perf_counter(), track, **args)
+
+    def trace(self) -> dict:
+        """Os eventos do buffer mais os nomes do processo e das linhas, no formato do Chrome."""
+        with self._lock:
+            events = list(self.events)
+            tids = dict(self._tids)
+        meta = [{'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'args': {'name': self.process}}]
+        meta += [{'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': track}}
+                 for track, tid in tids.items()]
+        return {'traceEvents': meta + events, 'displayTimeUnit': 'ms',
+                'otherData': {'process': self.process, 'dropped_events': self.dropped}}
+
+    def dump(self, path: str) -> int:
+        """
+        Grava o trace em `path`.
+
+        Returns:
+            int: Número de eventos gravados.
+        """
+        data = self.trace()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        return len(data['traceEvents'])
+
+
+def merge(output: str, *paths: str) -> int:
+    """Junta traces de vários processos num só arquivo (os instantes já estão no mesmo relógio)."""
+    events = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            events.extend(json.load(f)['traceEvents'])
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+    return len(events)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4 or sys.argv[1] != 'juntar':
+        print("Uso: python tracing.py juntar <saida.json> <trace.json> [<trace.json> ...]")
+        sys.exit(1)
+    print(f"[TRACE] {merge(sys.argv[2], *sys.argv[3:])} eventos gravados em {sys.argv[2]}")